@@ -0,0 +1,143 @@
+"""
+Buffered writer for ActivityLog.
+
+Views call log_activity(); nothing is written inside the request. An event enters
+the in-process buffer only once the surrounding transaction commits
+(transaction.on_commit), so rolled-back saves leave no trace. The buffer is
+written with one bulk_create by a flusher thread: right away once it reaches
+GOALS_ACTIVITY_BUFFER_SIZE entries, otherwise when its oldest entry is
+GOALS_ACTIVITY_FLUSH_SECONDS old (request_finished is a backstop that only wakes
+the thread), and at
+interpreter exit, so a clean shutdown loses nothing. The thread is armed lazily and
+re-armed while entries are left over (a failed write), so no request ever waits
+for the INSERT.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 10_000  # if the DB is down, keep at most this many events for retry
+
+
+class ActivityBuffer:
+    def __init__(self, size=None, interval=None):
+        self._size = size
+        self._interval = interval
+        self._entries = []
+        self._oldest = None  # monotonic time of the oldest pending entry
+        self._timer = None  # the pending flusher thread (a threading.Timer)
+        self._timer_delay = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size or getattr(settings, "GOALS_ACTIVITY_BUFFER_SIZE", 100)
+
+    @property
+    def interval(self):
+        return self._interval or getattr(settings, "GOALS_ACTIVITY_FLUSH_SECONDS", 5.0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            if not self._entries:
+                self._oldest = time.monotonic()
+            self._entries.append(entry)
+            self._arm(0 if len(self._entries) >= self.size else self.interval)
+
+    def _arm(self, delay):
+        # under self._lock: at most one pending flusher, moved earlier when the buffer fills up
+        if self._timer is not None:
+            if self._timer_delay <= delay:
+                return
+            self._timer.cancel()
+        self._timer, self._timer_delay = threading.Timer(delay, self._flush_from_timer), delay
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush_soon(self):
+        """Have the flusher thread write what is pending now, without waiting for it here."""
+        with self._lock:
+            if self._entries:
+                self._arm(0)
+
+    def due(self):
+        oldest = self._oldest
+        return oldest is not None and time.monotonic() - oldest >= self.interval
+
+    def flush(self):
+        """Write everything pending with one bulk_create; returns the number of rows written."""
+        with self._lock:
+            entries, self._entries, self._oldest = self._entries, [], None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not entries:
+            return 0
+        try:
+            ActivityLog.objects.bulk_create(entries, batch_size=500)
+        except Exception:
+            logger.exception("Could not write %d activity log entries; will retry", len(entries))
+            with self._lock:
+                self._entries = (entries + self._entries)[-MAX_PENDING:]
+                self._oldest = self._oldest or time.monotonic()
+            return 0
+        return len(entries)
+
+    def _flush_from_timer(self):
+        with self._lock:
+            if self._timer is threading.current_thread():  # not if cancelled and replaced meanwhile
+                self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()  # this thread's own connections
+            with self._lock:
+                if self._entries:  # a failed write, or entries added during it
+                    self._arm(self.interval)
+
+
+buffer = ActivityBuffer()
+atexit.register(buffer.flush)
+
+
+@receiver(request_finished)
+def flush_if_due(sender, **kwargs):
+    if buffer.due():
+        buffer.flush_soon()
+
+
+def log_activity(user_id, action, object_type, object_id=None, summary=""):
+    if not user_id:
+        return
+    entry = ActivityLog(
+        user_id=user_id,
+        action=action,
+        object_type=object_type,
+        object_id=object_id,
+        summary=(summary or "")[:200],
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: buffer.add(entry))
+
+
+def recent_activity(user, limit=50):
+    """Newest-first slice served straight from the (user, -created_at) index."""
+    return (
+        ActivityLog.objects.filter(user=user)
+        .order_by("-created_at")
+        .values("action", "object_type", "object_id", "summary", "created_at")[:limit]
+    )
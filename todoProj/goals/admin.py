@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Goal, Task
+from .models import ActivityLog, ArchivedGoal, DailyAchievement, Goal, Tag, Task
 
 @admin.register(Goal)
 class GoalAdmin(admin.ModelAdmin):
@@ -12,8 +12,40 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = ("title", "goal", "goal_user", "is_done", "due_date", "created_at")
     list_filter = ("is_done", "goal")
     search_fields = ("title", "goal__title", "goal__user__username")
+    raw_id_fields = ("parent",)
 
     def goal_user(self, obj):
         return getattr(obj.goal.user, "username", "-")
     goal_user.short_description = "User"
-    goal_user.admin_order_field = "goal__user"
\ No newline at end of file
+    goal_user.admin_order_field = "goal__user"
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("name", "user", "created_at")
+    search_fields = ("name", "user__username")
+
+@admin.register(DailyAchievement)
+class DailyAchievementAdmin(admin.ModelAdmin):
+    list_display = ("user", "day", "tasks_completed", "goals_completed")
+    search_fields = ("user__username",)
+
+
+@admin.register(ActivityLog)
+class ActivityLogAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "user", "action", "object_type", "object_id", "summary")
+    list_filter = ("action", "object_type")
+    search_fields = ("summary", "user__username")
+
+    # append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedGoal)
+class ArchivedGoalAdmin(admin.ModelAdmin):
+    list_display = ("title", "user", "completed_at", "archived_at")
+    search_fields = ("title", "user__username")
+
+    # archived rows are read-only copies
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,153 @@
+"""
+Archival of finished goals out of the live goals_goal / goals_task tables.
+
+DONE goals completed more than GOALS_ARCHIVE_AFTER_DAYS ago are copied, with all of
+their tasks, into ArchivedGoal / ArchivedTask (same ids) and deleted from the live
+tables, one bounded batch per transaction. The live indexes and counts then only
+cover what users still work on; the archive page reads the copies, and
+ArchiveTotals keeps per-user counts so achievement totals still include them.
+
+The live rows are removed with plain DELETE statements rather than Model.delete():
+the per-row post_delete receivers would take the completions back off
+DailyAchievement (they still happened) and write one tombstone per row. What those
+receivers are for (tombstones, cache invalidation, live updates) is done once per
+batch instead.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import tags
+from .db import raw_delete
+from .models import (
+    ArchivedGoal, ArchivedTask, ArchiveTotals, Goal, GoalTag, Task, TaskTag, Tombstone,
+)
+from .signals import bulk_changed
+
+GOAL_COLUMNS = ("id", "user_id", "title", "description", "deadline", "created_at", "completed_at", "updated_at")
+TASK_COLUMNS = (
+    "id", "goal_id", "user_id", "parent_id", "path", "rank", "title", "description",
+    "due_date", "is_done", "created_at", "completed_at",
+)
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, "GOALS_ARCHIVE_AFTER_DAYS", 180))
+
+
+def batch_size():
+    return getattr(settings, "GOALS_ARCHIVE_BATCH_SIZE", 200)
+
+
+def candidates(cutoff):
+    # goals finished before completed_at existed fall back to their last edit
+    return Goal.objects.filter(status=Goal.Status.DONE).filter(
+        Q(completed_at__lt=cutoff) | Q(completed_at__isnull=True, updated_at__lt=cutoff)
+    )
+
+
+def _add_totals(user_id, goals, tasks, tasks_completed):
+    changes = {
+        "goals": F("goals") + goals,
+        "tasks": F("tasks") + tasks,
+        "tasks_completed": F("tasks_completed") + tasks_completed,
+    }
+    if ArchiveTotals.objects.filter(user_id=user_id).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ArchiveTotals.objects.create(user_id=user_id, goals=goals, tasks=tasks, tasks_completed=tasks_completed)
+    except IntegrityError:
+        # a concurrent run created the row first
+        ArchiveTotals.objects.filter(user_id=user_id).update(**changes)
+
+
+def archive_batch(cutoff, size=None):
+    """Archive up to `size` eligible goals with their tasks. Returns (goals, tasks) archived."""
+    size = size or batch_size()
+    with transaction.atomic():
+        # skip_locked: goals someone is saving right now wait for the next run
+        goals = list(
+            candidates(cutoff).select_for_update(skip_locked=True).order_by("pk").values(*GOAL_COLUMNS)[:size]
+        )
+        if not goals:
+            return 0, 0
+        goal_ids = [g["id"] for g in goals]
+        tasks = list(Task.objects.filter(goal_id__in=goal_ids).order_by().values(*TASK_COLUMNS))
+        task_ids = [t["id"] for t in tasks]
+
+        now = timezone.now()
+        ArchivedGoal.objects.bulk_create([
+            ArchivedGoal(
+                archived_at=now,
+                **{k: g[k] for k in GOAL_COLUMNS if k not in ("completed_at", "updated_at")},
+                completed_at=g["completed_at"] or g["updated_at"],
+            )
+            for g in goals
+        ])
+        ArchivedTask.objects.bulk_create([ArchivedTask(**t) for t in tasks], batch_size=500)
+
+        raw_delete(TaskTag.objects.filter(task_id__in=task_ids))
+        raw_delete(GoalTag.objects.filter(goal_id__in=goal_ids))
+        # detach subtasks and occurrences first: backends that check foreign keys per row (MySQL)
+        # would otherwise refuse to delete a parent before its children in the same statement
+        Task.objects.filter(goal_id__in=goal_ids).filter(
+            Q(parent__isnull=False) | Q(recurs_from__isnull=False)
+        ).update(parent=None, recurs_from=None)
+        # occurrences moved to a live goal (bulk.move_tasks) still point at their archived template
+        Task.objects.filter(recurs_from_id__in=task_ids).update(
+            recurs_from=None, updated_at=now, version=F("version") + 1
+        )
+        raw_delete(Task.objects.filter(goal_id__in=goal_ids))
+        raw_delete(Goal.objects.filter(pk__in=goal_ids))
+
+        # sync clients drop archived rows like deleted ones
+        Tombstone.objects.bulk_create(
+            [Tombstone(user_id=g["user_id"], object_type="goal", object_id=g["id"], deleted_at=now)
+             for g in goals if g["user_id"]]
+            + [Tombstone(user_id=t["user_id"], object_type="task", object_id=t["id"], deleted_at=now)
+               for t in tasks if t["user_id"]],
+            batch_size=500,
+        )
+
+        owners = {g["id"]: g["user_id"] for g in goals}
+        goal_counts = Counter(owners.values())
+        task_counts = Counter(owners[t["goal_id"]] for t in tasks)
+        done_counts = Counter(owners[t["goal_id"]] for t in tasks if t["is_done"])
+        for user_id, count in goal_counts.items():
+            if user_id is None:
+                continue
+            _add_totals(user_id, count, task_counts[user_id], done_counts[user_id])
+            pks = [g["id"] for g in goals if g["user_id"] == user_id]
+            bulk_changed.send(sender=Goal, user_id=user_id, pks=pks, changes={"archived": True}, goal_ids=set())
+            tags.invalidate(user_id)
+    return len(goals), len(tasks)
+
+
+def archive_completed_goals(older_than=None, size=None, max_batches=None, progress=None):
+    """
+    Archive every eligible goal, batch by batch (each batch commits on its own).
+    `progress(goals, tasks)` is called after each batch. Returns the (goals, tasks) totals.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else archive_after())
+    total_goals = total_tasks = batches = 0
+    while max_batches is None or batches < max_batches:
+        goals, tasks = archive_batch(cutoff, size)
+        if not goals:
+            break
+        batches += 1
+        total_goals += goals
+        total_tasks += tasks
+        if progress:
+            progress(total_goals, total_tasks)
+    return total_goals, total_tasks
+
+
+def totals(user):
+    """{"goals", "tasks", "tasks_completed"} archived for the user (zeros if nothing is)."""
+    row = ArchiveTotals.objects.filter(user=user).values("goals", "tasks", "tasks_completed").first()
+    return row or {"goals": 0, "tasks": 0, "tasks_completed": 0}
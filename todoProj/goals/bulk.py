@@ -0,0 +1,129 @@
+"""
+Set-based bulk actions on a user's tasks and goals.
+
+Each action is one owner-scoped queryset.update() per chunk of ids, with no
+per-row ModelForm and no per-row save(). The model rules that matter (the
+Task.clean() due date vs goal deadline rule and unique_task_title_per_goal)
+are checked for the whole set with a single query each, and one bulk_changed
+signal is sent at the end instead of N post_save signals.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from . import history, tree
+from .models import Goal, Task
+from .ordering import next_rank
+from .signals import bulk_changed
+
+BULK_CHUNK_SIZE = 500  # ids per UPDATE, keeps each statement and its row locks small
+MAX_BULK_IDS = 2000
+
+
+def _chunks(ids, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _update(queryset, ids, **changes):
+    """Chunked UPDATE; returns the number of rows actually changed."""
+    changes.setdefault("updated_at", timezone.now())  # update() skips auto_now
+    changes["version"] = F("version") + 1  # open edit forms must see a conflict
+    return sum(queryset.filter(pk__in=chunk).update(**changes) for chunk in _chunks(ids))
+
+
+def _owned_tasks(user, ids):
+    """{task_id: goal_id} for the ids that belong to the user (foreign ids are silently dropped)."""
+    owned = {}
+    for chunk in _chunks(ids):
+        owned.update(Task.objects.filter(user=user, pk__in=chunk).order_by().values_list("pk", "goal_id"))
+    return owned
+
+
+def set_tasks_done(user, task_ids, is_done):
+    with transaction.atomic():
+        owned = _owned_tasks(user, task_ids)
+        pks = sorted(owned)
+        # only touch rows that actually flip, so completed_at and the daily counters stay exact
+        flipping = Task.objects.filter(user=user, is_done=not is_done)
+        now = timezone.now()
+        if is_done:
+            count = _update(flipping, pks, is_done=True, completed_at=now, updated_at=now)
+            history.record(user.pk, now, tasks=count)
+        else:
+            for chunk in _chunks(pks):
+                history.forget(user.pk, flipping.filter(pk__in=chunk), "tasks")
+            count = _update(flipping, pks, is_done=False, completed_at=None)
+        bulk_changed.send(
+            sender=Task, user_id=user.pk, pks=pks, changes={"is_done": is_done}, goal_ids=set(owned.values())
+        )
+    return count
+
+
+def move_tasks(user, task_ids, goal):
+    """Move tasks under another goal of the same user, enforcing the Task model rules set-wise."""
+    if goal.user_id != user.pk:
+        raise ValidationError("You can only move tasks to your own goals.")
+
+    with transaction.atomic():
+        owned = _owned_tasks(user, task_ids)
+        # whole branches move: top-level tasks carry their subtasks along
+        selected = {}
+        for chunk in _chunks(sorted(owned)):
+            selected.update(Task.objects.filter(pk__in=chunk).order_by().values_list("pk", "path"))
+        if any(path and int(path[:tree.SEGMENT_WIDTH]) not in selected for path in selected.values()):
+            raise ValidationError("Subtasks move with their top-level task; select that task instead.")
+        roots = sorted(pk for pk, path in selected.items() if not path)
+        pks = []
+        for chunk in _chunks(roots):
+            below = tree.under_any(tree.segment(pk) for pk in chunk)
+            pks.extend(Task.objects.filter(Q(pk__in=chunk) | below).order_by().values_list("pk", flat=True))
+        tasks = Task.objects.filter(pk__in=pks)
+
+        # Task.clean(): due date must be on or before the goal deadline
+        if goal.deadline and tasks.filter(due_date__gt=goal.deadline).exists():
+            raise ValidationError("Some tasks are due after the goal deadline.")
+
+        # unique_task_title_per_goal: no clash with the target goal, nor among the moved tasks
+        clashes = (
+            Task.objects.filter(goal=goal, title__in=tasks.values("title"))
+            .exclude(pk__in=pks)
+            .exists()
+        )
+        duplicates = (
+            tasks.order_by().values("title").annotate(n=Count("pk")).filter(n__gt=1).exists()
+        )
+        if clashes or duplicates:
+            raise ValidationError("The target goal already has a task with one of these titles.")
+
+        # append after the target's last task, keeping the moved tasks' relative order
+        offset = (next_rank(goal.pk) - (tasks.aggregate(low=Min("rank"))["low"] or 0))
+        count = _update(Task.objects.filter(user=user), pks, goal=goal, rank=F("rank") + offset)
+        bulk_changed.send(
+            sender=Task, user_id=user.pk, pks=pks, changes={"goal_id": goal.pk},
+            goal_ids=set(owned.values()) | {goal.pk},
+        )
+    return count
+
+
+def set_goals_status(user, goal_ids, status):
+    """Hand-set the status; goals with auto_status keep following their tasks and are skipped."""
+    with transaction.atomic():
+        manual = Goal.objects.filter(user=user, auto_status=False)
+        pks = []
+        for chunk in _chunks(goal_ids):
+            pks.extend(manual.filter(pk__in=chunk).order_by().values_list("pk", flat=True))
+        changing = manual.exclude(status=status)
+        now = timezone.now()
+        if status == Goal.Status.DONE:
+            count = _update(changing, pks, status=status, completed_at=now, updated_at=now)
+            history.record(user.pk, now, goals=count)
+        else:
+            for chunk in _chunks(pks):
+                history.forget(user.pk, changing.filter(pk__in=chunk, status=Goal.Status.DONE), "goals")
+            count = _update(changing, pks, status=status, completed_at=None)
+        bulk_changed.send(
+            sender=Goal, user_id=user.pk, pks=pks, changes={"status": status}, goal_ids=set()
+        )
+    return count
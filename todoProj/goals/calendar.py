@@ -0,0 +1,164 @@
+"""
+iCalendar (.ics) feed of a user's goal deadlines (VEVENT) and task due dates (VTODO).
+
+Calendar clients poll feeds aggressively, so:
+- the feed URL carries a signed token instead of a session (clients cannot log in);
+  it embeds the user's CalendarFeedKey secret, so rotate_feed_token() revokes old URLs,
+- the ETag comes from one aggregate query per table so most polls end as a 304,
+- rows are read with .values() + .iterator() and streamed line by line,
+- optionally (GOALS_CALENDAR_CACHE = True) the rendered feed is cached as one blob
+  that the post_save/post_delete receivers in models.py drop on every change.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .models import CalendarFeedKey, Goal, Task, new_feed_secret
+
+TOKEN_SALT = "goals.calendar"
+CACHE_KEY = "goals:calendar:{user_id}"
+ITERATOR_CHUNK_SIZE = 500
+
+
+# -------- token --------
+def make_feed_token(user):
+    key, _ = CalendarFeedKey.objects.get_or_create(user=user)
+    return signing.Signer(salt=TOKEN_SALT).sign(f"{user.pk}:{key.secret}")
+
+
+def rotate_feed_token(user):
+    """Give the user a new feed secret (every URL handed out so far stops working); returns the new token."""
+    CalendarFeedKey.objects.update_or_create(
+        user=user, defaults={"secret": new_feed_secret(), "rotated_at": timezone.now()}
+    )
+    return make_feed_token(user)
+
+
+def feed_user_id(token):
+    """Return the id of the active user a feed token belongs to, or None (bad signature, old secret, ...)."""
+    try:
+        user_id, secret = signing.Signer(salt=TOKEN_SALT).unsign(token).split(":", 1)
+        user_id = int(user_id)
+    except (signing.BadSignature, ValueError):
+        return None
+    current = (
+        CalendarFeedKey.objects.filter(user_id=user_id, user__is_active=True)
+        .values_list("secret", flat=True)
+        .first()
+    )
+    return user_id if current is not None and constant_time_compare(secret, current) else None
+
+
+# -------- cache --------
+def cache_enabled():
+    return getattr(settings, "GOALS_CALENDAR_CACHE", False)
+
+
+def invalidate_feed(user_id):
+    if user_id and cache_enabled():
+        cache.delete(CACHE_KEY.format(user_id=user_id))
+
+
+# -------- etag --------
+def compute_etag(user_id):
+    """Fingerprint of everything the feed depends on (count catches deletes, max catches edits)."""
+    cached = cache.get(CACHE_KEY.format(user_id=user_id)) if cache_enabled() else None
+    if cached:
+        return cached["etag"]
+    goals = Goal.objects.filter(user_id=user_id).order_by().aggregate(n=Count("pk"), last=Max("updated_at"))
+    tasks = Task.objects.filter(user_id=user_id).order_by().aggregate(n=Count("pk"), last=Max("updated_at"))
+    raw = f"{user_id}|{goals['n']}|{goals['last']}|{tasks['n']}|{tasks['last']}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# -------- rendering --------
+def _escape(text):
+    return (
+        (text or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """RFC 5545 §3.1: lines longer than 75 octets are folded with CRLF + space."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    limit = 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # never cut a multi-byte character in half
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+        limit = 74  # continuation lines lose one octet to the leading space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(dt):
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+def iter_feed(user_id, host="minitodoapp"):
+    """Yield the feed line by line; rows are streamed from the DB, never materialized."""
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold("PRODID:-//miniTodoApp//Goals//EN")
+    yield _fold("CALSCALE:GREGORIAN")
+
+    goals = (
+        Goal.objects.filter(user_id=user_id, deadline__isnull=False)
+        .order_by()
+        .values("pk", "title", "description", "status", "deadline", "updated_at")
+    )
+    for g in goals.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield _fold("BEGIN:VEVENT")
+        yield _fold(f"UID:goal-{g['pk']}@{host}")
+        yield _fold(f"DTSTAMP:{_stamp(g['updated_at'])}")
+        yield _fold(f"DTSTART;VALUE=DATE:{g['deadline']:%Y%m%d}")
+        yield _fold(f"SUMMARY:{_escape(g['title'])}")
+        if g["description"]:
+            yield _fold(f"DESCRIPTION:{_escape(g['description'])}")
+        yield _fold(f"X-GOAL-STATUS:{g['status'].upper()}")
+        yield _fold("END:VEVENT")
+
+    tasks = (
+        Task.objects.filter(user_id=user_id, due_date__isnull=False)
+        .order_by()
+        .values("pk", "title", "description", "is_done", "due_date", "updated_at", "goal__title")
+    )
+    for t in tasks.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield _fold("BEGIN:VTODO")
+        yield _fold(f"UID:task-{t['pk']}@{host}")
+        yield _fold(f"DTSTAMP:{_stamp(t['updated_at'])}")
+        yield _fold(f"DUE;VALUE=DATE:{t['due_date']:%Y%m%d}")
+        yield _fold(f"SUMMARY:{_escape(t['title'])}")
+        if t["description"]:
+            yield _fold(f"DESCRIPTION:{_escape(t['description'])}")
+        yield _fold(f"CATEGORIES:{_escape(t['goal__title'])}")
+        yield _fold("STATUS:COMPLETED" if t["is_done"] else "STATUS:NEEDS-ACTION")
+        yield _fold("END:VTODO")
+
+    yield _fold("END:VCALENDAR")
+
+
+def cached_feed(user_id, host="minitodoapp"):
+    """Return {"etag", "body"} from the cache, rebuilding the blob if it was invalidated."""
+    key = CACHE_KEY.format(user_id=user_id)
+    blob = cache.get(key)
+    if blob is None:
+        etag = compute_etag(user_id)
+        blob = {"etag": etag, "body": "".join(iter_feed(user_id, host)).encode("utf-8")}
+        cache.set(key, blob, getattr(settings, "GOALS_CALENDAR_CACHE_TIMEOUT", 60 * 60 * 24))
+    return blob
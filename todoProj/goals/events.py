@@ -0,0 +1,140 @@
+"""
+Live goal/task change events for the SSE endpoint (views.EventStreamView).
+
+Broker: in-process pub/sub keyed by user id. Every open SSE connection owns a
+small bounded asyncio.Queue, so an idle connection is one parked coroutine and
+a queue, not a thread. publish() is safe to call from sync code in any thread
+(signal receivers, sync views): it hands the event to the subscriber's event loop
+with call_soon_threadsafe. A subscriber that falls behind loses its queued events
+and gets a single {"type": "resync"} event telling the client to re-fetch the page.
+
+Multi-process deployments: with GOALS_EVENTS_DB_BRIDGE = True, notify() writes
+each event to the LiveEvent outbox instead, in the transaction of the change it
+describes, and each process polls the outbox (every GOALS_EVENTS_POLL_SECONDS,
+only for users with an open connection) and publishes the events unchanged
+through its own broker, so clients get the same events either way. A row's
+created_at is set when it is written and the row only shows up at commit, so a
+later-committed row can sort before one already sent: each poll re-reads the last
+bridge_lag() (GOALS_EVENTS_BRIDGE_LAG_SECONDS, longer than the longest write
+transaction) and skips the rows it has already published.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .db import raw_delete
+
+QUEUE_SIZE = 100
+
+
+def bridge_enabled():
+    return getattr(settings, "GOALS_EVENTS_DB_BRIDGE", False)
+
+
+def bridge_lag():
+    return timedelta(seconds=getattr(settings, "GOALS_EVENTS_BRIDGE_LAG_SECONDS", 30))
+
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # runs on self.loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"type": "resync"}
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._bridge = None
+
+    def subscribe(self, user_id):
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(sub)
+        if bridge_enabled():
+            self._ensure_bridge()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def user_ids(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(sub)  # its loop is gone
+
+    # -------- database polling bridge --------
+    def _ensure_bridge(self):
+        if self._bridge is None or self._bridge.done():
+            self._bridge = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self):
+        started = timezone.now()
+        seen = {}  # pk -> created_at of the rows published that are still inside the window
+        interval = getattr(settings, "GOALS_EVENTS_POLL_SECONDS", 2.0)
+        while self.user_ids():
+            await asyncio.sleep(interval)
+            since = max(started, timezone.now() - bridge_lag())
+            seen = {pk: created_at for pk, created_at in seen.items() if created_at >= since}
+            rows = await sync_to_async(_events_since)(since, seen, self.user_ids())
+            for pk, user_id, payload, created_at in rows:
+                seen[pk] = created_at
+                self.publish(user_id, payload)
+
+
+def _events_since(since, seen, user_ids):
+    from .models import LiveEvent
+    return list(
+        LiveEvent.objects.filter(created_at__gte=since, user_id__in=user_ids)
+        .exclude(pk__in=list(seen))
+        .order_by("created_at", "pk")
+        .values_list("pk", "user_id", "payload", "created_at")[:1000]
+    )
+
+
+def prune(older_than=timedelta(days=1)):
+    """Delete outbox rows no bridge will read again. Returns the number deleted."""
+    from .models import LiveEvent
+    return raw_delete(LiveEvent.objects.filter(created_at__lt=timezone.now() - max(older_than, bridge_lag())))
+
+
+broker = Broker()
+
+
+def notify(user_id, event):
+    """Publish once the current transaction commits (through the outbox when the DB bridge is on)."""
+    if not user_id:
+        return
+    if bridge_enabled():
+        from .models import LiveEvent
+        LiveEvent.objects.create(user_id=user_id, payload=event)
+    else:
+        transaction.on_commit(lambda: broker.publish(user_id, event))
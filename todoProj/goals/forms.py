@@ -1,27 +1,76 @@
 from django import forms
 from django.forms import inlineformset_factory, BaseInlineFormSet
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from .models import Goal, Task
+from . import tags, tree
+from .bulk import MAX_BULK_IDS
 
-class GoalForm(forms.ModelForm):
+class VersionedFormMixin:
+    """Carries the row version the user started editing from (see OptimisticLockMixin)."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["version"].required = False
+
+    def clean_version(self):
+        # clients that don't send a version fall back to the version we loaded
+        return self.cleaned_data.get("version") or self.instance.version
+
+
+class TagsFormMixin:
+    """
+    Free-text "tag_names" field ("work, health"); missing tags are created for the owner.
+    Tags are written in _save_m2m(), i.e. on save() or on the save_m2m() that follows
+    a save(commit=False). Clients that don't send the field leave the tags untouched.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["tag_names"] = forms.CharField(
+            label="Tags", required=False, help_text="Comma separated, e.g. work, health",
+            initial=", ".join(tag.name for tag in self.instance.tags.all()) if self.instance.pk else "",
+        )
+
+    def clean_tag_names(self):
+        if self.add_prefix("tag_names") not in self.data:
+            return None
+        names = tags.parse_names(self.cleaned_data["tag_names"])
+        if len(names) > tags.MAX_TAGS_PER_OBJECT:
+            raise ValidationError(f"Use at most {tags.MAX_TAGS_PER_OBJECT} tags.")
+        if any(len(name) > tags.NAME_MAX_LENGTH for name in names):
+            raise ValidationError(f"Tags can be at most {tags.NAME_MAX_LENGTH} characters long.")
+        return names
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        if self.cleaned_data.get("tag_names") is not None:
+            tags.set_tags(self.instance, self.cleaned_data["tag_names"])
+
+
+class GoalForm(TagsFormMixin, VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = Goal
-        fields = ["title", "description", "status", "deadline"]
+        fields = ["title", "description", "status", "auto_status", "deadline", "version"]
         widgets = {
+            "version": forms.HiddenInput(),
             "title": forms.TextInput(attrs={"placeholder": "Goal title"}),
             "description": forms.Textarea(attrs={"rows": 4, "placeholder": "Describe the goal…"}),
             "deadline": forms.DateInput(attrs={"type": "date"}),
             "status": forms.Select(),
         }
 
-class TaskForm(forms.ModelForm):
+class TaskForm(TagsFormMixin, VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = Task
-        fields = ["title", "description", "due_date", "is_done"]
+        fields = [
+            "title", "description", "parent", "due_date", "is_done",
+            "recurrence", "recurrence_interval", "recurrence_until", "version",
+        ]
+        labels = {"parent": "Subtask of", "recurrence": "Repeats", "recurrence_interval": "Every", "recurrence_until": "Until"}
         widgets = {
+            "version": forms.HiddenInput(),
             "title": forms.TextInput(attrs={"placeholder": "Task title"}),
             "description": forms.Textarea(attrs={"rows": 3, "placeholder": "Details (optional)"}),
             "due_date": forms.DateInput(attrs={"type": "date"}),
+            "recurrence_until": forms.DateInput(attrs={"type": "date"}),
         }
 
     def __init__(self, *args, user=None, goal=None, **kwargs):
@@ -40,6 +89,16 @@ class TaskForm(forms.ModelForm):
                 except ObjectDoesNotExist:
                     self._goal = None
 
+        # parent choices: the goal's other tasks, minus this task's own subtree
+        parents = Task.objects.filter(goal_id=self._goal.id if self._goal else None).only("id", "title")
+        if self.instance.pk:
+            parents = parents.exclude(pk=self.instance.pk).exclude(path__startswith=tree.subtree_prefix(self.instance))
+        self.fields["parent"].queryset = parents
+        self.fields["recurrence_interval"].required = False  # blank means 1
+
+    def clean_recurrence_interval(self):
+        return self.cleaned_data.get("recurrence_interval") or 1
+
     # No custom clean() here — rely on Task.clean() in the model via form.is_valid()
 
     def save(self, commit=True):
@@ -50,6 +109,7 @@ class TaskForm(forms.ModelForm):
             obj.user = self._user
         if commit:
             obj.save()  # This will run model validation via ModelForm pipeline
+            self._save_m2m()  # tags
         return obj
 
 class BaseTaskInlineFormSet(BaseInlineFormSet):
@@ -82,6 +142,71 @@ TaskInlineFormSet = inlineformset_factory(
     formset=BaseTaskInlineFormSet,
 )
 
+
+# -------- Bulk actions --------
+class IdListField(forms.Field):
+    """Many ids posted under one name (e.g. checkboxes) -> sorted list of unique ints."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return sorted({int(v) for v in value})
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid selection.")
+
+    def validate(self, value):
+        super().validate(value)
+        if len(value) > MAX_BULK_IDS:
+            raise ValidationError(f"Select at most {MAX_BULK_IDS} items at once.")
+
+
+class BulkTaskActionForm(forms.Form):
+    ACTIONS = [("done", "Mark done"), ("undone", "Mark not done"), ("move", "Move to goal")]
+
+    action = forms.ChoiceField(choices=ACTIONS)
+    task_ids = IdListField(error_messages={"required": "Select at least one task."})
+    goal = forms.ModelChoiceField(queryset=Goal.objects.none(), required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields["goal"].queryset = Goal.objects.filter(user=user)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("action") == "move" and not cleaned.get("goal"):
+            self.add_error("goal", "Choose the goal to move the tasks to.")
+        return cleaned
+
+
+class BulkGoalStatusForm(forms.Form):
+    status = forms.ChoiceField(choices=Goal.Status.choices)
+    goal_ids = IdListField(error_messages={"required": "Select at least one goal."})
+
+
+class TagFilterForm(forms.Form):
+    """GET filter: all of / any of / none of the listed tags (comma separated)."""
+    all_tags = forms.CharField(required=False, label="All of")
+    any_tags = forms.CharField(required=False, label="Any of")
+    no_tags = forms.CharField(required=False, label="None of")
+
+    def spec(self):
+        """Keyword arguments for tags.filter_queryset() / tags.resolve()."""
+        if not self.is_valid():
+            return {}
+        data = self.cleaned_data
+        return {
+            "all_of": tags.parse_names(data["all_tags"]),
+            "any_of": tags.parse_names(data["any_tags"]),
+            "none_of": tags.parse_names(data["no_tags"]),
+        }
+
+    def is_active(self):
+        return any(self.spec().values())
+
+
 # from django import forms
 # from django.forms import inlineformset_factory, BaseInlineFormSet
 # from django.core.exceptions import ObjectDoesNotExist
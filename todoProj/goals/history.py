@@ -0,0 +1,95 @@
+"""
+Incremental maintenance of DailyAchievement, the per-user daily completion counters.
+
+A completion adds 1 to the day it happened; un-completing or deleting a completed
+item takes 1 off the day it was completed. Every change is one UPDATE ... SET n = n + ?
+on the (user, day) row, with an INSERT the first time a day is touched.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyAchievement
+
+
+def _day(when):
+    return timezone.localdate(when) if hasattr(when, "hour") else when
+
+
+def record(user_id, when, tasks=0, goals=0):
+    if not (tasks or goals) or when is None:
+        return
+    day = _day(when)
+    changes = {
+        "tasks_completed": F("tasks_completed") + tasks,
+        "goals_completed": F("goals_completed") + goals,
+    }
+    if DailyAchievement.objects.filter(user_id=user_id, day=day).update(**changes):
+        return
+    if tasks < 0 or goals < 0:
+        return  # nothing recorded for that day yet (not backfilled), nothing to take off
+    try:
+        with transaction.atomic():
+            DailyAchievement.objects.create(user_id=user_id, day=day, tasks_completed=tasks, goals_completed=goals)
+    except IntegrityError:
+        # another request created the row first
+        DailyAchievement.objects.filter(user_id=user_id, day=day).update(**changes)
+
+
+def forget(user_id, queryset, field):
+    """Take completed rows of `queryset` off their completion days, one aggregate query for the set."""
+    per_day = (
+        queryset.filter(completed_at__isnull=False)
+        .order_by()
+        .annotate(day=TruncDate("completed_at"))
+        .values("day")
+        .annotate(n=Count("pk"))
+    )
+    for row in per_day:
+        record(user_id, row["day"], **{field: -row["n"]})
+
+
+# -------- trend charts (read path) --------
+def _bars(points):
+    """[(label, count)] -> [{"label", "count", "pct"}] scaled to the largest bar."""
+    top = max((count for _, count in points), default=0) or 1
+    return [{"label": label, "count": count, "pct": round(100 * count / top)} for label, count in points]
+
+
+def trends(user, today=None, days=30, weeks=12, months=12):
+    """
+    Daily/weekly task completions and monthly goal completions, read from at most
+    a year of DailyAchievement rows through the (user, day) unique index.
+    """
+    today = today or timezone.localdate()
+    first_month = today.replace(day=1)
+    for _ in range(months - 1):
+        first_month = (first_month - timedelta(days=1)).replace(day=1)
+    start = min(today - timedelta(days=days - 1), today - timedelta(weeks=weeks), first_month)
+
+    rows = DailyAchievement.objects.filter(user=user, day__gte=start).values_list(
+        "day", "tasks_completed", "goals_completed"
+    )
+    per_day, per_week, per_month = defaultdict(int), defaultdict(int), defaultdict(int)
+    for day, tasks, goals in rows:
+        per_day[day] += tasks
+        per_week[day - timedelta(days=day.weekday())] += tasks
+        per_month[day.replace(day=1)] += goals
+
+    daily = [today - timedelta(days=i) for i in reversed(range(days))]
+    this_week = today - timedelta(days=today.weekday())
+    weekly = [this_week - timedelta(weeks=i) for i in reversed(range(weeks))]
+    monthly, month = [], first_month
+    for _ in range(months):
+        monthly.append(month)
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    return {
+        "tasks_per_day": _bars([(d.strftime("%b %d"), per_day[d]) for d in daily]),
+        "tasks_per_week": _bars([(w.strftime("%b %d"), per_week[w]) for w in weekly]),
+        "goals_per_month": _bars([(m.strftime("%b %Y"), per_month[m]) for m in monthly]),
+    }
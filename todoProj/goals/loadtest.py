@@ -0,0 +1,257 @@
+"""
+Load test: concurrent simulated users against a real server on a seeded SQLite copy.
+
+`manage.py loadtest` starts the app in a child process (threaded WSGI server on
+127.0.0.1, DEBUG off, a fresh SQLite database migrated and seeded with users, goals
+and tasks, warmed up with todoProj.warmup) and drives it from this process with
+asyncio: every virtual user logs in through users:login like a browser (CSRF cookie
++ session cookie), then loops over a weighted scenario mix, optionally with think
+time between steps. Client and server run in separate processes, so neither
+competes with the other for the GIL.
+
+Latency is recorded per "METHOD url-name" and reported as throughput and
+percentiles; the JSON report has a fixed layout so runs can be diffed (--baseline).
+
+The HTTP client is a small keep-alive HTTP/1.1 client on asyncio streams, so the
+harness needs nothing beyond Django.
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+
+from .models import Goal, Task
+from .ordering import RANK_GAP
+
+PASSWORD = "loadtest-password"
+USERNAME = "loaduser{:04d}"
+DEFAULT_MIX = {"list": 40, "detail": 30, "create_task": 10, "achievements": 15, "relogin": 5}
+
+
+# -------- server side (child process) --------
+def seed(users, goals, tasks):
+    """Create the accounts with their goals and tasks. Returns [{"username", "goals": [ids]}]."""
+    User = get_user_model()
+    hashed = make_password(PASSWORD)  # hashed once: PBKDF2 per user would dominate the seeding
+    User.objects.bulk_create([User(username=USERNAME.format(i), password=hashed) for i in range(users)])
+    accounts = list(User.objects.filter(username__startswith="loaduser").order_by("pk"))
+    Goal.objects.bulk_create(
+        [Goal(user=user, title=f"Goal {g}", description="Seeded by the load test. " * 4)
+         for user in accounts for g in range(goals)],
+        batch_size=500,
+    )
+    owned = defaultdict(list)
+    for pk, user_id in Goal.objects.order_by("pk").values_list("pk", "user_id"):
+        owned[user_id].append(pk)
+    Task.objects.bulk_create(
+        [Task(user_id=user_id, goal_id=goal_id, title=f"Task {t}", rank=(t + 1) * RANK_GAP, is_done=t % 3 == 0)
+         for user_id, goal_ids in owned.items() for goal_id in goal_ids for t in range(tasks)],
+        batch_size=1000,
+    )
+    return [{"username": user.username, "goals": owned[user.pk]} for user in accounts]
+
+
+def serve(port, users, goals, tasks):
+    """Migrate, seed, warm up, print one READY line of JSON to stdout, then serve forever."""
+    import sys
+
+    from django.core.management import call_command
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    from todoProj.warmup import warm_up
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):  # the access log would cost more than the views
+            pass
+
+    class Server(ThreadedWSGIServer):
+        request_queue_size = 256  # every virtual user connects at once
+
+    call_command("migrate", verbosity=0, interactive=False)
+    accounts = seed(users, goals, tasks)
+    server = Server(("127.0.0.1", port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    warm_up()
+    sys.stdout.write(json.dumps({"port": server.server_address[1], "accounts": accounts}) + "\n")
+    sys.stdout.flush()
+    server.serve_forever()
+
+
+# -------- client side --------
+class Client:
+    """One browser: a keep-alive connection and a cookie jar."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, data=None, headers=None):
+        """Returns (status, headers, body). Reconnects once if the server dropped the connection."""
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(method, path, data, headers or {})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _exchange(self, method, path, data, extra):
+        body = urlencode(data).encode() if data is not None else b""
+        headers = {"Host": f"{self.host}:{self.port}", "Connection": "keep-alive", "Accept-Encoding": "identity"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        if data is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        if body or method == "POST":
+            headers["Content-Length"] = str(len(body))
+        headers.update(extra)
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        response_headers = defaultdict(list)
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()].append(value.strip())
+
+        if "chunked" in ",".join(response_headers.get("transfer-encoding", [])):
+            content = bytearray()
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                content += await self.reader.readexactly(size)
+                await self.reader.readline()
+            await self.reader.readline()
+        elif "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"][0]))
+        else:
+            content = await self.reader.read()  # delimited by the server closing the connection
+            response_headers["connection"] = ["close"]
+        if "close" in ",".join(response_headers.get("connection", [])).lower():
+            await self.close()
+
+        for raw in response_headers.get("set-cookie", []):
+            for name, morsel in SimpleCookie(raw).items():
+                if morsel.value and morsel["max-age"] != "0":
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)
+        return status, response_headers, bytes(content)
+
+
+class VirtualUser:
+    def __init__(self, client, account, stats, rng):
+        self.client, self.account, self.stats, self.rng = client, account, stats, rng
+
+    async def call(self, method, name, expected, data=None, **kwargs):
+        path = reverse(name, kwargs=kwargs or None)
+        headers = {"X-CSRFToken": self.client.cookies.get(settings.CSRF_COOKIE_NAME, "")} if method == "POST" else {}
+        start = time.perf_counter()
+        try:
+            status, _, _ = await self.client.request(method, path, data, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            status = 0
+        self.stats[f"{method} {name}"].append((time.perf_counter() - start, status == expected))
+        return status == expected
+
+    async def login(self):
+        await self.call("GET", "users:login", 200)  # sets the CSRF cookie
+        return await self.call("POST", "users:login", 302, {"username": self.account["username"], "password": PASSWORD})
+
+    # -------- scenario steps --------
+    async def list(self):
+        await self.call("GET", "goals:list", 200)
+
+    async def detail(self):
+        await self.call("GET", "goals:goal_detail", 200, pk=self.rng.choice(self.account["goals"]))
+
+    async def create_task(self):
+        goal_id = self.rng.choice(self.account["goals"])
+        if await self.call("GET", "goals:task_create", 200, goal_id=goal_id):
+            data = {"title": f"Load {uuid.uuid4().hex[:12]}", "description": "", "recurrence": ""}
+            await self.call("POST", "goals:task_create", 302, data, goal_id=goal_id)
+
+    async def achievements(self):
+        await self.call("GET", "goals:achievements", 200)
+
+    async def relogin(self):
+        await self.call("POST", "users:logout", 302, {})
+        await self.login()
+
+
+async def _virtual_user(host, port, account, mix, duration, think, stats, rng):
+    client = Client(host, port)
+    user = VirtualUser(client, account, stats, rng)
+    steps, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+    try:
+        await user.login()
+        while time.perf_counter() < deadline:
+            await getattr(user, rng.choices(steps, weights)[0])()
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+    finally:
+        await client.close()
+
+
+async def _drive(host, port, accounts, mix, duration, think, seed_value):
+    stats = defaultdict(list)
+    await asyncio.gather(*(
+        _virtual_user(host, port, account, mix, duration, think, stats, random.Random(f"{seed_value}:{i}"))
+        for i, account in enumerate(accounts)
+    ))
+    return stats
+
+
+def run(port, accounts, mix=None, duration=30.0, think=0.0, seed_value=1, host="127.0.0.1"):
+    """Drive the server with one virtual user per account. Returns the report's "totals" and "endpoints"."""
+    start = time.perf_counter()
+    stats = asyncio.run(_drive(host, port, accounts, mix or DEFAULT_MIX, duration, think, seed_value))
+    elapsed = time.perf_counter() - start
+    endpoints = {name: summarize(samples, elapsed) for name, samples in sorted(stats.items())}
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "totals": summarize([sample for samples in stats.values() for sample in samples], elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds * 1000 for seconds, _ in samples)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p90, p95, p99 = cuts[49], cuts[89], cuts[94], cuts[98]
+    else:
+        p50 = p90 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(p50, 2),
+        "p90_ms": round(p90, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
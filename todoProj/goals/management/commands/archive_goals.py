@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from goals import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move DONE goals completed more than GOALS_ARCHIVE_AFTER_DAYS ago, with their tasks, "
+        "into the archive tables, one bounded batch per transaction. Safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive goals completed more than this many days ago.")
+        parser.add_argument("--batch-size", type=int, help="Goals per transaction (default GOALS_ARCHIVE_BATCH_SIZE).")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches (e.g. for a nightly time box).")
+
+    def handle(self, *args, days=None, batch_size=None, max_batches=None, **options):
+        older_than = timedelta(days=days) if days is not None else None
+
+        def progress(goals, tasks):
+            self.stdout.write(f"{goals} goal(s), {tasks} task(s) archived")
+
+        goals, tasks = archive.archive_completed_goals(older_than, batch_size, max_batches, progress)
+        self.stdout.write(self.style.SUCCESS(f"Archive complete: {goals} goal(s), {tasks} task(s)."))
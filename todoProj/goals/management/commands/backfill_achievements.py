@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+
+from goals.models import ArchivedGoal, ArchivedTask, DailyAchievement, Goal, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the DailyAchievement rollup from Task/Goal completion history, "
+        "one chunk of users per transaction. Safe to re-run; only writes DailyAchievement "
+        "unless --repair is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200, help="Users per transaction (default 200).")
+        parser.add_argument("--user", type=int, help="Only rebuild this user id.")
+        parser.add_argument(
+            "--repair", action="store_true",
+            help="Also store the owner and completed_at guessed for old tasks/goals that lack them.",
+        )
+
+    def handle(self, *args, chunk_size=200, user=None, repair=False, **options):
+        users = get_user_model().objects.order_by("pk").values_list("pk", flat=True)
+        if user is not None:
+            users = users.filter(pk=user)
+
+        done_users, rows, last_pk = 0, 0, 0
+        while True:
+            chunk = list(users.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                if repair:
+                    self.repair(chunk)
+                rows += self.rebuild(chunk)
+            done_users += len(chunk)
+            last_pk = chunk[-1]
+            self.stdout.write(f"{done_users} user(s) processed, {rows} day row(s) written")
+        self.stdout.write(self.style.SUCCESS("Backfill complete."))
+
+    def repair(self, user_ids):
+        # tasks saved through the inline formset before it set their owner
+        Task.objects.filter(user__isnull=True, goal__user_id__in=user_ids).update(
+            user_id=Subquery(Goal.objects.filter(pk=OuterRef("goal_id")).values("user_id")[:1])
+        )
+        # completions from before completed_at existed: the last edit is the best guess
+        Task.objects.filter(goal__user_id__in=user_ids, is_done=True, completed_at__isnull=True).update(
+            completed_at=F("updated_at")
+        )
+        Goal.objects.filter(user_id__in=user_ids, status=Goal.Status.DONE, completed_at__isnull=True).update(
+            completed_at=F("updated_at")
+        )
+
+    def rebuild(self, user_ids):
+        # the same guesses as repair(), made on the fly: a task without an owner belongs to
+        # its goal's user, a completion without completed_at happened at the last edit
+        counters = defaultdict(lambda: {"tasks_completed": 0, "goals_completed": 0})
+        sources = [
+            (Task.objects.filter(is_done=True), "tasks_completed",
+             Coalesce("user_id", "goal__user_id"), Coalesce("completed_at", "updated_at")),
+            (Goal.objects.filter(status=Goal.Status.DONE), "goals_completed",
+             F("user_id"), Coalesce("completed_at", "updated_at")),
+            # archived completions still count (see goals/archive.py)
+            (ArchivedTask.objects.filter(is_done=True), "tasks_completed", F("user_id"), F("completed_at")),
+            (ArchivedGoal.objects.all(), "goals_completed", F("user_id"), F("completed_at")),
+        ]
+        for queryset, field, owner, when in sources:
+            per_day = (
+                queryset.annotate(owner=owner, when=when)
+                .filter(owner__in=user_ids, when__isnull=False)
+                .order_by()
+                .annotate(day=TruncDate("when"))
+                .values("owner", "day")
+                .annotate(n=Count("pk"))
+            )
+            for row in per_day:
+                counters[(row["owner"], row["day"])][field] += row["n"]
+
+        DailyAchievement.objects.filter(user_id__in=user_ids).delete()
+        DailyAchievement.objects.bulk_create(
+            [DailyAchievement(user_id=uid, day=day, **counts) for (uid, day), counts in counters.items()],
+            batch_size=1000,
+        )
+        return len(counters)
@@ -0,0 +1,131 @@
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from goals.models import Goal, Task
+from goals.views import GoalCardsMixin, GoalListView
+
+WORDS = "plan review write test ship measure refine notes detail context ".split()
+
+
+class _UserGoals:
+    def __init__(self, user):
+        self.user = user
+
+    def get_queryset(self):
+        return Goal.objects.filter(user=self.user)
+
+
+class _Cards(GoalCardsMixin, _UserGoals):
+    """The list page's card queries, without a request around them."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Memory / DB-transfer benchmark of the goal list: full model rows (the old card "
+        "queries) vs. deferred descriptions with SQL-side previews and .values() task rows. "
+        "Seeds a synthetic user inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goals", type=int, default=300)
+        parser.add_argument("--tasks", type=int, default=10, help="Tasks per goal.")
+        parser.add_argument("--description-kb", type=int, default=16, help="Size of every description.")
+
+    def handle(self, *args, goals, tasks, description_kb, **options):
+        self.first_byte = {}
+        with transaction.atomic():
+            user = self.seed(goals, tasks, description_kb)
+            results = [
+                self.measure("full rows (before)", lambda: self.full_rows(user)),
+                self.measure("preview rows (after)", lambda: self.preview_rows(user)),
+                self.measure("GoalListView page (after)", lambda: self.render_page(user)),
+                self.measure("GoalListView streamed", lambda: self.stream_page(user)),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{goals} goals x {tasks} tasks, {description_kb} KB descriptions")
+        self.stdout.write(f"{'':28}{'peak KB':>10}{'text KB':>10}{'queries':>9}{'ms':>9}")
+        for label, peak, text, queries, ms in results:
+            self.stdout.write(f"{label:28}{peak / 1024:>10.0f}{text / 1024:>10.0f}{queries:>9}{ms:>9.1f}")
+        self.stdout.write("text KB = description (or, for the page, response) bytes pulled into Python.")
+        self.stdout.write(f"first byte: {self.first_byte['buffered']:.1f} ms buffered, "
+                          f"{self.first_byte['streamed']:.1f} ms streamed")
+
+    # -------- dataset --------
+    def seed(self, goals, tasks, description_kb):
+        user = get_user_model().objects.create_user(f"bench-{uuid.uuid4().hex[:8]}")
+        words = (WORDS * (description_kb * 1024 // len(" ".join(WORDS)) + 1))
+        description = " ".join(words)[:description_kb * 1024]
+        created = Goal.objects.bulk_create(
+            [Goal(user=user, title=f"Goal {i}", description=description) for i in range(goals)], batch_size=500
+        )
+        if not created or created[0].pk is None:  # backends that don't return ids from bulk_create
+            created = list(Goal.objects.filter(user=user))
+        Task.objects.bulk_create(
+            [Task(user=user, goal=goal, title=f"Task {j}", description=description, rank=j)
+             for goal in created for j in range(tasks)],
+            batch_size=1000,
+        )
+        return user
+
+    # -------- strategies --------
+    def full_rows(self, user):
+        goals = list(Goal.objects.filter(user=user).prefetch_related("tags"))
+        rows = [(goal, list(goal.tasks.all())) for goal in goals]  # what {% for task in goal.tasks.all %} did
+        text = sum(len(goal.description) + sum(len(task.description) for task in tasks) for goal, tasks in rows)
+        return rows, text
+
+    def preview_rows(self, user):
+        cards = _Cards(user)
+        goals = cards.attach_task_rows(list(cards.get_queryset()))
+        return goals, sum(len(goal.description_preview) for goal in goals)
+
+    def page_request(self, user):
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        request = RequestFactory().get("/goals/", HTTP_HOST=host)
+        request.user = user
+        request.session = {}
+        request._messages = []
+        return request
+
+    def render_page(self, user):
+        start = time.perf_counter()
+        response = GoalListView.as_view()(self.page_request(user))
+        response.render()
+        self.first_byte.setdefault("buffered", (time.perf_counter() - start) * 1000)  # keep the untraced run
+        return response, len(response.content)
+
+    def stream_page(self, user):
+        # chunks are counted and dropped as they come, like a WSGI server writing them out
+        start = time.perf_counter()
+        with override_settings(GOALS_LIST_STREAMING=True):
+            response = GoalListView.as_view()(self.page_request(user))
+            size = 0
+            for chunk in response.streaming_content:
+                if not size:
+                    self.first_byte.setdefault("streamed", (time.perf_counter() - start) * 1000)
+                size += len(chunk)
+        return None, size
+
+    def measure(self, label, run):
+        # timed once without tracing (tracemalloc slows allocation down), then traced
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result, text = run()
+            ms = (time.perf_counter() - start) * 1000
+        del result
+        tracemalloc.start()
+        try:
+            result, _ = run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return label, peak, text, len(queries), ms
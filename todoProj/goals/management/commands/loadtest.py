@@ -0,0 +1,130 @@
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from goals import loadtest
+
+# the server process: the project's settings, pointed at a throwaway SQLite database
+SERVER_BOOT = """
+import importlib, os
+project = importlib.import_module(os.environ["DJANGO_SETTINGS_MODULE"])
+project.DATABASES = {{"default": {{
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": {database!r},
+    "CONN_MAX_AGE": 60,
+    "OPTIONS": {{"timeout": 30, "transaction_mode": "IMMEDIATE",
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"}},
+}}}}
+project.DEBUG = False
+project.ALLOWED_HOSTS = ["127.0.0.1"]
+project.ASSETS_SERVE = False  # static files are not part of the measurement
+# one process, so its local cache is shared by every request (and a real cache isn't touched)
+project.CACHES = {{"default": {{"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}}}
+project.SILENCED_SYSTEM_CHECKS = [*getattr(project, "SILENCED_SYSTEM_CHECKS", []), "users.E001"]
+project.STORAGES = {{**project.STORAGES, "staticfiles": {{
+    "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}}}
+import django
+django.setup()
+from goals.loadtest import serve
+serve({port}, {users}, {goals}, {tasks})
+"""
+
+
+def parse_mix(text):
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        step, _, weight = part.partition("=")
+        if step not in loadtest.DEFAULT_MIX or not weight.isdigit():
+            raise CommandError(f"Bad --mix entry {part!r}: use step=weight with steps {', '.join(loadtest.DEFAULT_MIX)}.")
+        mix[step] = int(weight)
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one step with a positive weight.")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app on a seeded SQLite database and drive it with concurrent simulated users "
+        "(login, goal list, goal detail, task creation, achievements). Reports throughput and "
+        "latency percentiles per URL name and writes them as JSON for regression tracking."
+    )
+
+    def add_arguments(self, parser):
+        mix = ",".join(f"{k}={v}" for k, v in loadtest.DEFAULT_MIX.items())
+        parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users (one account each).")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds each user keeps going.")
+        parser.add_argument("--mix", default=mix, help=f"Scenario weights (default {mix}).")
+        parser.add_argument("--think", type=float, default=0.0, help="Mean think time between steps, in seconds.")
+        parser.add_argument("--goals", type=int, default=10, help="Seeded goals per user.")
+        parser.add_argument("--tasks", type=int, default=8, help="Seeded tasks per goal.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed of the scenario choices.")
+        parser.add_argument("--port", type=int, default=0, help="Server port (default: any free port).")
+        parser.add_argument("--output", default="loadtest.json", help="Where to write the JSON report.")
+        parser.add_argument("--baseline", help="An earlier report to compare against.")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options["mix"])
+        baseline = self.read_baseline(options["baseline"])
+        with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+            server_log = Path(tmp) / "server.log"
+            boot = SERVER_BOOT.format(
+                database=str(Path(tmp) / "loadtest.sqlite3"), port=options["port"],
+                users=options["users"], goals=options["goals"], tasks=options["tasks"],
+            )
+            with open(server_log, "w+") as log:
+                self.stdout.write(f"Seeding {options['users']} users and starting the server...")
+                server = subprocess.Popen(
+                    [sys.executable, "-c", boot], stdout=subprocess.PIPE, stderr=log, text=True, cwd=settings.BASE_DIR,
+                )
+                try:
+                    ready = server.stdout.readline()
+                    if not ready:
+                        log.seek(0)
+                        raise CommandError(f"The server did not start:\n{log.read()[-3000:]}")
+                    ready = json.loads(ready)
+                    self.stdout.write(f"Driving 127.0.0.1:{ready['port']} for {options['duration']:g}s...")
+                    result = loadtest.run(
+                        ready["port"], ready["accounts"], mix, options["duration"], options["think"], options["seed"],
+                    )
+                finally:
+                    server.terminate()
+                    server.wait(timeout=10)
+
+        report = {
+            "format": 1,
+            "started_at": timezone.now().isoformat(),
+            "config": {key: options[key] for key in ("users", "duration", "think", "goals", "tasks", "seed")} | {"mix": mix},
+            "environment": {"python": platform.python_version(), "django": django.get_version(), "database": "sqlite"},
+            **result,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        self.print_report(report, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+
+    def read_baseline(self, path):
+        if not path:
+            return None
+        try:
+            return json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read the baseline {path}: {exc}")
+
+    def print_report(self, report, baseline):
+        columns = ("requests", "errors", "rps", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+        self.stdout.write(f"{'endpoint':32}" + "".join(f"{c:>10}" for c in columns) + ("  p95 vs base" if baseline else ""))
+        rows = [*report["endpoints"].items(), ("total", report["totals"])]
+        for name, row in rows:
+            line = f"{name:32}" + "".join(f"{row[c]:>10}" for c in columns)
+            if baseline:
+                before = baseline["totals"] if name == "total" else baseline.get("endpoints", {}).get(name)
+                if before and before["p95_ms"]:
+                    line += f"  {(row['p95_ms'] / before['p95_ms'] - 1) * 100:+9.1f}%"
+            self.stdout.write(line)
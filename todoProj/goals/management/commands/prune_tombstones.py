@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from goals import events
+from goals.models import Tombstone
+from goals.sync import tombstone_retention
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than GOALS_SYNC_TOMBSTONE_DAYS, in bounded chunks, "
+        "and live-update outbox rows older than a day."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - tombstone_retention()
+        total = 0
+        while True:
+            ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff).values_list("pk", flat=True)[:CHUNK_SIZE])
+            if not ids:
+                break
+            total += Tombstone.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{total} tombstone(s) pruned."))
+        self.stdout.write(self.style.SUCCESS(f"{events.prune()} live event(s) pruned."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from goals.models import Goal, Task
+from goals.ordering import RANK_GAP, rebalance
+
+CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Re-space task ranks in goals whose gaps are running out (moves normally trigger this on their own)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goal", type=int, help="Only this goal id.")
+        parser.add_argument("--min-gap", type=int, default=RANK_GAP // 64,
+                            help="Rebalance goals with two neighbours closer than this.")
+
+    def handle(self, *args, goal=None, min_gap=RANK_GAP // 64, **options):
+        goals = Goal.objects.order_by("pk").values_list("pk", flat=True)
+        if goal is not None:
+            goals = goals.filter(pk=goal)
+
+        checked = rebalanced = last_pk = 0
+        while True:
+            chunk = list(goals.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            ranks = {}
+            for goal_id, rank in Task.objects.filter(goal_id__in=chunk).order_by("goal_id", "rank", "id").values_list("goal_id", "rank"):
+                ranks.setdefault(goal_id, []).append(rank)
+            for goal_id, values in ranks.items():
+                if any(b - a < min_gap for a, b in zip(values, values[1:])):
+                    rebalance(goal_id)
+                    rebalanced += 1
+            checked += len(chunk)
+            last_pk = chunk[-1]
+        self.stdout.write(self.style.SUCCESS(f"{checked} goal(s) checked, {rebalanced} rebalanced."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from goals.models import Goal
+from goals.rollup import derived_status, rollup_goal_status
+
+
+class Command(BaseCommand):
+    help = "Repair drifted auto_status goals with one set-based UPDATE (e.g. after raw SQL or a restore)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only count the goals that would change.")
+
+    def handle(self, *args, dry_run=False, **options):
+        if dry_run:
+            drifted = Goal.objects.filter(auto_status=True).exclude(status=derived_status()).count()
+            self.stdout.write(f"{drifted} goal(s) would be repaired.")
+            return
+        repaired = rollup_goal_status()
+        self.stdout.write(self.style.SUCCESS(f"{repaired} goal(s) repaired."))
+        if repaired:
+            self.stdout.write("Run `manage.py backfill_achievements` to bring the daily counters in line.")
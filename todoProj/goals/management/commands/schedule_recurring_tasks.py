@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from goals import recurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming occurrences of repeating tasks (up to GOALS_RECURRENCE_HORIZON_DAYS "
+        "ahead), one chunk of users per transaction. Idempotent; run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizon", type=int, help="Days ahead to create occurrences for.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Users per transaction (default 500).")
+
+    def handle(self, *args, horizon=None, chunk_size=500, **options):
+        def progress(users, templates, created):
+            self.stdout.write(f"{users} user(s), {templates} repeating task(s) processed, {created} occurrence(s) created")
+
+        templates, created = recurrence.schedule(horizon=horizon, users_per_chunk=chunk_size, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Scheduling complete: {created} occurrence(s) from {templates} task(s)."))
@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from todoProj import warmup
+
+# a cold worker boot, timed the way wsgi.py does it
+FRESH_BOOT = """
+import time
+boot_started = time.perf_counter()
+import json, os
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from todoProj.warmup import boot_report
+print(json.dumps(boot_report(boot_started, time.perf_counter(), {steps!r})))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm this process up (imports, URL resolvers, templates, DB connections, caches) and report "
+        "what each step cost. With --fresh, time a complete cold boot in a new Python process instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--step", action="append", choices=list(warmup.STEPS), dest="steps",
+                            help="Only run this step (repeatable). Default: all.")
+        parser.add_argument("--fresh", action="store_true", help="Measure a cold boot in a new process.")
+        parser.add_argument("--json", action="store_true", dest="as_json", help="Print the report as JSON (e.g. for CI tracking).")
+
+    def handle(self, *args, steps=None, fresh=False, as_json=False, **options):
+        report = self.fresh_boot(steps) if fresh else warmup.warm_up(steps)
+        if as_json:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{'step':12}{'ms':>10}{'modules':>9}  detail")
+        for step in report:
+            self.stdout.write(f"{step['step']:12}{step['ms']:>10.1f}{step['modules']:>9}  {step['detail']}")
+        total = sum(step["ms"] for step in report)
+        self.stdout.write(self.style.SUCCESS(f"Warm-up done in {total:.1f} ms."))
+
+    def fresh_boot(self, steps):
+        result = subprocess.run(
+            [sys.executable, "-c", FRESH_BOOT.format(steps=steps)],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        if result.returncode:
+            raise CommandError(f"Cold boot failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_task_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='auto_status',
+            field=models.BooleanField(default=False, help_text='Derive the status from the tasks: open, in progress, or done when all tasks are done.'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0009_sync_indexes_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
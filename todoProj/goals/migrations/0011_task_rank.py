@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+RANK_GAP = 1 << 16
+
+
+def seed_ranks(apps, schema_editor):
+    """Give existing tasks ranks that reproduce the old default order within each goal."""
+    Task = apps.get_model("goals", "Task")
+    batch, goal_id, position = [], None, 0
+    for task in Task.objects.order_by("goal_id", "is_done", "due_date", "-created_at").only("pk", "goal_id").iterator(chunk_size=2000):
+        if task.goal_id != goal_id:
+            goal_id, position = task.goal_id, 0
+        position += 1
+        task.rank = position * RANK_GAP
+        batch.append(task)
+        if len(batch) >= 1000:
+            Task.objects.bulk_update(batch, ["rank"])
+            batch = []
+    Task.objects.bulk_update(batch, ["rank"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0010_goal_task_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['rank', 'id'], 'verbose_name': 'Task', 'verbose_name_plural': 'Tasks'},
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['goal', 'rank'], name='task_goal_rank_idx'),
+        ),
+        migrations.RunPython(seed_ranks, migrations.RunPython.noop),
+    ]
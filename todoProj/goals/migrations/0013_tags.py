@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0012_task_parent_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GoalTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='goals.goal')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='goal_links', to='goals.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='goals', through='goals.GoalTag', to='goals.tag'),
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='goals.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='goals.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='tasks', through='goals.TaskTag', to='goals.tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.CheckConstraint(condition=models.Q(('name', ''), _negated=True), name='tag_name_not_empty'),
+        ),
+        migrations.AddIndex(
+            model_name='goaltag',
+            index=models.Index(fields=['goal', 'tag'], name='goaltag_goal_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='goaltag',
+            constraint=models.UniqueConstraint(fields=('tag', 'goal'), name='unique_goal_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktag',
+            index=models.Index(fields=['task', 'tag'], name='tasktag_task_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasktag',
+            constraint=models.UniqueConstraint(fields=('tag', 'task'), name='unique_task_tag'),
+        ),
+    ]
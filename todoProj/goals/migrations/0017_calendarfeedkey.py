@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:09
+
+import django.db.models.deletion
+import django.utils.timezone
+import goals.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('goals', '0016_liveevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeedKey',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar_feed_key', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('secret', models.CharField(default=goals.models.new_feed_secret, max_length=32)),
+                ('rotated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,14 +1,105 @@
 from django.conf import settings #to Access the setting.AUTH_USER_MODEL → the User model in your project (for user = models.ForeignKey(...))
-from django.db import models     #ORM Tools
+from django.db import models, router, transaction     #ORM Tools
 from django.utils import timezone    #now()function
 from django.core.exceptions import ValidationError #Lets you raise an error when data is invalid.
 import logging  #Python’s built-in logging module for recording system events.
-from django.db.models.signals import post_save # run code auto when certain actions happen post_save()
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete # run code auto when certain actions happen post_save()
 from django.dispatch import receiver     #decorator connects a function to a signal.
+from .signals import bulk_changed
 
 logger = logging.getLogger(__name__)
 
-class Goal(models.Model): #Defines a database table called Goal.
+
+class EditConflict(Exception):
+    """Raised by save() when the row changed (or was deleted) since it was loaded/edited."""
+    def __init__(self, instance):
+        self.instance = instance
+        super().__init__(f"{instance._meta.verbose_name} {instance.pk} was changed by someone else.")
+
+
+class OptimisticLockMixin:
+    """
+    Optimistic concurrency on a `version` column instead of last-write-wins or
+    select_for_update: saving an existing row is one UPDATE ... WHERE id = ? AND
+    version = ? that also bumps the version. No row matched means someone else saved
+    first, and that is raised as EditConflict. The happy path costs no extra query.
+    """
+    def save(self, *args, **kwargs):
+        if not self._state.adding and self.pk is not None:
+            self._expected_version = self.version
+            self.version = self.version + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "version" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "version"]
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        connection = transaction.get_connection(using)
+        already_broken = connection.in_atomic_block and connection.needs_rollback
+        try:
+            super().save(*args, **kwargs)
+        except EditConflict:
+            self.version = self._expected_version
+            # save_base() marked the enclosing atomic block for rollback, but the UPDATE
+            # matched no row and wrote nothing; leave callers' transactions usable
+            if connection.in_atomic_block and not already_broken:
+                transaction.set_rollback(False, using=using)
+            raise
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, True):
+            return True
+        raise EditConflict(self)
+
+
+class DeletionBatch:
+    """What the post_delete receivers of one delete() and its cascade leave to do at the end."""
+    def __init__(self):
+        self.tombstones = []
+        self.goal_ids = set()  # goals going away: their tasks' status rollup is moot
+
+
+_deletion = ContextVar("goals_deletion", default=None)
+
+
+def current_deletion():
+    return _deletion.get()
+
+
+@contextmanager
+def collect_deletions(using=None):
+    """
+    Batch the per-row work of the delete() calls inside: tombstones are written
+    with one bulk INSERT at the end, in the same transaction.
+    """
+    if _deletion.get() is not None:  # nested: the outer batch writes
+        yield _deletion.get()
+        return
+    batch = DeletionBatch()
+    token = _deletion.set(batch)
+    try:
+        with transaction.atomic(using=using):
+            yield batch
+            Tombstone.objects.using(using).bulk_create(batch.tombstones)
+    finally:
+        _deletion.reset(token)
+
+
+class BatchedDeleteMixin:
+    """delete() with the cascade's tombstones and rollups batched (see collect_deletions)."""
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with collect_deletions(using):
+            return super().delete(using=using, keep_parents=keep_parents)
+
+
+class Goal(BatchedDeleteMixin, OptimisticLockMixin, models.Model): #Defines a database table called Goal.
     #Each instance = one row in the table.
     class Status(models.TextChoices):#Inner Enum for Choices
         OPEN = "open", "Open"
@@ -33,8 +124,16 @@ class Goal(models.Model): #Defines a database table called Goal.
         db_index=True,                   # frequent filter/sort target
     )
     deadline = models.DateField(null=True, blank=True, db_index=True)
+    # opt-in: status follows the tasks' is_done values (see rollup.py) instead of being set by hand
+    auto_status = models.BooleanField(
+        default=False,
+        help_text="Derive the status from the tasks: open, in progress, or done when all tasks are done.",
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)  # set when status becomes DONE
+    version = models.PositiveIntegerField(default=1)  # optimistic concurrency, see OptimisticLockMixin
+    tags = models.ManyToManyField("Tag", through="GoalTag", related_name="goals", blank=True)
 
     class Meta:
         # Note: ordering by a nullable field can be surprising (DB-dependent null placement)
@@ -49,6 +148,10 @@ class Goal(models.Model): #Defines a database table called Goal.
                 fields=["user", "title"], 
                 name="unique_goal_title_per_user"),
         ]
+        indexes = [
+            # delta sync: per-user range scans past a watermark (see sync.py)
+            models.Index(fields=["user", "updated_at", "id"], name="goal_user_updated_idx"),
+        ]
 
     def clean(self):
         """
@@ -58,12 +161,42 @@ class Goal(models.Model): #Defines a database table called Goal.
         # disallow deadlines in the past for *new* or edited goals
         if self.deadline and self.deadline < timezone.now().date():
             raise ValidationError({"deadline": "Deadline cannot be in the past."})
+        # the Task deadline rule, checked for every task and subtask in one query
+        if self.pk and self.deadline and self.tasks.filter(due_date__gt=self.deadline).exists():
+            raise ValidationError({"deadline": "Some tasks are due after this deadline."})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # remember the loaded status so save() can tell a completion apart from a plain edit
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        was_done = getattr(self, "_loaded_status", None) == self.Status.DONE
+        is_done = self.status == self.Status.DONE
+        # (delta, when) consumed by the post_save receiver that feeds DailyAchievement
+        self._completion_change = None
+        if is_done and not was_done:
+            self.completed_at = timezone.now()
+            self._completion_change = (1, self.completed_at)
+        elif was_done and not is_done:
+            self._completion_change = (-1, self.completed_at)
+            self.completed_at = None
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
     def __str__(self):#Defines how the object looks in the admin or shell → shows the goal’s title.
         return self.title
 
 
-class Task(models.Model):
+class Task(BatchedDeleteMixin, OptimisticLockMixin, models.Model):
+    class Recurrence(models.TextChoices):
+        NONE = "", "Does not repeat"
+        DAILY = "daily", "Daily"
+        WEEKLY = "weekly", "Weekly"
+        MONTHLY = "monthly", "Monthly"
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -85,10 +218,30 @@ class Task(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)  # set when is_done becomes True
+    version = models.PositiveIntegerField(default=1)
+    # manual order within the goal; gaps between siblings let a move rewrite one row (see ordering.py)
+    rank = models.BigIntegerField(default=0)
+    # subtasks: parent within the same goal, plus the materialized ancestor path (see tree.py)
+    parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, related_name="subtasks", null=True, blank=True,
+    )
+    path = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)
+    tags = models.ManyToManyField("Tag", through="TaskTag", related_name="tasks", blank=True)
+    # recurrence: this task is a template; `manage.py schedule_recurring_tasks` creates the
+    # occurrences ahead of time (see recurrence.py), never the request path
+    recurrence = models.CharField(max_length=10, choices=Recurrence.choices, blank=True, default="")
+    recurrence_interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every N days/weeks/months.")
+    recurrence_until = models.DateField(null=True, blank=True, help_text="Last date an occurrence may fall on.")
+    recurrence_next = models.DateField(null=True, blank=True, editable=False, db_index=True)  # next one to create
+    recurs_from = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, related_name="occurrences", null=True, blank=True, editable=False,
+    )
+    occurrence_date = models.DateField(null=True, blank=True, editable=False)
 
     class Meta:
-        # You had ascending created_at; often descending is nicer in UIs—keep yours if you prefer.
-        ordering = ["is_done", "due_date", "-created_at"]
+        # user-defined order (drag and drop); was ["is_done", "due_date", "-created_at"]
+        ordering = ["rank", "id"]
         verbose_name = "Task" #Verbose names are how Django shows them in admin.
         verbose_name_plural = "Tasks"
         # Example: avoid duplicate task titles within the same goal
@@ -101,20 +254,339 @@ class Task(models.Model):
                 check=~models.Q(title=""),
                 name="task_title_not_empty",
             ),
+            # one occurrence per template and date: re-running the scheduler is a no-op
+            models.UniqueConstraint(fields=["recurs_from", "occurrence_date"], name="unique_task_occurrence"),
         ]
         indexes = [
             # Helpful composite index for common filters/sorts
             models.Index(fields=["goal", "is_done", "due_date"]),
+            models.Index(fields=["user", "updated_at", "id"], name="task_user_updated_idx"),
+            models.Index(fields=["goal", "rank"], name="task_goal_rank_idx"),
         ]
 
     def clean(self):#Any rule you define in the clean() method
+        from . import tree
         #due date should not be before the goal deadline if both exist
         if self.due_date and self.goal and self.goal.deadline and self.due_date > self.goal.deadline:
             raise ValidationError({"due_date": "Task due date must be on or before the goal deadline."})
 
+        parent = self.parent if self.parent_id else None
+        if parent is not None:
+            if parent.goal_id != self.goal_id:
+                raise ValidationError({"parent": "A subtask must belong to the same goal as its parent."})
+            if self.pk and (parent.pk == self.pk or parent.path.startswith(tree.subtree_prefix(self))):
+                raise ValidationError({"parent": "A task cannot be moved under itself or its own subtasks."})
+            height = tree.subtree_height(self) if self.pk and self._parent_changed() else 0
+            if tree.depth_of(parent.path) + 1 + height >= tree.MAX_DEPTH:
+                raise ValidationError({"parent": f"Subtasks can be nested at most {tree.MAX_DEPTH} levels deep."})
+            # the deadline rule, one level down: a subtask is due no later than its parent
+            if self.due_date and parent.due_date and self.due_date > parent.due_date:
+                raise ValidationError({"due_date": "Subtask due date must be on or before its parent's due date."})
+        # ...and for every descendant at once
+        if self.pk and self.due_date and tree.descendants(self).filter(due_date__gt=self.due_date).exists():
+            raise ValidationError({"due_date": "Some subtasks are due after this date."})
+
+        if self.recurrence:
+            if not self.due_date:
+                raise ValidationError({"due_date": "A repeating task needs a due date to repeat from."})
+            if self.recurrence_until and self.recurrence_until < self.due_date:
+                raise ValidationError({"recurrence_until": "The repeat end date must be on or after the due date."})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_done = instance.__dict__.get("is_done")
+        instance._loaded_parent_id = instance.__dict__.get("parent_id")
+        instance._loaded_path = instance.__dict__.get("path")
+        instance._loaded_rule = instance._rule()
+        return instance
+
+    def _rule(self):
+        fields = ("recurrence", "recurrence_interval", "recurrence_until", "due_date")
+        return tuple(self.__dict__.get(name) for name in fields)
+
+    def _parent_changed(self):
+        return self._state.adding or self.parent_id != getattr(self, "_loaded_parent_id", None)
+
+    def save(self, *args, **kwargs):
+        from . import tree
+        moved_from = None
+        if self._parent_changed():
+            if self.parent_id:
+                parent = self.parent
+                self.goal_id = parent.goal_id  # subtasks live in their parent's goal
+                self.path = tree.subtree_prefix(parent)
+            else:
+                self.path = ""
+            if not self._state.adding and getattr(self, "_loaded_path", None) is not None:
+                moved_from = self._loaded_path + tree.segment(self.pk)
+        if self._state.adding and not self.rank and self.goal_id:
+            from .ordering import next_rank
+            self.rank = next_rank(self.goal_id)
+        if not self.recurrence:
+            self.recurrence_next = None
+        elif self._state.adding or self._rule() != getattr(self, "_loaded_rule", None):
+            from .recurrence import step
+            self.recurrence_next = step(self, self.due_date)
+        was_done = bool(getattr(self, "_loaded_is_done", False))
+        self._completion_change = None
+        if self.is_done and not was_done:
+            self.completed_at = timezone.now()
+            self._completion_change = (1, self.completed_at)
+        elif was_done and not self.is_done:
+            self._completion_change = (-1, self.completed_at)
+            self.completed_at = None
+        super().save(*args, **kwargs)
+        if moved_from is not None:
+            # carry the whole branch along: one UPDATE over the old subtree prefix
+            tree.move_descendants(moved_from, tree.subtree_prefix(self), self.goal_id)
+        self._loaded_is_done = self.is_done
+        self._loaded_parent_id, self._loaded_path = self.parent_id, self.path
+        self._loaded_rule = self._rule()
+
     def __str__(self):#String representation for admin/UI.
         return self.title
 
+
+class Tag(models.Model):
+    """A user's own label ("work", "health"), attached to goals and tasks; filtering lives in tags.py."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tags",
+    )
+    name = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="unique_tag_name_per_user"),
+            models.CheckConstraint(check=~models.Q(name=""), name="tag_name_not_empty"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class GoalTag(models.Model):
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="goal_links")
+    goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name="tag_links")
+
+    class Meta:
+        constraints = [
+            # also the (tag -> goals) index the bitmaps are built from
+            models.UniqueConstraint(fields=["tag", "goal"], name="unique_goal_tag"),
+        ]
+        indexes = [
+            models.Index(fields=["goal", "tag"], name="goaltag_goal_tag_idx"),
+        ]
+
+
+class TaskTag(models.Model):
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="task_links")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="tag_links")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "task"], name="unique_task_tag"),
+        ]
+        indexes = [
+            models.Index(fields=["task", "tag"], name="tasktag_task_tag_idx"),
+        ]
+
+
+class DailyAchievement(models.Model):
+    """
+    Per-user, per-day completion counters behind the achievements trend charts.
+    Maintained incrementally by history.py; rebuilt by `manage.py backfill_achievements`.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_achievements",
+    )
+    day = models.DateField()
+    tasks_completed = models.IntegerField(default=0)
+    goals_completed = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            # also the index behind every (user, day range) read
+            models.UniqueConstraint(fields=["user", "day"], name="unique_daily_achievement_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.tasks_completed} tasks, {self.goals_completed} goals"
+
+class ActivityLog(models.Model):
+    """
+    Append-only audit trail of goal/task changes. Rows are written in batches by
+    activity.py (bulk_create), never updated; read newest-first per user.
+    """
+    class Action(models.TextChoices):
+        CREATED = "created", "Created"
+        UPDATED = "updated", "Updated"
+        DELETED = "deleted", "Deleted"
+        BULK = "bulk", "Bulk update"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    action = models.CharField(max_length=10, choices=Action.choices)
+    object_type = models.CharField(max_length=10)  # "goal" / "task"
+    object_id = models.BigIntegerField(null=True, blank=True)
+    summary = models.CharField(max_length=200, blank=True)
+    # set when the event happens, not when the buffer is flushed
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="activity_user_recent_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("ActivityLog is append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.object_type} {self.summary}"
+
+
+class LiveEvent(models.Model):
+    """
+    Outbox of live-update events when several processes serve the site
+    (GOALS_EVENTS_DB_BRIDGE, see events.py): written in the same transaction as the
+    change, polled by every process, pruned by `manage.py prune_tombstones`.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    payload = models.JSONField()  # the event exactly as events.notify() got it
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="liveevent_user_created_idx"),
+            models.Index(fields=["created_at"], name="liveevent_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.payload}"
+
+
+class Tombstone(models.Model):
+    """Marker left behind by a deleted goal/task so delta sync can tell clients to drop it."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tombstones",
+    )
+    object_type = models.CharField(max_length=10)  # "goal" / "task"
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "deleted_at", "id"], name="tombstone_user_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+def new_feed_secret():
+    return secrets.token_urlsafe(16)
+
+
+class CalendarFeedKey(models.Model):
+    """Per-user secret inside the calendar feed token (see calendar.py); a new one revokes old feed URLs."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="calendar_feed_key",
+    )
+    secret = models.CharField(max_length=32, default=new_feed_secret)
+    rotated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id}: rotated {self.rotated_at:%Y-%m-%d %H:%M}"
+
+
+class ArchivedGoal(models.Model):
+    """
+    A finished goal moved out of the live tables by archive.py. Keeps its original id;
+    read-only from then on (the archive page), counted through ArchiveTotals.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_goals",
+        null=True,
+        blank=True,
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    deadline = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-completed_at"]
+        indexes = [
+            models.Index(fields=["user", "-completed_at"], name="archivedgoal_user_recent_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    goal = models.ForeignKey(ArchivedGoal, on_delete=models.CASCADE, related_name="tasks")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+        null=True,
+        blank=True,
+    )
+    parent_id = models.BigIntegerField(null=True, blank=True)  # original ids; the tree is rebuilt from path
+    path = models.CharField(max_length=255, blank=True, default="")
+    rank = models.BigIntegerField(default=0)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    is_done = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["rank", "id"]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchiveTotals(models.Model):
+    """Per-user counts of everything archived, added to the live counts on the achievements page."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="archive_totals",
+    )
+    goals = models.PositiveIntegerField(default=0)  # archived goals are all DONE
+    tasks = models.PositiveIntegerField(default=0)
+    tasks_completed = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.goals} goals, {self.tasks} tasks archived"
+
+
 # This helps with debugging or auditing what’s being created.
 @receiver(post_save, sender=Goal)
 def log_goal_created(sender, instance: Goal, created: bool, **kwargs):
@@ -131,3 +603,148 @@ def log_goal_created(sender, instance: Goal, created: bool, **kwargs):
             },
         )
 
+
+
+# Drop the cached calendar blob (see calendar.py) whenever a goal or task changes.
+@receiver(post_save, sender=Goal)
+@receiver(post_delete, sender=Goal)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_calendar_feed(sender, instance, **kwargs):
+    from .calendar import invalidate_feed  # avoid circular import
+    invalidate_feed(instance.user_id)
+
+
+@receiver(bulk_changed)
+def invalidate_calendar_feed_bulk(sender, user_id, **kwargs):
+    from .calendar import invalidate_feed
+    invalidate_feed(user_id)
+
+
+# Keep auto_status goals in sync with their tasks: one conditional UPDATE per affected goal.
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def rollup_task_goal_status(sender, instance, **kwargs):
+    # the goal is often already loaded (select_related / the form); skip the probe for manual goals
+    if Task.goal.is_cached(instance) and not instance.goal.auto_status:
+        return
+    deletion = current_deletion()
+    if deletion is not None and instance.goal_id in deletion.goal_ids:
+        return  # deleted together with its goal
+    from .rollup import rollup_goal_status
+    rollup_goal_status([instance.goal_id])
+
+
+@receiver(post_save, sender=Goal)
+def rollup_goal_status_on_save(sender, instance, **kwargs):
+    # the form may have just switched auto_status on, or set a status by hand
+    if instance.auto_status:
+        from .rollup import rollup_goal_status
+        rollup_goal_status([instance.pk])
+
+
+@receiver(bulk_changed, sender=Task)
+def rollup_bulk_goal_status(sender, goal_ids, **kwargs):
+    from .rollup import rollup_goal_status
+    rollup_goal_status(goal_ids)
+
+
+# Feed the daily achievements rollup from completion transitions (see Goal.save / Task.save).
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Task)
+def record_completion(sender, instance, **kwargs):
+    change = getattr(instance, "_completion_change", None)
+    if change and instance.user_id:
+        from .history import record
+        delta, when = change
+        record(instance.user_id, when, **{"goals" if sender is Goal else "tasks": delta})
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Task)
+def forget_completion(sender, instance, **kwargs):
+    if instance.completed_at and instance.user_id:
+        from .history import record
+        record(instance.user_id, instance.completed_at, **{"goals" if sender is Goal else "tasks": -1})
+
+
+@receiver(bulk_changed)
+def log_bulk_activity(sender, user_id, pks, changes, **kwargs):
+    from .activity import log_activity
+    fields = ", ".join(f"{name}={value}" for name, value in changes.items())
+    log_activity(user_id, ActivityLog.Action.BULK, sender._meta.model_name, None, f"{len(pks)} rows: {fields}")
+
+
+# Live updates for open SSE connections (see events.py).
+@receiver(post_save, sender=Goal)
+@receiver(post_delete, sender=Goal)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def publish_change(sender, instance, **kwargs):
+    from .events import notify
+    is_task = sender is Task
+    notify(instance.user_id, {
+        "type": "task" if is_task else "goal",
+        "id": instance.pk,
+        "goal_id": instance.goal_id if is_task else instance.pk,
+        "action": "saved" if "created" in kwargs else "deleted",
+    })
+
+
+@receiver(bulk_changed)
+def publish_bulk_change(sender, user_id, pks, goal_ids, **kwargs):
+    from .events import notify
+    notify(user_id, {
+        "type": sender._meta.model_name,
+        "ids": list(pks),
+        "goal_ids": sorted(goal_ids) if goal_ids else list(pks),
+        "action": "bulk",
+    })
+
+
+@receiver(pre_delete, sender=Goal)
+def note_deleted_goal(sender, instance, **kwargs):
+    # pre_delete runs for every collected row before any of them is deleted
+    deletion = current_deletion()
+    if deletion is not None:
+        deletion.goal_ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Task)
+def leave_tombstone(sender, instance, **kwargs):
+    if instance.user_id:
+        tombstone = Tombstone(user_id=instance.user_id, object_type=sender._meta.model_name, object_id=instance.pk)
+        deletion = current_deletion()
+        if deletion is not None:
+            deletion.tombstones.append(tombstone)
+        else:
+            tombstone.save()
+
+
+# Drop the user's cached tag bitmaps (see tags.py) when tags or tag assignments change.
+@receiver(m2m_changed, sender=GoalTag)
+@receiver(m2m_changed, sender=TaskTag)
+def invalidate_tag_bitmaps(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        from .tags import invalidate
+        invalidate(instance.user_id)
+        if isinstance(instance, (Goal, Task)):  # the goal's card shows the tags
+            from .events import notify
+            is_task = isinstance(instance, Task)
+            notify(instance.user_id, {
+                "type": "task" if is_task else "goal",
+                "id": instance.pk,
+                "goal_id": instance.goal_id if is_task else instance.pk,
+                "action": "saved",
+            })
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Task)
+def invalidate_tag_bitmaps_on_change(sender, instance, **kwargs):
+    # deleted goals/tasks could otherwise leave their ids (reusable on some backends) in the bitmaps
+    from .tags import invalidate
+    invalidate(instance.user_id)
@@ -0,0 +1,116 @@
+"""
+Manual task order within a goal, kept in Task.rank with wide gaps between siblings.
+
+Moving a task computes a rank halfway between its new neighbours and writes just
+that row. Only when two neighbours have no integer left between them does a move
+shift the following siblings up by one gap (a single UPDATE), and then a
+background rebalance spreads the goal's ranks out evenly again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Goal, Task
+from .signals import bulk_changed
+
+logger = logging.getLogger(__name__)
+
+RANK_GAP = 1 << 16
+MAX_MOVES = 500
+
+_rebalancer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rank-rebalance")
+
+
+class MoveError(Exception):
+    pass
+
+
+def next_rank(goal_id):
+    """Rank for a task appended at the end of its goal (index-only MAX on (goal, rank))."""
+    top = Task.objects.filter(goal_id=goal_id).aggregate(top=Max("rank"))["top"]
+    return (top or 0) + RANK_GAP
+
+
+def _touch(queryset, **changes):
+    return queryset.update(updated_at=timezone.now(), version=F("version") + 1, **changes)
+
+
+def _move(goal_id, task_id, after_id):
+    """Place task_id right after after_id (None = first). Returns True if the goal needs a rebalance."""
+    siblings = Task.objects.filter(goal_id=goal_id).exclude(pk=task_id).order_by("rank", "id")
+    if after_id is None:
+        following = siblings.values_list("rank", flat=True).first()
+        hi = following if following is not None else RANK_GAP
+        lo = hi - 2 * RANK_GAP  # nothing before it: ranks may go negative
+    else:
+        after = siblings.filter(pk=after_id).values_list("rank", "id").first()
+        if after is None:
+            raise MoveError(f"Task {after_id} is not in this goal.")
+        lo, after_pk = after
+        following = (
+            siblings.filter(rank__gte=lo).exclude(rank=lo, id__lte=after_pk).values_list("rank", flat=True).first()
+        )
+        hi = following if following is not None else lo + 2 * RANK_GAP
+
+    tight = hi - lo < 2
+    if tight:
+        # out of room: push everything from `hi` on up by one gap, then let the rebalancer tidy up
+        _touch(siblings.filter(rank__gte=hi), rank=F("rank") + RANK_GAP)
+        hi += RANK_GAP
+    if not _touch(Task.objects.filter(pk=task_id, goal_id=goal_id), rank=(lo + hi) // 2):
+        raise MoveError(f"Task {task_id} is not in this goal.")
+    return tight
+
+
+def apply_moves(user, goal_id, moves):
+    """
+    Apply [{"task": id, "after": id | None}, ...] in order, in one transaction.
+    Returns {task_id: rank} for the goal after the moves.
+    """
+    if len(moves) > MAX_MOVES:
+        raise MoveError(f"At most {MAX_MOVES} moves per request.")
+    needs_rebalance = False
+    with transaction.atomic():
+        # serializes moves and rebalances of the same goal
+        if not Goal.objects.select_for_update().filter(pk=goal_id, user=user).exists():
+            raise MoveError("Goal not found.")
+        moved = []
+        for move in moves:
+            try:
+                task_id, after_id = int(move["task"]), move.get("after")
+                after_id = int(after_id) if after_id is not None else None
+            except (KeyError, TypeError, ValueError):
+                raise MoveError("Each move needs a task id and an optional 'after' task id.")
+            needs_rebalance |= _move(goal_id, task_id, after_id)
+            moved.append(task_id)
+        if moved:
+            bulk_changed.send(sender=Task, user_id=user.pk, pks=moved, changes={"rank": "reordered"}, goal_ids={goal_id})
+        if needs_rebalance:
+            transaction.on_commit(lambda: _rebalancer.submit(_rebalance_in_background, goal_id))
+        return dict(Task.objects.filter(goal_id=goal_id).values_list("pk", "rank"))
+
+
+def rebalance(goal_id):
+    """Re-space a goal's ranks evenly (RANK_GAP apart), keeping the current order."""
+    with transaction.atomic():
+        Goal.objects.select_for_update().filter(pk=goal_id).exists()
+        tasks = list(Task.objects.filter(goal_id=goal_id).order_by("rank", "id").only("pk", "rank"))
+        now = timezone.now()
+        for position, task in enumerate(tasks, start=1):
+            task.rank = position * RANK_GAP
+            task.updated_at = now
+            task.version = F("version") + 1
+        Task.objects.bulk_update(tasks, ["rank", "updated_at", "version"], batch_size=500)
+    return len(tasks)
+
+
+def _rebalance_in_background(goal_id):
+    try:
+        rebalance(goal_id)
+    except Exception:
+        logger.exception("Rank rebalance of goal %s failed", goal_id)
+    finally:
+        connections.close_all()  # this worker thread's own connections
@@ -0,0 +1,162 @@
+"""
+Opt-in request profiler for staff: where does a slow page spend its time?
+
+ProfilingMiddleware runs a selected request under a statistical profiler (a thread that
+samples the request thread's stack every GOALS_PROFILER_INTERVAL seconds) and logs
+every SQL statement with its duration. Each profile is written to GOALS_PROFILER_DIR as
+- <id>.folded: collapsed stacks ("frame;frame;frame count"), the input format of
+  flamegraph.pl, speedscope and most other flame graph viewers,
+- <id>.json: path, status, timings and the query log.
+Only the newest GOALS_PROFILER_KEEP profiles are kept.
+
+A request is profiled only if the user is staff and it either sends "X-Profile: 1" or
+is picked at random (GOALS_PROFILER_SAMPLE_RATE). With GOALS_PROFILER_ENABLED = False
+the middleware removes itself from the chain at startup, so it costs nothing at all.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+HEADER = "X-Profile"
+
+
+@lru_cache(maxsize=4096)
+def _label(code):
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root):
+            filename = os.path.relpath(filename, root)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Counts the stacks of one thread, sampled from a second thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class QueryLog:
+    """connection.execute_wrapper() hook: every statement with its duration, no DEBUG needed."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "alias": context["connection"].alias,
+                "sql": sql,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                "many": many,
+            })
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "GOALS_PROFILER_ENABLED", False):
+            raise MiddlewareNotUsed  # dropped from the chain: zero cost when off
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "GOALS_PROFILER_SAMPLE_RATE", 0.0)
+        self.interval = getattr(settings, "GOALS_PROFILER_INTERVAL", 0.005)
+        self.keep = getattr(settings, "GOALS_PROFILER_KEEP", 50)
+        self.directory = Path(getattr(settings, "GOALS_PROFILER_DIR", Path(settings.BASE_DIR) / "profiles"))
+
+    def __call__(self, request):
+        if not self.wanted(request):
+            return self.get_response(request)
+        return self.profile(request)
+
+    def wanted(self, request):
+        triggered = request.headers.get(HEADER) == "1" or (self.sample_rate and random.random() < self.sample_rate)
+        # the user is only loaded once a request is triggered
+        return bool(triggered) and getattr(request, "user", None) is not None and request.user.is_staff
+
+    def profile(self, request):
+        sampler = Sampler(threading.get_ident(), self.interval)
+        query_log = QueryLog()
+        started_at = timezone.now()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+            elapsed = time.perf_counter() - start
+
+        profile_id = self.save(request, response, started_at, elapsed, sampler, query_log)
+        response[f"{HEADER}-Id"] = profile_id
+        return response
+
+    def save(self, request, response, started_at, elapsed, sampler, query_log):
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-")[:60] or "root"
+        profile_id = f"{started_at:%Y%m%dT%H%M%S%f}-{request.method.lower()}-{slug}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.folded").write_text(sampler.folded(), encoding="utf-8")
+        meta = {
+            "path": request.get_full_path(),
+            "method": request.method,
+            "status": response.status_code,
+            "streaming": response.streaming,  # streamed bodies render after the profile ends
+            "started_at": started_at.isoformat(),
+            "total_ms": round(elapsed * 1000, 3),
+            "sql_ms": round(sum(q["ms"] for q in query_log.queries), 3),
+            "query_count": len(query_log.queries),
+            "samples": sum(sampler.stacks.values()),
+            "interval_ms": self.interval * 1000,
+            "queries": query_log.queries,
+        }
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        self.rotate()
+        return profile_id
+
+    def rotate(self):
+        # ids start with the timestamp, so name order is age order
+        profiles = sorted(self.directory.glob("*.json"))
+        for old in profiles[:max(len(profiles) - self.keep, 0)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".folded").unlink(missing_ok=True)
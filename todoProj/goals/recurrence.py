@@ -0,0 +1,164 @@
+"""
+Recurring tasks. A task with a recurrence rule is a template; the scheduler
+(`manage.py schedule_recurring_tasks`, e.g. hourly from cron) creates its occurrences
+up to GOALS_RECURRENCE_HORIZON_DAYS ahead, so page views never write.
+
+Each template carries recurrence_next, the next date still to create, so a run only
+reads templates that have something due (one range on the recurrence_next index) and
+never walks their history. Work goes one chunk of users per transaction: a SELECT of
+their due templates, one query each for goal deadlines, parent due dates, ranks and
+title clashes, then one bulk_create of every occurrence and one bulk_update of the
+templates' recurrence_next.
+
+Occurrences follow the Task rules: titles get the date appended and skip any title
+the goal already has (unique_task_title_per_goal), and nothing is created past the
+goal deadline, the parent task's due date or the rule's end date. The unique
+(recurs_from, occurrence_date) constraint plus ignore_conflicts make re-runs and a
+run that died before advancing recurrence_next harmless.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Goal, Task
+from .ordering import RANK_GAP
+from .signals import bulk_changed
+
+TITLE_MAX_LENGTH = Task._meta.get_field("title").max_length
+QUERY_CHUNK_SIZE = 500
+
+TEMPLATE_COLUMNS = (
+    "id", "user_id", "goal_id", "parent_id", "path", "title", "description", "due_date",
+    "recurrence", "recurrence_interval", "recurrence_until", "recurrence_next",
+)
+
+
+def horizon_days():
+    return getattr(settings, "GOALS_RECURRENCE_HORIZON_DAYS", 14)
+
+
+def next_date(recurrence, interval, anchor, current):
+    """The occurrence after `current`. Monthly rules keep the anchor's day of month (clamped)."""
+    interval = max(interval or 1, 1)
+    if recurrence == Task.Recurrence.DAILY:
+        return current + timedelta(days=interval)
+    if recurrence == Task.Recurrence.WEEKLY:
+        return current + timedelta(weeks=interval)
+    year, month = divmod(current.year * 12 + current.month - 1 + interval, 12)
+    month += 1
+    return date(year, month, min(anchor.day, monthrange(year, month)[1]))
+
+
+def step(task, current):
+    return next_date(task.recurrence, task.recurrence_interval, task.due_date, current)
+
+
+def occurrence_title(title, day):
+    suffix = f" ({day:%Y-%m-%d})"
+    return title[:TITLE_MAX_LENGTH - len(suffix)] + suffix
+
+
+def _chunks(items, size=QUERY_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _due(horizon_end):
+    # inactive users include accounts being purged (users/deletion.py): nothing new for them
+    return Task.objects.filter(recurrence_next__lte=horizon_end, user__is_active=True)
+
+
+def _schedule_users(user_ids, today, horizon_end, started):
+    """Materialize the due occurrences of these users' templates. Returns (templates, created)."""
+    templates = list(_due(horizon_end).filter(user_id__in=user_ids).select_for_update().values(*TEMPLATE_COLUMNS))
+    goal_ids = {t["goal_id"] for t in templates}
+    deadlines = dict(Goal.objects.filter(pk__in=goal_ids).values_list("pk", "deadline"))
+    parent_due = dict(
+        Task.objects.filter(pk__in={t["parent_id"] for t in templates if t["parent_id"]}).values_list("pk", "due_date")
+    )
+    ranks = dict(
+        Task.objects.filter(goal_id__in=goal_ids).order_by().values("goal_id").annotate(top=Max("rank"))
+        .values_list("goal_id", "top")
+    )
+
+    planned, advanced = [], []
+    for t in templates:
+        # the rule's end, the goal deadline and the parent's due date all cap the series
+        caps = [d for d in (t["recurrence_until"], deadlines.get(t["goal_id"]), parent_due.get(t["parent_id"])) if d]
+        end = min(caps) if caps else None
+        rule = (t["recurrence"], t["recurrence_interval"], t["due_date"])
+        day = t["recurrence_next"]
+        while day < today:  # missed while the scheduler was not running: no backfill
+            day = next_date(*rule, day)
+        while day <= horizon_end and (end is None or day <= end):
+            planned.append((t, day))
+            day = next_date(*rule, day)
+        # past its own end date the template is done for good; a deadline may still be moved later
+        finished = t["recurrence_until"] is not None and day > t["recurrence_until"]
+        advanced.append(Task(pk=t["id"], recurrence_next=None if finished else day))
+
+    # unique_task_title_per_goal: leave out titles the goal already has (including earlier runs' occurrences)
+    taken = set()
+    for chunk in _chunks({occurrence_title(t["title"], day) for t, day in planned}):
+        taken.update(Task.objects.filter(goal_id__in=goal_ids, title__in=chunk).values_list("goal_id", "title"))
+
+    occurrences = []
+    for t, day in planned:
+        title = occurrence_title(t["title"], day)
+        if (t["goal_id"], title) in taken:
+            continue
+        taken.add((t["goal_id"], title))
+        ranks[t["goal_id"]] = (ranks.get(t["goal_id"]) or 0) + RANK_GAP
+        occurrences.append(Task(
+            user_id=t["user_id"], goal_id=t["goal_id"], parent_id=t["parent_id"], path=t["path"],
+            title=title, description=t["description"], due_date=day, rank=ranks[t["goal_id"]],
+            recurs_from_id=t["id"], occurrence_date=day,
+        ))
+
+    # ignore_conflicts: a concurrent run or a same-titled task created meanwhile just wins
+    Task.objects.bulk_create(occurrences, batch_size=1000, ignore_conflicts=True)
+    Task.objects.bulk_update(advanced, ["recurrence_next"], batch_size=1000)
+
+    # bulk_create sends no post_save; tell the caches, roll-ups and live pages once per user
+    created = defaultdict(lambda: ([], set()))
+    for chunk in _chunks([t["id"] for t in templates]):
+        rows = Task.objects.filter(recurs_from_id__in=chunk, created_at__gte=started).values_list("pk", "user_id", "goal_id")
+        for pk, user_id, goal_id in rows:
+            created[user_id][0].append(pk)
+            created[user_id][1].add(goal_id)
+    for user_id, (pks, goals) in created.items():
+        bulk_changed.send(sender=Task, user_id=user_id, pks=pks, changes={"recurrence": "scheduled"}, goal_ids=goals)
+    return len(templates), sum(len(pks) for pks, _ in created.values())
+
+
+def schedule(today=None, horizon=None, users_per_chunk=500, progress=None):
+    """
+    Create every occurrence due up to today + horizon days, one chunk of users per
+    transaction. `progress(users, templates, created)` runs after each chunk.
+    Returns (templates, created) totals.
+    """
+    today = today or timezone.localdate()
+    horizon_end = today + timedelta(days=horizon if horizon is not None else horizon_days())
+    started = timezone.now()
+    due = _due(horizon_end)
+    users = templates = created = 0
+    last_user = 0
+    while True:
+        chunk = list(
+            due.filter(user_id__gt=last_user).order_by("user_id").values_list("user_id", flat=True).distinct()[:users_per_chunk]
+        )
+        if not chunk:
+            break
+        last_user = chunk[-1]
+        with transaction.atomic():
+            t, c = _schedule_users(chunk, today, horizon_end, started)
+        users, templates, created = users + len(chunk), templates + t, created + c
+        if progress:
+            progress(users, templates, created)
+    return templates, created
@@ -0,0 +1,85 @@
+"""
+Goal status derived from its tasks, for goals with auto_status=True:
+no task done -> OPEN, every task done -> DONE, anything in between -> IN_PROGRESS.
+
+The database derives the status with two EXISTS probes on the (goal, is_done, ...)
+index, so a task save never loads the goal's task set into Python. On the
+incremental path a task save costs one conditional SELECT, plus one UPDATE only
+when the status really changes (that UPDATE also moves completed_at and the
+daily achievement counters). The reconcile path is a single set-based UPDATE.
+"""
+from django.db.models import Case, DateTimeField, Exists, F, OuterRef, Value, When
+from django.utils import timezone
+
+from . import history
+from .events import notify
+from .models import Goal, Task
+
+
+def _probes():
+    done = Exists(Task.objects.filter(goal=OuterRef("pk"), is_done=True))
+    pending = Exists(Task.objects.filter(goal=OuterRef("pk"), is_done=False))
+    return done, pending
+
+
+def derived_status():
+    done, pending = _probes()
+    return Case(
+        When(~done, then=Value(Goal.Status.OPEN)),
+        When(~pending, then=Value(Goal.Status.DONE)),
+        default=Value(Goal.Status.IN_PROGRESS),
+    )
+
+
+def rollup_goal_status(goal_ids=None):
+    """
+    Re-derive the status of the given goals (all auto goals when goal_ids is None).
+    Returns the number of goals whose status changed.
+    """
+    qs = Goal.objects.filter(auto_status=True)
+    now = timezone.now()
+
+    if goal_ids is None:
+        # bulk repair in one statement; daily counters are left to `backfill_achievements`
+        done, pending = _probes()
+        return qs.exclude(status=derived_status()).update(
+            status=derived_status(),
+            completed_at=Case(
+                When(done & ~pending, then=Value(now)),
+                default=Value(None),
+                output_field=DateTimeField(),
+            ),
+            updated_at=now,
+            version=F("version") + 1,
+        )
+
+    goal_ids = [pk for pk in goal_ids if pk]
+    if not goal_ids:
+        return 0
+    # not folded into one UPDATE: the daily counters need each goal's old status and
+    # completed_at (to take a completion back off its day), which MySQL's UPDATE cannot
+    # return; when nothing changes, as on most task saves, this SELECT is the only query
+    changed = list(
+        qs.filter(pk__in=goal_ids)
+        .order_by()
+        .annotate(new_status=derived_status())
+        .exclude(status=F("new_status"))
+        .values_list("pk", "user_id", "status", "new_status", "completed_at")
+    )
+    updated = 0
+    for pk, user_id, old_status, new_status, completed_at in changed:
+        was_completed_at = completed_at
+        completed_at = now if new_status == Goal.Status.DONE else None
+        # conditional on the status we read: of two concurrent task saves seeing the same
+        # transition, only one updates the row and counts it
+        if not Goal.objects.filter(pk=pk, status=old_status).update(
+            status=new_status, completed_at=completed_at, updated_at=now, version=F("version") + 1
+        ):
+            continue
+        updated += 1
+        notify(user_id, {"type": "goal", "id": pk, "goal_id": pk, "action": "saved"})
+        if new_status == Goal.Status.DONE:
+            history.record(user_id, now, goals=1)
+        elif old_status == Goal.Status.DONE:
+            history.record(user_id, was_completed_at, goals=-1)
+    return updated
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent once per bulk operation (see bulk.py) instead of one post_save per row,
+# because queryset.update() bypasses the per-row model signals.
+# kwargs: user_id, pks (list of ids), changes (dict of field -> new value),
+#         goal_ids (set of goal ids whose tasks changed; empty for Goal updates)
+bulk_changed = Signal()
@@ -0,0 +1,185 @@
+"""
+Delta sync for offline-capable clients.
+
+pull(user, watermark) returns the goals/tasks whose updated_at is past the
+watermark plus tombstones for deletions, in bounded batches, and a new
+watermark. Each of the three tables is read with an indexed
+(user, updated_at, id) range scan, and the watermark keeps one
+(timestamp, id) cursor per table. The cursor never moves closer than
+sync_lag() (GOALS_SYNC_LAG_SECONDS) to "now": a transaction that commits
+late with an older updated_at is still picked up next time, as long as it
+commits within that window. Clients upsert by id, so the re-sent rows are
+harmless.
+
+push(user, mutations) applies a batch of client changes in one transaction
+through the regular GoalForm/TaskForm validation; it is all or nothing. An upsert
+of an existing row only needs the fields that changed, and should carry the row
+version the client last pulled, so a stale edit is refused.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms import GoalForm, TaskForm
+from .models import EditConflict, Goal, Task, Tombstone
+
+BATCH_SIZE = 500
+WATERMARK_SALT = "goals.sync"
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+GOAL_FIELDS = ("id", "title", "description", "status", "auto_status", "deadline",
+               "completed_at", "created_at", "updated_at", "version")
+TASK_FIELDS = ("id", "goal_id", "parent_id", "title", "description", "due_date", "is_done", "rank",
+               "recurrence", "recurrence_interval", "recurrence_until", "recurs_from_id", "occurrence_date",
+               "completed_at", "created_at", "updated_at", "version")
+
+# name -> (queryset factory, timestamp field, fields sent)
+SOURCES = {
+    "goals": (lambda user: Goal.objects.filter(user=user), "updated_at", GOAL_FIELDS),
+    "tasks": (lambda user: Task.objects.filter(user=user), "updated_at", TASK_FIELDS),
+    "deleted": (lambda user: Tombstone.objects.filter(user=user), "deleted_at", ("object_type", "object_id")),
+}
+
+
+class SyncError(Exception):
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, "GOALS_SYNC_TOMBSTONE_DAYS", 30))
+
+
+def sync_lag():
+    return timedelta(seconds=getattr(settings, "GOALS_SYNC_LAG_SECONDS", 30))
+
+
+# -------- watermark --------
+def _encode(cursors):
+    # signing.dumps() timestamps the value, so _decode() can tell how old a watermark is
+    raw = {name: [ts.isoformat(), pk] for name, (ts, pk) in cursors.items()}
+    return signing.dumps(raw, salt=WATERMARK_SALT)
+
+
+def _decode(watermark, max_age=None):
+    """Cursors of a watermark; None if it is older than max_age (the client must start over)."""
+    if not watermark:
+        return {name: (EPOCH, 0) for name in SOURCES}
+    try:
+        raw = signing.loads(watermark, salt=WATERMARK_SALT, max_age=max_age)
+        return {name: (datetime.fromisoformat(raw[name][0]), int(raw[name][1])) for name in SOURCES}
+    except signing.SignatureExpired:
+        return None
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise SyncError("Invalid watermark.")
+
+
+# -------- pull --------
+def pull(user, watermark=None, batch_size=BATCH_SIZE):
+    # tombstones older than the retention window are pruned: such a client must start over
+    cursors = _decode(watermark, max_age=tombstone_retention())
+    if cursors is None:
+        return {"reset": True, "watermark": None}
+    ceiling = timezone.now() - sync_lag()
+
+    payload, more = {"reset": False}, False
+    for name, (queryset, ts_field, fields) in SOURCES.items():
+        ts, pk = cursors[name]
+        rows = list(
+            queryset(user)
+            .filter(Q(**{f"{ts_field}__gt": ts}) | Q(**{ts_field: ts, "id__gt": pk}))
+            .order_by(ts_field, "id")
+            .values(*dict.fromkeys(("id", ts_field, *fields)))[:batch_size]
+        )
+        if len(rows) == batch_size:
+            more = True
+        if rows:
+            last = rows[-1]
+            cursors[name] = (last[ts_field], last["id"])
+            if cursors[name][0] > ceiling:
+                cursors[name] = (ceiling, 0)  # re-read the lag window next time
+        payload[name] = [{key: row[key] for key in fields} for row in rows]
+
+    payload["more"] = more  # call again right away with the new watermark
+    payload["watermark"] = _encode(cursors)
+    return payload
+
+
+# -------- push --------
+def _optional_id(value, name):
+    # bool is an int too; anything else would fail deep inside the ORM as a 500
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    raise SyncError(f'"{name}" must be an integer id.')
+
+
+def _apply(user, mutation):
+    if not isinstance(mutation, dict):
+        raise SyncError("A mutation must be a JSON object.")
+    op, kind = mutation.get("op"), mutation.get("type")
+    pk = _optional_id(mutation.get("id"), "id")
+    data = mutation.get("fields") or {}
+    if not isinstance(data, dict):
+        raise SyncError('"fields" must be a JSON object.')
+    model = {"goal": Goal, "task": Task}.get(kind)
+    if model is None or op not in ("upsert", "delete"):
+        raise SyncError("Unknown mutation.")
+
+    instance = None
+    if pk is not None:
+        instance = model.objects.filter(user=user, pk=pk).select_related(*(["goal"] if model is Task else [])).first()
+        if instance is None:
+            raise SyncError(f"{kind} {pk} not found.")
+
+    if op == "delete":
+        if instance is None:
+            raise SyncError("Delete needs an id.")
+        instance.delete()
+        return pk
+
+    form_class = GoalForm if model is Goal else TaskForm
+    if instance is not None:
+        # clients send only the fields they changed; the rest keep their current values
+        data = {**model_to_dict(instance, fields=form_class._meta.fields), **data}
+    if model is Goal:
+        form = GoalForm(data, instance=instance)
+    else:
+        goal = instance.goal if instance else None
+        if goal is None:
+            goal_id = _optional_id(data.get("goal"), "goal")
+            goal = Goal.objects.filter(user=user, pk=goal_id).first() if goal_id is not None else None
+        if goal is None:
+            raise SyncError("Task needs one of your goals.")
+        form = TaskForm(data, instance=instance, user=user, goal=goal)
+    if not form.is_valid():
+        raise SyncError("Invalid data.", form.errors.get_json_data())
+    obj = form.save(commit=False)
+    obj.user = user
+    try:
+        obj.save()
+    except EditConflict:
+        raise SyncError(f"{kind} {pk} was changed since version {data.get('version')}; pull and retry.")
+    form.save_m2m()  # "tag_names", when sent
+    return obj.pk
+
+
+def push(user, mutations):
+    """Apply the mutations in order, in one transaction. Returns [{"client_id", "id"}]."""
+    results = []
+    try:
+        with transaction.atomic():
+            for index, mutation in enumerate(mutations):
+                try:
+                    pk = _apply(user, mutation)
+                except SyncError as e:
+                    raise SyncError(f"Mutation {index}: {e}", e.errors)
+                results.append({"client_id": mutation.get("client_id"), "id": pk})
+    except IntegrityError:
+        raise SyncError("A goal/task with this title already exists.")
+    return results
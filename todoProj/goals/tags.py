@@ -0,0 +1,144 @@
+"""
+Per-user tags on goals and tasks, and the AND / OR / NOT tag filter.
+
+Tag assignments live in the indexed GoalTag / TaskTag through tables, but the
+filter never joins them (a multi-tag AND there is a GROUP BY ... HAVING COUNT over
+every matching link). Instead each user's tag -> object-id sets are cached as
+bitmaps: Python ints with bit n set when the user's n-th tagged object (by pk)
+carries the tag. Any mix of "all of", "any of" and "none of" is then a few big-int
+&, | and & ~ operations, and the result reaches the database as one pk__in filter.
+Bit positions are ordinals, not pks, so a bitmap is as big as the user's own tagged
+rows however large the table's ids grow; the sorted pk array maps them back.
+
+The bitmaps are rebuilt (one query per through table) on the first filter after
+a change; the receivers in models.py drop them whenever tags or assignments change.
+"""
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import GoalTag, Tag, TaskTag
+
+CACHE_KEY = "goals:tags:v2:{user_id}"  # v2: ordinal bitmaps
+MAX_TAGS_PER_OBJECT = 20
+NAME_MAX_LENGTH = 50
+
+# kind -> (through table, object column)
+KINDS = {
+    "goal": (GoalTag, "goal_id"),
+    "task": (TaskTag, "task_id"),
+}
+
+
+# -------- names --------
+def normalize(name):
+    return " ".join(name.split()).lower()
+
+
+def parse_names(text):
+    """Split "Work, health,work" into ["work", "health"] (order kept, duplicates and blanks dropped)."""
+    names = (normalize(part) for part in (text or "").split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def set_tags(obj, names):
+    """Replace obj's tags with `names`, creating the owner's missing tags in one INSERT."""
+    if names:
+        Tag.objects.bulk_create([Tag(user_id=obj.user_id, name=name) for name in names], ignore_conflicts=True)
+    obj.tags.set(Tag.objects.filter(user_id=obj.user_id, name__in=names))
+
+
+# -------- bitmaps --------
+def _to_bitmap(ordinals):
+    buf = bytearray((max(ordinals) >> 3) + 1)
+    for n in ordinals:
+        buf[n >> 3] |= 1 << (n & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _to_ids(bits, ids):
+    """The pks behind the set bits; `ids` is the sorted pk array the ordinals index."""
+    buf = bits.to_bytes((bits.bit_length() + 7) >> 3, "little")
+    return [ids[(i << 3) + b] for i, byte in enumerate(buf) if byte for b in range(8) if byte >> b & 1]
+
+
+def _ordinal(ids, pk):
+    n = bisect_left(ids, pk)
+    return n if n < len(ids) and ids[n] == pk else None
+
+
+def contains(bits, ids, pk):
+    n = _ordinal(ids, pk)
+    return n is not None and bool(bits >> n & 1)
+
+
+def invalidate(user_id):
+    if user_id:
+        cache.delete(CACHE_KEY.format(user_id=user_id))
+
+
+def _load(user_id):
+    """{"names": {name: tag_id}, "goal"/"task": {"ids": sorted pk array, "tags": {tag_id: bitmap}}}"""
+    key = CACHE_KEY.format(user_id=user_id)
+    data = cache.get(key)
+    if data is None:
+        data = {"names": dict(Tag.objects.filter(user_id=user_id).values_list("name", "pk"))}
+        for kind, (through, column) in KINDS.items():
+            links = defaultdict(list)
+            rows = through.objects.filter(tag__user_id=user_id).values_list("tag_id", column)
+            for tag_id, pk in rows.iterator(chunk_size=2000):
+                links[tag_id].append(pk)
+            ids = array("q", sorted({pk for pks in links.values() for pk in pks}))
+            ordinal = {pk: n for n, pk in enumerate(ids)}
+            data[kind] = {
+                "ids": ids,
+                "tags": {tag_id: _to_bitmap([ordinal[pk] for pk in pks]) for tag_id, pks in links.items()},
+            }
+        cache.set(key, data, getattr(settings, "GOALS_TAGS_CACHE_TIMEOUT", 60 * 60 * 24))
+    return data
+
+
+def tag_names(user_id):
+    return sorted(_load(user_id)["names"])
+
+
+# -------- filtering --------
+def resolve(user_id, kind, all_of=(), any_of=(), none_of=()):
+    """
+    Evaluate a tag filter to (included, excluded, ids): two bitmaps and the pk array
+    their bits index. `included` is None when there are no positive terms
+    (everything not excluded matches).
+    """
+    data = _load(user_id)
+    names, bitmaps = data["names"], data[kind]["tags"]
+
+    def bits(name):
+        return bitmaps.get(names.get(name), 0)  # unknown tags match nothing
+
+    included = None
+    for name in all_of:
+        included = bits(name) if included is None else included & bits(name)
+    if any_of:
+        either = reduce(or_, map(bits, any_of), 0)
+        included = either if included is None else included & either
+    return included, reduce(or_, map(bits, none_of), 0), data[kind]["ids"]
+
+
+def matches(resolved, pk):
+    included, excluded, ids = resolved
+    return (included is None or contains(included, ids, pk)) and not contains(excluded, ids, pk)
+
+
+def filter_queryset(queryset, user_id, kind, all_of=(), any_of=(), none_of=()):
+    """Narrow an owner-scoped queryset of goals or tasks to the ones matching the filter."""
+    if not (all_of or any_of or none_of):
+        return queryset
+    included, excluded, ids = resolve(user_id, kind, all_of, any_of, none_of)
+    if included is not None:
+        return queryset.filter(pk__in=_to_ids(included & ~excluded, ids))
+    return queryset.exclude(pk__in=_to_ids(excluded, ids)) if excluded else queryset
@@ -1,3 +1,1014 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+import zlib
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from todoProj import assets, warmup
+from todoProj.assets import StaticAssetsMiddleware
+
+from . import (
+    activity, archive, bulk, calendar, events, loadtest, ordering, profiling, recurrence, rollup, sync, tags, tree,
+)
+from .db import raw_delete
+from .management.commands import loadtest as loadtest_command
+from .models import (
+    ActivityLog, ArchivedGoal, ArchivedTask, DailyAchievement, EditConflict, Goal, LiveEvent, Task, Tombstone,
+)
+from .signals import bulk_changed
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("sync", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal", description="goal notes")
+        self.task = Task.objects.create(user=self.user, goal=self.goal, title="Task", description="keep me")
+        self.client.force_login(self.user)
+
+    def post(self, mutations):
+        return self.client.post(reverse("goals:sync"), json.dumps({"mutations": mutations}),
+                                content_type="application/json")
+
+    def test_round_trip(self):
+        first = sync.pull(self.user)
+        self.assertEqual([row["id"] for row in first["tasks"]], [self.task.pk])
+        results = sync.push(self.user, [
+            {"op": "upsert", "type": "task", "client_id": "c1", "fields": {"goal": self.goal.pk, "title": "New"}},
+            {"op": "delete", "type": "task", "id": self.task.pk},
+        ])
+        self.assertEqual(results[0]["client_id"], "c1")
+        self.assertEqual(Task.objects.get(pk=results[0]["id"]).title, "New")
+        self.assertTrue(Tombstone.objects.filter(object_type="task", object_id=self.task.pk).exists())
+
+        # the lag window is re-read, so back-date the rows instead of sleeping
+        Task.objects.update(updated_at=first["tasks"][0]["updated_at"])
+        Tombstone.objects.update(deleted_at=first["tasks"][0]["updated_at"])
+        second = sync.pull(self.user, first["watermark"])
+        self.assertEqual([row["title"] for row in second["tasks"]], ["New"])
+        self.assertEqual(second["deleted"], [{"object_type": "task", "object_id": self.task.pk}])
+
+    def late_commit(self, lag):
+        with override_settings(GOALS_SYNC_LAG_SECONDS=lag):
+            first = sync.pull(self.user)
+            # written 5 s before that pull, committed after it
+            late = Task.objects.create(user=self.user, goal=self.goal, title="Late")
+            Task.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=5))
+            return [row["title"] for row in sync.pull(self.user, first["watermark"])["tasks"]]
+
+    def test_late_commit_inside_the_lag_is_pulled(self):
+        self.assertIn("Late", self.late_commit(10))
+
+    def test_late_commit_beyond_the_lag_is_missed(self):
+        self.assertNotIn("Late", self.late_commit(1))  # why the lag must outlast any write transaction
+
+    def test_partial_push_keeps_other_fields(self):
+        sync.push(self.user, [
+            {"op": "upsert", "type": "task", "id": self.task.pk,
+             "fields": {"title": "Renamed", "version": self.task.version}},
+            {"op": "upsert", "type": "goal", "id": self.goal.pk, "fields": {"title": "Renamed goal"}},
+        ])
+        self.task.refresh_from_db()
+        self.goal.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.description), ("Renamed", "keep me"))
+        self.assertEqual((self.goal.title, self.goal.description), ("Renamed goal", "goal notes"))
+
+    def test_stale_version_is_refused(self):
+        version = self.task.version
+        Task.objects.get(pk=self.task.pk).save()  # someone else's edit
+        with self.assertRaisesMessage(sync.SyncError, "was changed since version"):
+            sync.push(self.user, [{"op": "upsert", "type": "task", "id": self.task.pk,
+                                   "fields": {"title": "Mine", "version": version}}])
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Task")
+
+    def test_bad_input_is_a_400(self):
+        bad = [
+            ["not a mutation"],
+            [{"op": "upsert", "type": "task", "id": "abc", "fields": {"title": "x"}}],
+            [{"op": "upsert", "type": "task", "fields": {"goal": "abc", "title": "x"}}],
+            [{"op": "upsert", "type": "goal", "id": True, "fields": {}}],
+            [{"op": "upsert", "type": "goal", "fields": ["title"]}],
+            [{"op": "rename", "type": "goal", "id": self.goal.pk}],
+        ]
+        for mutations in bad:
+            with self.subTest(mutations=mutations):
+                self.assertEqual(self.post(mutations).status_code, 400)
+
+    def test_push_is_all_or_nothing(self):
+        response = self.post([
+            {"op": "upsert", "type": "goal", "id": self.goal.pk, "fields": {"title": "Changed"}},
+            {"op": "delete", "type": "task", "id": 10 ** 9},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Goal.objects.get(pk=self.goal.pk).title, "Goal")
+
+
+class TagFilterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tags", password="pw")
+        self.goals = {}
+        for title, names in [("a", "work, home"), ("b", "work"), ("c", "home"), ("d", "")]:
+            goal = Goal.objects.create(user=self.user, title=title)
+            tags.set_tags(goal, tags.parse_names(names))
+            self.goals[title] = goal
+
+    def titles(self, **spec):
+        queryset = tags.filter_queryset(Goal.objects.filter(user=self.user), self.user.pk, "goal", **spec)
+        return sorted(queryset.values_list("title", flat=True))
+
+    def test_filters(self):
+        self.assertEqual(self.titles(all_of=["work", "home"]), ["a"])
+        self.assertEqual(self.titles(any_of=["work", "home"]), ["a", "b", "c"])
+        self.assertEqual(self.titles(all_of=["work"], none_of=["home"]), ["b"])
+        self.assertEqual(self.titles(none_of=["work"]), ["c", "d"])
+        self.assertEqual(self.titles(all_of=["unknown"]), [])
+
+    def test_bitmaps_do_not_grow_with_the_pk(self):
+        far = Goal.objects.create(pk=80_000_000, user=self.user, title="far")
+        tags.set_tags(far, ["work"])
+        self.assertEqual(self.titles(all_of=["work"]), ["a", "b", "far"])
+        included, excluded, ids = tags.resolve(self.user.pk, "goal", all_of=["work"])
+        self.assertLess(included.bit_length(), 8)
+        self.assertTrue(tags.matches((included, excluded, ids), far.pk))
+        self.assertFalse(tags.matches((included, excluded, ids), self.goals["c"].pk))
+
+
+class DeleteTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("delete", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+        for i in range(30):
+            Task.objects.create(user=self.user, goal=self.goal, title=f"Task {i}", is_done=i % 2 == 0)
+
+    def test_cascade_writes_tombstones_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            Goal.objects.get(pk=self.goal.pk).delete()
+        inserts = [q["sql"] for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "goals_tombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse(any("EXISTS" in q["sql"] for q in queries.captured_queries))  # no rollup probes
+        self.assertEqual(Tombstone.objects.filter(user=self.user).count(), 31)
+
+    def test_single_task_delete_still_rolls_up(self):
+        Goal.objects.filter(pk=self.goal.pk).update(auto_status=True)
+        Task.objects.filter(goal=self.goal, is_done=False).delete()
+        Task.objects.filter(goal=self.goal).first().delete()
+        self.assertEqual(Goal.objects.get(pk=self.goal.pk).status, Goal.Status.DONE)
+        self.assertEqual(Tombstone.objects.filter(object_type="task").count(), 16)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("rollup", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal", auto_status=True)
+
+    def status(self):
+        goal = Goal.objects.get(pk=self.goal.pk)
+        completed = DailyAchievement.objects.filter(user=self.user).values_list("goals_completed", flat=True)
+        return goal.status, goal.completed_at is not None, sum(completed)
+
+    def set_done(self, task, is_done):
+        task = Task.objects.get(pk=task.pk)
+        task.is_done = is_done
+        task.save()
+
+    def test_status_follows_the_tasks(self):
+        first = Task.objects.create(user=self.user, goal=self.goal, title="First")
+        second = Task.objects.create(user=self.user, goal=self.goal, title="Second")
+        self.assertEqual(self.status(), (Goal.Status.OPEN, False, 0))
+        self.set_done(first, True)
+        self.assertEqual(self.status(), (Goal.Status.IN_PROGRESS, False, 0))
+        self.set_done(second, True)
+        self.assertEqual(self.status(), (Goal.Status.DONE, True, 1))
+        self.set_done(second, False)  # undo takes the completion back off
+        self.assertEqual(self.status(), (Goal.Status.IN_PROGRESS, False, 0))
+
+    def test_task_delete_and_re_add(self):
+        done = Task.objects.create(user=self.user, goal=self.goal, title="Done", is_done=True)
+        pending = Task.objects.create(user=self.user, goal=self.goal, title="Pending")
+        self.assertEqual(self.status(), (Goal.Status.IN_PROGRESS, False, 0))
+        pending.delete()
+        self.assertEqual(self.status(), (Goal.Status.DONE, True, 1))
+        Task.objects.create(user=self.user, goal=self.goal, title="Pending again")
+        self.assertEqual(self.status(), (Goal.Status.IN_PROGRESS, False, 0))
+        done.delete()
+        self.assertEqual(self.status(), (Goal.Status.OPEN, False, 0))
+
+    def test_manual_goals_are_left_alone(self):
+        manual = Goal.objects.create(user=self.user, title="Manual", status=Goal.Status.IN_PROGRESS)
+        Task.objects.create(user=self.user, goal=manual, title="Task", is_done=True)
+        self.assertEqual(rollup.rollup_goal_status([manual.pk]), 0)
+        self.assertEqual(rollup.rollup_goal_status(), 0)
+        self.assertEqual(Goal.objects.get(pk=manual.pk).status, Goal.Status.IN_PROGRESS)
+
+    def test_reconcile_command_repairs_drift(self):
+        Task.objects.create(user=self.user, goal=self.goal, title="Task", is_done=True)
+        Goal.objects.filter(pk=self.goal.pk).update(status=Goal.Status.OPEN, completed_at=None)  # e.g. raw SQL
+        out = io.StringIO()
+        call_command("reconcile_goal_status", "--dry-run", stdout=out)
+        self.assertIn("1 goal(s) would be repaired.", out.getvalue())
+        self.assertEqual(Goal.objects.get(pk=self.goal.pk).status, Goal.Status.OPEN)
+        with self.assertNumQueries(1):
+            call_command("reconcile_goal_status", stdout=out)
+        self.assertIn("1 goal(s) repaired.", out.getvalue())
+        self.assertEqual(self.status()[:2], (Goal.Status.DONE, True))
+
+    def test_concurrent_transition_is_counted_once(self):
+        user, goal = self.user, self.goal
+        task = Task.objects.create(user=user, goal=goal, title="Task")
+        Task.objects.filter(pk=task.pk).update(is_done=True)
+        # another worker applied the same OPEN -> DONE transition between our SELECT and UPDATE
+        real_filter = Goal.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            if kwargs.get("status") == Goal.Status.OPEN:
+                real_filter(pk=goal.pk).update(status=Goal.Status.DONE)
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(Goal.objects, "filter", side_effect=racing_filter):
+            self.assertEqual(rollup.rollup_goal_status([goal.pk]), 0)
+        self.assertFalse(DailyAchievement.objects.filter(user=user, goals_completed__gt=0).exists())
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("history", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+
+    def counters(self, user=None):
+        rows = DailyAchievement.objects.filter(user=user or self.user)
+        return {day: (tasks, goals) for day, tasks, goals in rows.values_list("day", "tasks_completed", "goals_completed")}
+
+    def test_completions_are_recorded_and_undone(self):
+        today = timezone.localdate()
+        task = Task.objects.create(user=self.user, goal=self.goal, title="Task", is_done=True)
+        self.goal.status = Goal.Status.DONE
+        self.goal.save()
+        self.assertEqual(self.counters(), {today: (1, 1)})
+        task.is_done = False
+        task.save()
+        self.assertEqual(self.counters(), {today: (0, 1)})
+        task.is_done = True
+        task.save()
+        task.delete()  # a deleted completion is taken off too
+        self.assertEqual(self.counters(), {today: (0, 1)})
+
+    def test_undo_on_a_day_never_recorded_is_ignored(self):
+        task = Task.objects.create(user=self.user, goal=self.goal, title="Task", is_done=True)
+        DailyAchievement.objects.all().delete()
+        task.delete()
+        self.assertEqual(self.counters(), {})  # no negative row
+
+    def test_backfill_rebuilds_in_chunks_without_touching_tasks(self):
+        days = [timezone.now() - timedelta(days=n) for n in (3, 3, 1)]
+        tasks = [Task.objects.create(user=self.user, goal=self.goal, title=f"Task {n}", is_done=True)
+                 for n in range(3)]
+        for task, when in zip(tasks, days):
+            Task.objects.filter(pk=task.pk).update(completed_at=when)
+        # from before completed_at and the task owner were stored
+        legacy = Task.objects.create(user=self.user, goal=self.goal, title="Legacy", is_done=True)
+        Task.objects.filter(pk=legacy.pk).update(user=None, completed_at=None, updated_at=days[2])
+        other = get_user_model().objects.create_user("other", password="pw")
+        Task.objects.create(user=other, goal=Goal.objects.create(user=other, title="Theirs"), title="x", is_done=True)
+        expected = {self.user: self.counters(), other: self.counters(other)}
+        DailyAchievement.objects.all().delete()
+
+        out = io.StringIO()
+        call_command("backfill_achievements", "--chunk-size", "1", stdout=out)
+        self.assertIn("2 user(s) processed", out.getvalue())
+        expected[self.user] = {timezone.localdate(days[0]): (2, 0), timezone.localdate(days[2]): (2, 0)}
+        for user, counters in expected.items():
+            self.assertEqual(self.counters(user), counters)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.user_id, legacy.completed_at), (None, None))  # only read
+
+        call_command("backfill_achievements", "--repair", "--user", str(self.user.pk), stdout=out)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.user_id, legacy.completed_at), (self.user.pk, days[2]))
+        self.assertEqual(self.counters(), expected[self.user])
+
+
+class ActivityBufferTests(TestCase):
+    def entry(self):
+        return ActivityLog(user_id=1, action=ActivityLog.Action.CREATED, object_type="goal", summary="x")
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_full_buffer_is_flushed_off_the_request_thread(self):
+        writers = []
+        with mock.patch.object(ActivityLog.objects, "bulk_create",
+                               side_effect=lambda *a, **k: writers.append(threading.current_thread())):
+            buffer = activity.ActivityBuffer(size=3, interval=60)
+            for _ in range(3):
+                buffer.add(self.entry())
+            self.assertTrue(self.wait_for(lambda: writers))
+        self.assertIsNot(writers[0], threading.current_thread())
+        self.assertEqual(len(buffer), 0)
+
+    def test_request_finished_hands_a_due_buffer_to_the_thread(self):
+        writers = []
+        buffer = activity.ActivityBuffer(size=100, interval=60)
+        with mock.patch.object(ActivityLog.objects, "bulk_create",
+                               side_effect=lambda *a, **k: writers.append(threading.current_thread())), \
+                mock.patch.object(activity, "buffer", buffer):
+            buffer.add(self.entry())
+            activity.flush_if_due(sender=None)
+            self.assertEqual(writers, [])  # not due yet
+            buffer._oldest -= 60
+            activity.flush_if_due(sender=None)
+            self.assertTrue(self.wait_for(lambda: writers))
+        self.assertIsNot(writers[0], threading.current_thread())
+        self.assertEqual(len(buffer), 0)
+
+    def test_failed_timer_flush_is_retried(self):
+        calls = []
+
+        def bulk_create(entries, **kwargs):
+            calls.append(len(entries))
+            if len(calls) == 1:
+                raise RuntimeError("database is down")
+
+        with mock.patch.object(ActivityLog.objects, "bulk_create", side_effect=bulk_create), \
+                mock.patch.object(activity.logger, "exception"):
+            buffer = activity.ActivityBuffer(size=100, interval=0.05)
+            buffer.add(self.entry())
+            self.assertTrue(self.wait_for(lambda: len(calls) == 2))
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(len(buffer), 0)
+
+
+@override_settings(GOALS_EVENTS_DB_BRIDGE=True, GOALS_EVENTS_POLL_SECONDS=0.01)
+class EventBridgeTests(TestCase):
+    async def test_late_rows_with_lower_pks_are_delivered_once(self):
+        user = await get_user_model().objects.acreate(username="events")
+        broker = events.Broker()
+        subscription = broker.subscribe(user.pk)
+
+        async def write(pk, goal_id, age):
+            payload = {"type": "goal", "id": goal_id, "goal_id": goal_id, "action": "saved"}
+            await LiveEvent.objects.abulk_create([LiveEvent(
+                pk=pk, user=user, payload=payload, created_at=timezone.now() - timedelta(seconds=age),
+            )])
+            return await asyncio.wait_for(subscription.queue.get(), 5)
+
+        await asyncio.sleep(0.3)  # the bridge starts from "now"
+        self.assertEqual((await write(100, 1, 0))["id"], 1)
+        # another process commits an older row with a lower pk
+        self.assertEqual((await write(50, 2, 0.2))["id"], 2)
+        await asyncio.sleep(0.1)
+        self.assertTrue(subscription.queue.empty())  # nothing re-sent
+        broker.unsubscribe(subscription)
+        await broker._bridge
+
+    def changes(self, user):
+        goal = Goal.objects.create(user=user, title="Goal", auto_status=True)
+        first = Task.objects.create(user=user, goal=goal, title="First")
+        second = Task.objects.create(user=user, goal=goal, title="Second", is_done=True)  # rolls the goal up
+        tags.set_tags(second, ["home"])
+        ordering.apply_moves(user, goal.pk, [{"task": second.pk, "after": None}])
+        first.delete()
+        return goal
+
+    def test_bridge_sends_what_local_mode_publishes(self):
+        with override_settings(GOALS_EVENTS_DB_BRIDGE=False), mock.patch.object(activity.buffer, "add"), \
+                mock.patch.object(events.broker, "publish") as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.changes(get_user_model().objects.create_user("local", password="pw"))
+        local = [call.args[1] for call in publish.call_args_list]
+
+        user = get_user_model().objects.create_user("bridged", password="pw")
+        with mock.patch.object(activity.buffer, "add"), mock.patch.object(events.broker, "publish") as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            goal = self.changes(user)
+        publish.assert_not_called()  # only the bridge publishes
+        bridged = list(LiveEvent.objects.filter(user=user).order_by("pk").values_list("payload", flat=True))
+
+        def shape(event):  # ids differ between the two runs
+            return {key: value for key, value in event.items() if key not in ("id", "ids", "goal_id", "goal_ids")}
+        self.assertEqual([shape(e) for e in bridged], [shape(e) for e in local])
+        self.assertEqual(len([e for e in bridged if e["type"] == "goal"]), 3)  # created, then two rollup flips
+        self.assertEqual({e.get("goal_id") or e["goal_ids"][0] for e in bridged}, {goal.pk})
+
+    def test_prune_keeps_the_bridge_window(self):
+        user = get_user_model().objects.create_user("prune", password="pw")
+        LiveEvent.objects.create(user=user, payload={}, created_at=timezone.now() - timedelta(days=2))
+        recent = LiveEvent.objects.create(user=user, payload={})
+        self.assertEqual(events.prune(), 1)
+        self.assertEqual(list(LiveEvent.objects.all()), [recent])
+
+
+@override_settings(GOALS_LIST_STREAMING=True)
+class StreamedGoalListTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("stream", password="pw")
+        for i in range(120):
+            Goal.objects.create(user=self.user, title=f"Goal {i:03d}")
+
+    async def test_asgi_gets_an_async_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("goals:list"), headers={"Accept-Encoding": "gzip"})
+        self.assertTrue(response.is_async)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = [inflate.decompress(chunk) async for chunk in response.streaming_content]
+        self.assertIn(b"<!DOCTYPE", chunks[1])  # the header is flushed before any card
+        page = b"".join(chunks).decode()
+        self.assertIn("Goal 000", page)
+        self.assertIn("Goal 119", page)
+
+    def test_wsgi_gets_a_sync_stream(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("goals:list"))
+        self.assertFalse(response.is_async)
+        self.assertIn("Goal 119", b"".join(response.streaming_content).decode())
+
+
+class RawDeleteTests(TestCase):
+    def test_one_statement_without_signals(self):
+        user = get_user_model().objects.create_user("raw", password="pw")
+        goal = Goal.objects.create(user=user, title="Goal")
+        Task.objects.create(user=user, goal=goal, title="a")
+        Task.objects.create(user=user, goal=goal, title="b")
+        with self.assertNumQueries(1):
+            self.assertEqual(raw_delete(Task.objects.filter(goal=goal)), 2)
+        self.assertFalse(Tombstone.objects.exists())  # post_delete never ran
+
+
+class OptimisticLockTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("lock", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+
+    def test_conflicting_save_raises(self):
+        mine, theirs = Goal.objects.get(pk=self.goal.pk), Goal.objects.get(pk=self.goal.pk)
+        theirs.title = "Theirs"
+        theirs.save()
+        mine.title = "Mine"
+        with self.assertRaises(EditConflict):
+            mine.save()
+        self.assertEqual(mine.version, 1)  # unchanged, so the user can merge and retry
+        self.assertEqual(Goal.objects.get(pk=self.goal.pk).title, "Theirs")
+
+    def test_save_after_delete_raises(self):
+        task = Task.objects.create(user=self.user, goal=self.goal, title="Task")
+        Task.objects.filter(pk=task.pk).delete()
+        task.title = "Edited"
+        with self.assertRaises(EditConflict):
+            task.save()
+
+    def test_enclosing_transaction_survives_a_conflict(self):
+        stale = Goal.objects.get(pk=self.goal.pk)
+        Goal.objects.get(pk=self.goal.pk).save()
+        with transaction.atomic():
+            with self.assertRaises(EditConflict):
+                stale.save()
+            Goal.objects.create(user=self.user, title="Still usable")
+        self.assertTrue(Goal.objects.filter(title="Still usable").exists())
+
+    def test_sequential_saves_bump_the_version(self):
+        goal = Goal.objects.get(pk=self.goal.pk)
+        goal.save()
+        goal.save()
+        self.assertEqual(Goal.objects.get(pk=self.goal.pk).version, 3)
+
+
+class RankOrderTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("rank", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+        self.tasks = [Task.objects.create(user=self.user, goal=self.goal, title=t) for t in "abcd"]
+
+    def order(self):
+        return list(Task.objects.filter(goal=self.goal).order_by("rank", "id").values_list("title", flat=True))
+
+    def move(self, title, after):
+        pk = {task.title: task.pk for task in self.tasks}
+        return ordering.apply_moves(self.user, self.goal.pk, [{"task": pk[title], "after": pk.get(after)}])
+
+    def test_appended_tasks_are_a_gap_apart(self):
+        ranks = [task.rank for task in Task.objects.filter(goal=self.goal).order_by("rank")]
+        self.assertEqual(ranks, [ordering.RANK_GAP * n for n in range(1, 5)])
+
+    def test_moves_land_between_neighbours(self):
+        self.move("d", None)
+        self.assertEqual(self.order(), ["d", "a", "b", "c"])
+        ranks = self.move("a", "c")
+        self.assertEqual(self.order(), ["d", "b", "c", "a"])
+        self.assertEqual(len(set(ranks.values())), 4)
+
+    def test_tight_move_shifts_and_rebalance_keeps_the_order(self):
+        a, b = self.tasks[0], self.tasks[1]
+        Task.objects.filter(pk=b.pk).update(rank=a.rank + 1)  # no integer left between a and b
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.move("d", "a")
+        self.assertEqual(self.order(), ["a", "d", "b", "c"])
+        with mock.patch.object(ordering._rebalancer, "submit") as submit, mock.patch.object(activity.buffer, "add"):
+            for callback in callbacks:
+                callback()
+        submit.assert_called_once_with(ordering._rebalance_in_background, self.goal.pk)
+
+        self.assertEqual(ordering.rebalance(self.goal.pk), 4)
+        self.assertEqual(self.order(), ["a", "d", "b", "c"])
+        ranks = list(Task.objects.filter(goal=self.goal).order_by("rank").values_list("rank", flat=True))
+        self.assertEqual(ranks, [ordering.RANK_GAP * n for n in range(1, 5)])
+
+    def test_bad_moves_are_refused(self):
+        other = Goal.objects.create(user=self.user, title="Other")
+        stranger = Task.objects.create(user=self.user, goal=other, title="x")
+        with self.assertRaises(ordering.MoveError):
+            ordering.apply_moves(self.user, self.goal.pk, [{"task": stranger.pk, "after": None}])
+        with self.assertRaises(ordering.MoveError):
+            ordering.apply_moves(self.user, self.goal.pk, [{"task": "abc"}])
+
+
+class BulkTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("bulk", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="From")
+        self.target = Goal.objects.create(user=self.user, title="To", deadline=timezone.localdate())
+        self.root = Task.objects.create(user=self.user, goal=self.goal, title="Root")
+        self.child = Task.objects.create(user=self.user, goal=self.goal, title="Child", parent=self.root)
+        self.other = get_user_model().objects.create_user("other", password="pw")
+        self.foreign = Task.objects.create(
+            user=self.other, goal=Goal.objects.create(user=self.other, title="Theirs"), title="Theirs",
+        )
+        self.signals = []
+        bulk_changed.connect(self.received)
+        self.addCleanup(bulk_changed.disconnect, self.received)
+
+    def received(self, sender, **kwargs):
+        self.signals.append((sender, kwargs["pks"]))
+
+    def goals(self):
+        return dict(Task.objects.filter(user=self.user).values_list("title", "goal_id"))
+
+    def test_subtasks_move_with_their_root(self):
+        self.assertEqual(bulk.move_tasks(self.user, [self.root.pk, self.foreign.pk], self.target), 2)
+        self.assertEqual(self.goals(), {"Root": self.target.pk, "Child": self.target.pk})
+        self.assertEqual(Task.objects.get(pk=self.foreign.pk).goal.title, "Theirs")  # not the user's
+        self.assertEqual(self.signals, [(Task, sorted([self.root.pk, self.child.pk]))])  # one signal
+
+    def test_a_subtask_alone_is_refused(self):
+        with self.assertRaisesMessage(ValidationError, "Subtasks move with their top-level task"):
+            bulk.move_tasks(self.user, [self.child.pk], self.target)
+
+    def test_due_date_after_the_deadline_is_refused(self):
+        Task.objects.filter(pk=self.child.pk).update(due_date=self.target.deadline + timedelta(days=1))
+        with self.assertRaisesMessage(ValidationError, "due after the goal deadline"):
+            bulk.move_tasks(self.user, [self.root.pk], self.target)
+        self.assertEqual(self.goals()["Root"], self.goal.pk)
+        self.assertEqual(self.signals, [])
+
+    def test_title_clash_is_refused(self):
+        Task.objects.create(user=self.user, goal=self.target, title="Child")
+        with self.assertRaisesMessage(ValidationError, "already has a task with one of these titles"):
+            bulk.move_tasks(self.user, [self.root.pk], self.target)
+        self.assertEqual(self.goals()["Root"], self.goal.pk)
+
+    def test_foreign_target_goal_is_refused(self):
+        with self.assertRaises(ValidationError):
+            bulk.move_tasks(self.user, [self.root.pk], self.foreign.goal)
+
+    def test_set_tasks_done_only_counts_flips_of_own_tasks(self):
+        ids = [self.root.pk, self.child.pk, self.foreign.pk]
+        self.assertEqual(bulk.set_tasks_done(self.user, ids, True), 2)
+        self.assertEqual(bulk.set_tasks_done(self.user, ids, True), 0)
+        self.assertFalse(Task.objects.get(pk=self.foreign.pk).is_done)
+        self.assertEqual(DailyAchievement.objects.get(user=self.user).tasks_completed, 2)
+        self.assertEqual(len(self.signals), 2)  # one per call
+
+    def test_set_goals_status_skips_auto_and_foreign_goals(self):
+        auto = Goal.objects.create(user=self.user, title="Auto", auto_status=True)
+        ids = [self.goal.pk, auto.pk, self.foreign.goal_id]
+        self.assertEqual(bulk.set_goals_status(self.user, ids, Goal.Status.DONE), 1)
+        statuses = dict(Goal.objects.values_list("title", "status"))
+        self.assertEqual(statuses["From"], Goal.Status.DONE)
+        self.assertEqual(statuses["Auto"], Goal.Status.OPEN)
+        self.assertEqual(statuses["Theirs"], Goal.Status.OPEN)
+        self.assertEqual(self.signals, [(Goal, [self.goal.pk])])
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user = get_user_model().objects.create_user("repeat", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+
+    def template(self, due_in=0, title="Water plants", **rule):
+        return Task.objects.create(
+            user=self.user, goal=self.goal, title=title, recurrence=Task.Recurrence.DAILY,
+            due_date=self.today + timedelta(days=due_in), **rule,
+        )
+
+    def days(self):
+        dates = Task.objects.filter(recurs_from__isnull=False).values_list("occurrence_date", flat=True)
+        return sorted((day - self.today).days for day in dates)
+
+    def test_reruns_create_nothing_new(self):
+        template = self.template()
+        out = io.StringIO()
+        call_command("schedule_recurring_tasks", "--horizon", "3", stdout=out)
+        self.assertIn("3 occurrence(s) from 1 task(s)", out.getvalue())
+        self.assertEqual(recurrence.schedule(horizon=3), (0, 0))  # nothing due any more
+        # a run that died before advancing recurrence_next
+        Task.objects.filter(pk=template.pk).update(recurrence_next=self.today + timedelta(days=1))
+        self.assertEqual(recurrence.schedule(horizon=3), (1, 0))
+        self.assertEqual(self.days(), [1, 2, 3])
+
+    def test_titles_the_goal_already_has_are_skipped(self):
+        self.template()
+        Task.objects.create(
+            user=self.user, goal=self.goal,
+            title=recurrence.occurrence_title("Water plants", self.today + timedelta(days=2)),
+        )
+        self.assertEqual(recurrence.schedule(horizon=3), (1, 2))
+        self.assertEqual(self.days(), [1, 3])
+
+    def test_deadline_and_end_date_cap_the_series(self):
+        Goal.objects.filter(pk=self.goal.pk).update(deadline=self.today + timedelta(days=2))
+        capped = self.template()
+        ending = self.template(title="Feed cat", recurrence_until=self.today + timedelta(days=1))
+        self.assertEqual(recurrence.schedule(horizon=5), (2, 3))
+        occurrences = Task.objects.filter(recurs_from__isnull=False)
+        self.assertEqual(occurrences.filter(recurs_from=capped).count(), 2)
+        self.assertEqual(occurrences.filter(recurs_from=ending).count(), 1)
+        capped.refresh_from_db()
+        ending.refresh_from_db()
+        self.assertEqual(capped.recurrence_next, self.today + timedelta(days=3))  # the deadline may move later
+        self.assertIsNone(ending.recurrence_next)  # done for good
+
+    def test_missed_days_are_not_backfilled(self):
+        self.template(due_in=-10)
+        self.assertEqual(recurrence.schedule(horizon=2), (1, 3))
+        self.assertEqual(self.days(), [0, 1, 2])
+
+    def test_inactive_users_are_skipped(self):
+        self.template()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(recurrence.schedule(horizon=3), (0, 0))
+        self.assertEqual(self.days(), [])
+
+
+class TaskUpdateViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("edit", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+        self.task = Task.objects.create(user=self.user, goal=self.goal, title="Task")
+        self.url = reverse("goals:task_update", kwargs={"pk": self.task.pk})
+        self.client.force_login(self.user)
+
+    def test_get_loads_the_task_once(self):
+        # session, user, task joined with its goal, the task's tags, the parent choices
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_loads_the_task_once(self):
+        data = {"title": "Renamed", "description": "", "recurrence_interval": 1, "version": self.task.version}
+        # the four reads above minus the parent choices, the title constraint check in a
+        # savepoint, and the UPDATE; the goal is manual, so no roll-up probe
+        with self.assertNumQueries(8):
+            response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse("goals:goal_detail", kwargs={"pk": self.goal.pk}))
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Renamed")
+
+    def test_other_users_task_is_not_found(self):
+        self.client.force_login(get_user_model().objects.create_user("other", password="pw"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class SubtreeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tree", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Goal")
+        self.a = self.task("a")
+        self.b = self.task("b", self.a)
+        self.c = self.task("c", self.b)
+        self.d = self.task("d")
+
+    def task(self, title, parent=None):
+        return Task.objects.create(user=self.user, goal=self.goal, title=title, parent=parent)
+
+    def assertPathsConsistent(self):
+        tasks = {task.pk: task for task in Task.objects.filter(goal=self.goal)}
+        for task in tasks.values():
+            expected = tree.subtree_prefix(tasks[task.parent_id]) if task.parent_id else ""
+            self.assertEqual(task.path, expected, task.title)
+
+    def test_paths_follow_the_parents(self):
+        self.assertEqual(self.c.path, tree.segment(self.a.pk) + tree.segment(self.b.pk))
+        self.assertEqual(set(tree.descendants(self.a)), {self.b, self.c})
+        self.assertPathsConsistent()
+
+    def test_moving_a_branch_carries_its_descendants(self):
+        self.b.parent = self.d
+        self.b.save()
+        self.assertPathsConsistent()
+        self.assertEqual(set(tree.descendants(self.d)), {self.b, self.c})
+        self.assertEqual(list(tree.descendants(self.a)), [])
+
+        self.b.parent = None  # back to the top level
+        self.b.save()
+        self.assertPathsConsistent()
+        self.assertEqual(Task.objects.get(pk=self.c.pk).path, tree.segment(self.b.pk))
+
+    def test_a_task_cannot_move_under_its_own_subtree(self):
+        self.a.parent = self.c
+        with self.assertRaises(ValidationError):
+            self.a.full_clean()
+
+    def test_build_tree_is_depth_first_with_counts(self):
+        Task.objects.filter(pk=self.c.pk).update(is_done=True)
+        rows = tree.build_tree(list(Task.objects.filter(goal=self.goal)))
+        self.assertEqual([(row["task"].title, row["depth"]) for row in rows], [("a", 0), ("b", 1), ("c", 2), ("d", 0)])
+        self.assertEqual((rows[0]["done_below"], rows[0]["total_below"]), (1, 2))
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("archive", password="pw")
+        self.live = Goal.objects.create(user=self.user, title="Live")
+
+    def finished_goal(self, title, tasks=2, days=400):
+        goal = Goal.objects.create(user=self.user, title=title)
+        for i in range(tasks):
+            Task.objects.create(user=self.user, goal=goal, title=f"{title} {i}", is_done=i % 2 == 0)
+        Goal.objects.filter(pk=goal.pk).update(
+            status=Goal.Status.DONE, completed_at=timezone.now() - timedelta(days=days)
+        )
+        return goal
+
+    def test_batches_and_totals(self):
+        for n in range(3):
+            self.finished_goal(f"Old {n}")
+        self.finished_goal("Recent", days=1)
+        progress = []
+        self.assertEqual(archive.archive_completed_goals(size=2, max_batches=1, progress=lambda *a: progress.append(a)),
+                         (2, 4))
+        self.assertEqual(archive.archive_completed_goals(size=2, progress=lambda *a: progress.append(a)), (1, 2))
+        self.assertEqual(progress, [(2, 4), (1, 2)])
+        self.assertEqual(sorted(Goal.objects.values_list("title", flat=True)), ["Live", "Recent"])
+        self.assertEqual(ArchivedGoal.objects.count(), 3)
+        self.assertEqual(ArchivedTask.objects.count(), 6)
+        self.assertEqual(archive.totals(self.user), {"goals": 3, "tasks": 6, "tasks_completed": 3})
+        self.assertEqual(Tombstone.objects.filter(object_type="goal").count(), 3)
+        self.assertEqual(archive.archive_completed_goals(), (0, 0))  # nothing left: a no-op
+
+    def test_occurrence_moved_out_of_an_archived_goal(self):
+        old = self.finished_goal("Old", tasks=0)
+        template = Task.objects.create(user=self.user, goal=old, title="Repeat", recurrence="daily",
+                                       due_date=timezone.now().date())
+        occurrence = Task.objects.create(user=self.user, goal=old, title="Repeat (1)", recurs_from=template,
+                                         occurrence_date=timezone.now().date())
+        bulk.move_tasks(self.user, [occurrence.pk], self.live)
+        self.assertEqual(archive.archive_completed_goals(), (1, 1))
+        occurrence.refresh_from_db()
+        self.assertEqual((occurrence.goal_id, occurrence.recurs_from_id), (self.live.pk, None))
+
+    def test_archive_page_lists_own_goals_with_totals(self):
+        self.finished_goal("Mine")
+        other = get_user_model().objects.create_user("other", password="pw")
+        theirs = Goal.objects.create(user=other, title="Theirs")
+        Goal.objects.filter(pk=theirs.pk).update(status=Goal.Status.DONE, completed_at=timezone.now() - timedelta(days=400))
+        archive.archive_completed_goals()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("goals:archive"))
+        self.assertEqual([goal.title for goal in response.context["goals"]], ["Mine"])
+        self.assertEqual(response.context["totals"]["goals"], 1)
+        self.assertNotContains(response, "Theirs")
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("calendar", password="pw")
+        self.goal = Goal.objects.create(user=self.user, title="Run, far", deadline=timezone.localdate())
+        self.task = Task.objects.create(user=self.user, goal=self.goal, title="Shoes", due_date=timezone.localdate())
+
+    def get(self, token, **headers):
+        response = self.client.get(reverse("goals:calendar_feed", kwargs={"token": token}), headers=headers)
+        body = b"".join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        return response, body
+
+    def test_feed_lists_deadlines_and_due_dates(self):
+        Goal.objects.create(user=self.user, title="No deadline")
+        response, body = self.get(calendar.make_feed_token(self.user))
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+        self.assertIn(f"UID:goal-{self.goal.pk}@", body)
+        self.assertIn("SUMMARY:Run\\, far\r\n", body)
+        self.assertIn(f"UID:task-{self.task.pk}@", body)
+        self.assertIn("STATUS:NEEDS-ACTION\r\nEND:VTODO", body)
+        self.assertNotIn("No deadline", body)
+
+    def test_unchanged_feed_is_a_304(self):
+        token = calendar.make_feed_token(self.user)
+        response, _ = self.get(token)
+        etag = response["ETag"]
+        response, body = self.get(token, if_none_match=etag)
+        self.assertEqual((response.status_code, body), (304, ""))
+        self.task.title = "Running shoes"
+        self.task.save()
+        response, body = self.get(token, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Running shoes", body)
+
+    def test_bad_or_revoked_tokens_get_a_404_without_an_etag(self):
+        token = calendar.make_feed_token(self.user)
+        etag = self.get(token)[0]["ETag"]
+        other = get_user_model().objects.create_user("other", password="pw")
+        forged = token.replace(f"{self.user.pk}:", f"{other.pk}:", 1)
+        for bad in (forged, "1:nope:nope", calendar.make_feed_token(other) + "x"):
+            response = self.get(bad, if_none_match=etag)[0]
+            self.assertEqual(response.status_code, 404)
+            self.assertFalse(response.has_header("ETag"))
+
+        self.client.force_login(self.user)
+        self.client.post(reverse("goals:calendar_feed_rotate"))
+        self.assertEqual(self.get(token, if_none_match=etag)[0].status_code, 404)  # the leaked URL is dead
+        new = calendar.make_feed_token(self.user)
+        self.assertNotEqual(new, token)
+        self.assertEqual(self.get(new)[0].status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(new, if_none_match=etag)[0].status_code, 404)
+
+
+class BenchListMemoryTests(TestCase):
+    def run_bench(self, goals):
+        out = io.StringIO()
+        call_command("bench_list_memory", goals=goals, tasks=2, description_kb=4, stdout=out)
+        rows = {}
+        for line in out.getvalue().splitlines()[2:6]:
+            label, numbers = line[:28].strip(), line[28:].split()
+            rows[label] = dict(zip(("peak", "text", "queries"), map(int, numbers[:3])))
+        return rows
+
+    def test_previews_pull_less_text_in_constant_queries(self):
+        small, large = self.run_bench(3), self.run_bench(6)
+        self.assertLess(large["preview rows (after)"]["text"], large["full rows (before)"]["text"])
+        self.assertEqual(small["preview rows (after)"]["queries"], large["preview rows (after)"]["queries"])
+        self.assertEqual(small["GoalListView streamed"]["queries"], large["GoalListView streamed"]["queries"])
+        self.assertFalse(get_user_model().objects.filter(username__startswith="bench-").exists())  # rolled back
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user("staff", password="pw", is_staff=True)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def get(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse("goals:activity"), headers={"X-Profile": "1"})
+
+    def test_off_the_middleware_leaves_the_chain(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: None)
+        self.assertFalse(self.get(self.staff).has_header("X-Profile-Id"))
+
+    def test_only_staff_requests_are_profiled(self):
+        with self.settings(GOALS_PROFILER_ENABLED=True, GOALS_PROFILER_DIR=self.directory.name, GOALS_PROFILER_KEEP=1):
+            user = get_user_model().objects.create_user("user", password="pw")
+            self.assertFalse(self.get(user).has_header("X-Profile-Id"))
+            self.get(self.staff)
+            profile_id = self.get(self.staff)["X-Profile-Id"]
+        files = sorted(path.name for path in Path(self.directory.name).iterdir())
+        self.assertEqual(files, [f"{profile_id}.folded", f"{profile_id}.json"])  # the older one was rotated out
+        meta = json.loads((Path(self.directory.name) / f"{profile_id}.json").read_text())
+        self.assertEqual((meta["status"], meta["path"]), (200, reverse("goals:activity")))
+        self.assertEqual(meta["query_count"], len(meta["queries"]))
+        self.assertGreater(meta["query_count"], 0)
+
+
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source, self.root = Path(directory.name, "src"), Path(directory.name, "root")
+        (source / "css").mkdir(parents=True)
+        self.css = "body { color: #333; }\n" * 40
+        (source / "css" / "app.css").write_text(self.css)
+        (source / "logo.png").write_bytes(b"\x89PNG" + bytes(512))
+        overrides = self.settings(STATICFILES_DIRS=[source], STATIC_ROOT=self.root, ASSETS_SERVE=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.hashed = json.loads((self.root / "staticfiles.json").read_text())["paths"]["css/app.css"]
+
+    def get(self, name, **headers):
+        middleware = StaticAssetsMiddleware(lambda request: None)  # None: not a static asset
+        return middleware(RequestFactory().get(f"/static/{name}", headers=headers))
+
+    def test_collectstatic_writes_the_manifest_and_gzip_variants(self):
+        self.assertNotEqual(self.hashed, "css/app.css")
+        for name in (self.hashed, "css/app.css"):
+            self.assertEqual(gzip.decompress((self.root / f"{name}.gz").read_bytes()).decode(), self.css)
+        self.assertFalse(list(self.root.glob("logo*.gz")))  # not compressible
+
+    def test_only_hashed_names_are_immutable(self):
+        response = self.get(self.hashed, accept_encoding="gzip, br")
+        self.assertEqual(response["Cache-Control"], assets.IMMUTABLE)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode(), self.css)
+        response = self.get("css/app.css")
+        self.assertEqual(response["Cache-Control"], assets.REVALIDATE)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content).decode(), self.css)
+        self.assertIsNone(self.get("../settings.py"))  # passed on, never served
+
+
+class WarmupTests(TestCase):
+    def test_report_has_one_entry_per_step(self):
+        report = warmup.warm_up()
+        self.assertEqual([step["step"] for step in report], list(warmup.STEPS))
+        for step in report:
+            self.assertEqual(set(step), {"step", "ms", "modules", "detail"})
+            self.assertNotIn("failed:", step["detail"])
+        details = {step["step"]: step["detail"] for step in report}
+        # admin's app_list is a regex pattern the sample values don't fit
+        self.assertRegex(details["urls"], r"^[1-9]\d* named URLs reversed and resolved, 1 skipped$")
+        self.assertRegex(details["templates"], r"^[1-9]\d* templates compiled, 0 failed$")
+
+    def test_a_failing_step_is_reported_not_raised(self):
+        broken = mock.Mock(side_effect=RuntimeError("no database"))
+        with mock.patch.dict(warmup.STEPS, {"database": broken}), mock.patch.object(warmup.logger, "exception"):
+            report = warmup.warm_up(["database", "urls"])
+        self.assertEqual(report[0]["detail"], "failed: no database")
+        self.assertEqual(report[1]["step"], "urls")
+
+    def test_startup_hook_is_opt_in(self):
+        self.assertIsNone(warmup.on_startup(0.0, 0.5))
+        with self.settings(WARMUP_ON_STARTUP=True), self.assertLogs(warmup.logger, "INFO"):
+            report = warmup.on_startup(0.0, 0.5, ["urls"])
+        self.assertEqual([(step["step"], step["ms"]) for step in report][0], ("setup", 500.0))
+        self.assertEqual(report[1]["step"], "urls")
+
+    def test_command_prints_json(self):
+        out = io.StringIO()
+        call_command("warmup", "--step", "urls", "--json", stdout=out)
+        self.assertEqual([step["step"] for step in json.loads(out.getvalue())], ["urls"])
+
+
+class LoadTestReportTests(TestCase):
+    def test_percentiles(self):
+        samples = [(ms / 1000, ms != 100) for ms in range(1, 101)]
+        row = loadtest.summarize(samples, elapsed=2.0)
+        self.assertEqual((row["requests"], row["errors"], row["rps"]), (100, 1, 50.0))
+        self.assertEqual((row["p50_ms"], row["p90_ms"], row["p99_ms"], row["max_ms"]), (50.5, 90.1, 99.01, 100.0))
+        self.assertEqual(loadtest.summarize([], 1.0)["p95_ms"], 0.0)
+        self.assertEqual(loadtest.summarize([(0.25, True)], 1.0)["p99_ms"], 250.0)
+
+    def test_bad_mix_is_refused(self):
+        self.assertEqual(loadtest_command.parse_mix("list=3, detail=1"), {"list": 3, "detail": 1})
+        for bad in ("list=x", "unknown=1", "list=0"):
+            with self.assertRaises(CommandError):
+                loadtest_command.parse_mix(bad)
+
+    def test_report_layout_on_a_stubbed_run(self):
+        server = mock.Mock()
+        server.stdout.readline.return_value = json.dumps({"port": 8123, "accounts": []}) + "\n"
+        samples = {"GET goals:list": [(0.01, True), (0.03, True)], "POST users:login": [(0.02, False)]}
+        result = {
+            "elapsed_s": 1.0,
+            "totals": loadtest.summarize([s for rows in samples.values() for s in rows], 1.0),
+            "endpoints": {name: loadtest.summarize(rows, 1.0) for name, rows in samples.items()},
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output, baseline = Path(directory.name, "report.json"), Path(directory.name, "base.json")
+        baseline.write_text(json.dumps({"totals": {**result["totals"], "p95_ms": result["totals"]["p95_ms"] / 2}}))
+        out = io.StringIO()
+        with mock.patch.object(loadtest_command.subprocess, "Popen", return_value=server), \
+                mock.patch.object(loadtest, "run", return_value=result) as run:
+            call_command("loadtest", "--users", "2", "--duration", "1", "--mix", "list=1",
+                         "--output", str(output), "--baseline", str(baseline), stdout=out)
+        run.assert_called_once_with(8123, [], {"list": 1}, 1.0, 0.0, 1)
+        server.terminate.assert_called_once_with()
+
+        report = json.loads(output.read_text())
+        self.assertEqual(
+            list(report), ["format", "started_at", "config", "environment", "elapsed_s", "totals", "endpoints"]
+        )
+        self.assertEqual(report["format"], 1)
+        self.assertEqual(report["config"]["mix"], {"list": 1})
+        self.assertEqual(report["endpoints"]["POST users:login"]["errors"], 1)
+        total = next(line for line in out.getvalue().splitlines() if line.startswith("total"))
+        self.assertTrue(total.endswith("+100.0%"))  # p95 twice the baseline's
@@ -0,0 +1,95 @@
+"""
+Nested subtasks, stored as a materialized path.
+
+Task.path lists a task's ancestors, each id zero-padded to SEGMENT_WIDTH digits and
+followed by "/" ("0000000003/0000000017/" is a grandchild of task 3; top-level tasks
+have ""). Fixed-width segments keep every prefix unambiguous, so:
+- a subtree is one range scan on the path index: path LIKE '<prefix>%',
+- moving a branch rewrites all of its descendants in one UPDATE (prefix swap),
+- a goal's whole tree is one query, assembled in Python by build_tree().
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Concat, Length, Substr
+from django.utils import timezone
+
+SEGMENT_WIDTH = 10
+SEGMENT_LENGTH = SEGMENT_WIDTH + 1
+MAX_DEPTH = 20  # Task.path is a CharField(255): 23 segments at most
+
+
+def segment(pk):
+    return f"{pk:0{SEGMENT_WIDTH}d}/"
+
+
+def depth_of(path):
+    return len(path) // SEGMENT_LENGTH
+
+
+def subtree_prefix(task):
+    """Path prefix shared by every descendant of task."""
+    return task.path + segment(task.pk)
+
+
+def descendants(task):
+    from .models import Task
+    return Task.objects.filter(path__startswith=subtree_prefix(task))
+
+
+def under_any(prefixes):
+    """Q matching every task below any of the given subtree prefixes (one index range each)."""
+    query = Q(pk__in=[])
+    for prefix in prefixes:
+        query |= Q(path__startswith=prefix)
+    return query
+
+
+def descendant_counts(task):
+    """{"total", "done"} over the whole subtree below task, in one aggregate."""
+    return descendants(task).order_by().aggregate(
+        total=Count("pk"), done=Count("pk", filter=Q(is_done=True))
+    )
+
+
+def subtree_height(task):
+    """Levels below task (0 for a leaf)."""
+    longest = descendants(task).order_by().aggregate(n=Max(Length("path")))["n"]
+    return longest // SEGMENT_LENGTH - depth_of(task.path) if longest else 0
+
+
+def move_descendants(old_prefix, new_prefix, goal_id):
+    """Re-root every task under old_prefix at new_prefix (and goal_id) in one UPDATE."""
+    from .models import Task
+    return Task.objects.filter(path__startswith=old_prefix).update(
+        path=Concat(Value(new_prefix), Substr("path", len(old_prefix) + 1)),
+        goal_id=goal_id,
+        updated_at=timezone.now(),
+        version=F("version") + 1,
+    )
+
+
+def build_tree(tasks):
+    """
+    Arrange one goal's tasks depth-first, siblings by (rank, id).
+    Returns [{"task", "depth", "done_below", "total_below"}, ...] in display order.
+    """
+    present = {task.pk for task in tasks}
+    children = defaultdict(list)
+    for task in sorted(tasks, key=lambda t: (t.rank, t.pk)):
+        children[task.parent_id if task.parent_id in present else None].append(task)
+
+    rows = []
+
+    def walk(parent_id, depth):  # recursion is bounded by MAX_DEPTH
+        done = total = 0
+        for task in children[parent_id]:
+            row = {"task": task, "depth": depth}
+            rows.append(row)
+            row["done_below"], row["total_below"] = walk(task.pk, depth + 1)
+            done += row["done_below"] + task.is_done
+            total += row["total_below"] + 1
+        return done, total
+
+    walk(None, 0)
+    return rows
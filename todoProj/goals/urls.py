@@ -9,6 +9,8 @@ urlpatterns = [
     path("new/", views.GoalCreateView.as_view(), name="create_goal"),
     path("<int:pk>/", views.GoalDetailView.as_view(), name="goal_detail"),
     path("<int:pk>/edit/", views.GoalUpdateView.as_view(), name="goal_update"),
+    path("<int:pk>/card/", views.GoalCardView.as_view(), name="goal_card"),
+    path("bulk/status/", views.GoalBulkStatusView.as_view(), name="goal_bulk_status"),
    
     # tasks 
     path("tasks/new/<int:goal_id>/", views.TaskCreateView.as_view(), name="task_create"),
@@ -16,9 +18,19 @@ urlpatterns = [
     #path("tasks/new/<int:goal_id>/", views.TaskCreateView.as_view(), name="task_create"),
     
     path("tasks/<int:pk>/edit/", views.TaskUpdateView.as_view(), name="task_update"),
+    path("tasks/bulk/", views.TaskBulkView.as_view(), name="task_bulk"),
+    path("<int:goal_id>/tasks/reorder/", views.TaskReorderView.as_view(), name="task_reorder"),
     
     # --- Achievements ---
     path("achievements/", views.AchievementsView.as_view(), name="achievements"),
+    path("activity/", views.ActivityView.as_view(), name="activity"),
+    path("archive/", views.ArchiveView.as_view(), name="archive"),
+    path("events/", views.EventStreamView.as_view(), name="events"),
+    path("sync/", views.SyncView.as_view(), name="sync"),
+
+    # --- Calendar feed (token auth, polled by calendar apps) ---
+    path("calendar/<str:token>.ics", views.CalendarFeedView.as_view(), name="calendar_feed"),
+    path("calendar/rotate/", views.CalendarFeedRotateView.as_view(), name="calendar_feed_rotate"),
 ]
    
 
@@ -1,21 +1,63 @@
+import asyncio
+import json
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth import get_user_model
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.context import make_context
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView, CreateView, UpdateView #, DeleteView
 from django.views import View
+from django.views.decorators.http import condition
 from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Left
 from django.contrib import messages
-from .models import Goal, Task
-from .forms import GoalForm, TaskForm,  TaskInlineFormSet
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError
+from django.utils.http import url_has_allowed_host_and_scheme
+from . import archive, bulk, calendar, events, history, ordering, sync, tags, tree
+from .activity import log_activity, recent_activity
+from .models import ActivityLog, ArchivedGoal, EditConflict, Goal, Task
+from .forms import GoalForm, TaskForm,  TaskInlineFormSet, BulkTaskActionForm, BulkGoalStatusForm, TagFilterForm
 
 # -------- Mixins --------
+@lru_cache(maxsize=None)
+def has_user_field(model):
+    # the model's fields never change at runtime, so scan them once per model
+    return any(f.name == "user" for f in model._meta.fields)
+
+
 class OwnerQuerysetMixin(LoginRequiredMixin):
-    """Limit queryset to current user's objects (for models that have a 'user' FK)."""
+    """
+    Limit queryset to current user's objects (for models that have a 'user' FK).
+    get_object() is memoized on the view instance (i.e. per request), so test_func,
+    UpdateView.get/post and the delete branches all share one query.
+    """
+    select_related = ()  # e.g. ("goal",) when the view reads object.goal
+
     def get_queryset(self):
         qs = super().get_queryset()
-        has_user_field = any(f.name == "user" for f in self.model._meta.fields)
-        return qs.filter(user=self.request.user) if has_user_field else qs
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        return qs.filter(user=self.request.user) if has_user_field(self.model) else qs
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_object_cache"):
+            self._object_cache = super().get_object()
+        return self._object_cache
 
 class TaskOwnerRequiredMixin(UserPassesTestMixin):
     """Deny access if the object is not owned by the current user."""
@@ -24,23 +66,158 @@ class TaskOwnerRequiredMixin(UserPassesTestMixin):
         return obj.user_id == self.request.user.id
 
 
+class EditConflictMixin:
+    """
+    Handle EditConflict (someone saved the row after this user opened the form):
+    show the user's input next to the latest saved values, with the form re-based
+    on the latest version, so submitting again is a conscious overwrite.
+    """
+    def edit_conflict(self, form):
+        current = self.get_queryset().filter(pk=self.object.pk).first()
+        if current is None:
+            messages.error(self.request, "This item was deleted by someone else.")
+            return redirect("goals:list")
+
+        data = self.request.POST.copy()
+        data["version"] = current.version
+        kwargs = self.get_form_kwargs()
+        kwargs.update(data=data, instance=current)
+        merged = self.get_form_class()(**kwargs)
+
+        conflicts = []
+        for name, field in form.fields.items():
+            if name == "version" or name not in form._meta.fields:  # e.g. tag_names
+                continue
+            mine, theirs = form.cleaned_data.get(name), getattr(current, name)
+            if mine != theirs:
+                conflicts.append({"label": field.label, "mine": mine, "theirs": theirs})
+
+        self.object = current
+        messages.warning(self.request, "Someone else changed this while you were editing. Review and save again.")
+        return self.render_to_response(self.get_context_data(form=merged, conflicts=conflicts))
+
+
+class GoalCardsMixin:
+    """
+    Querysets for goal cards (_goal_card.html). The description comes back as a SQL-side
+    prefix (description_preview) instead of the whole TextField, and the goals' tasks as
+    goal.task_rows: .values() dicts from one query for every goal on the page, without
+    model instances or task descriptions.
+    """
+    preview_chars = 300  # plenty for the card's truncatewords:15
+    task_columns = ("goal_id", "title", "is_done", "due_date")
+
+    def get_queryset(self):
+        return (
+            super().get_queryset()
+            .defer("description")
+            .annotate(description_preview=Left("description", self.preview_chars))
+            .prefetch_related("tags")
+        )
+
+    def attach_task_rows(self, goals):
+        rows = defaultdict(list)
+        for row in Task.objects.filter(goal_id__in=[goal.pk for goal in goals]).values(*self.task_columns):
+            rows[row["goal_id"]].append(row)
+        for goal in goals:
+            goal.task_rows = rows[goal.pk]
+        return goals
+
+
+async def iterate_in_thread(iterator):
+    """A sync iterator as an async one; every step runs on the request's sync thread, where its cursor lives."""
+    step, done = sync_to_async(next), object()
+    while (item := await step(iterator, done)) is not done:
+        yield item
+
+
 # -------- GOALS --------
-class GoalListView(OwnerQuerysetMixin, ListView):
+class GoalListView(OwnerQuerysetMixin, GoalCardsMixin, ListView):
+    """
+    With GOALS_LIST_STREAMING the page is streamed: the header (counts come from one
+    aggregate) goes out first, then the cards, stream_chunk_size goals at a time from a
+    server-side iterator, so the first byte and the memory held don't grow with the
+    number of goals. Under ASGI the chunks are handed over as an async iterator, since
+    Django buffers a sync one whole before sending it there.
+    """
     model = Goal
     template_name = "goals/goals_list.html"
     context_object_name = "goals"
+    stream_chunk_size = 50
+    cards_marker = "<!-- goal cards -->"
+
+    @property
+    def streaming(self):
+        return getattr(settings, "GOALS_LIST_STREAMING", False)
+
+    def get_queryset(self):
+        self.tag_filter = TagFilterForm(self.request.GET or None)
+        qs = super().get_queryset()
+        return tags.filter_queryset(qs, self.request.user.pk, "goal", **self.tag_filter.spec())
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         goals_qs = ctx["goals"]
+        if self.streaming:
+            counts = goals_qs.order_by().aggregate(
+                total=Count("pk"),
+                completed=Count("pk", filter=Q(status="done")),
+                in_progress=Count("pk", filter=Q(status="in_progress")),
+            )
+            ctx.update({
+                "cards_marker": self.cards_marker,  # render_to_response splits the page here
+                "total_goals": counts["total"],
+                "completed_goals": counts["completed"],
+                "in_progress_goals": counts["in_progress"],
+            })
+        else:
+            ctx["goals"] = self.attach_task_rows(list(goals_qs))
+            ctx.update({
+                "total_goals": len(ctx["goals"]),
+                "completed_goals": goals_qs.filter(status="done").count(),
+                "in_progress_goals": goals_qs.filter(status="in_progress").count(),
+            })
         ctx.update({
+            "tag_filter": self.tag_filter,
+            "tag_names": tags.tag_names(self.request.user.pk),
             "today": timezone.now().date(),
-            "total_goals": goals_qs.count(),
-            "completed_goals": goals_qs.filter(status="done").count(),
-            "in_progress_goals": goals_qs.filter(status="in_progress").count(),
+            "status_choices": Goal.Status.choices,
+            "calendar_feed_url": self.request.build_absolute_uri(
+                reverse("goals:calendar_feed", kwargs={"token": calendar.make_feed_token(self.request.user)})
+            ),
         })
         return ctx
 
+    def render_to_response(self, context, **response_kwargs):
+        if not self.streaming:
+            return super().render_to_response(context, **response_kwargs)
+        # header and footer are rendered now, so CSRF cookies and messages are handled as usual
+        page = render_to_string(self.get_template_names(), context, self.request)
+        head, tail = page.split(self.cards_marker, 1)
+        parts = chain([head], self.stream_cards(context["goals"], context), [tail])
+        if isinstance(self.request, ASGIRequest):
+            parts = iterate_in_thread(parts)
+        return StreamingHttpResponse(parts)
+
+    def stream_cards(self, goals_qs, context):
+        card = get_template("goals/_goal_card.html").template
+        context = make_context(context, self.request)
+        goals = goals_qs.iterator(chunk_size=self.stream_chunk_size)  # tags are prefetched per chunk
+        empty = True
+        with context.bind_template(card):  # context processors run once, not once per card
+            while chunk := list(islice(goals, self.stream_chunk_size)):
+                empty = False
+                parts = []
+                for goal in self.attach_task_rows(chunk):
+                    with context.push(goal=goal):
+                        parts.append(card.render(context))
+                    # the prefetched tags point back at their goal; without that cycle the chunk is
+                    # freed right away instead of piling up until a full garbage collection
+                    goal._prefetched_objects_cache.clear()
+                yield "".join(parts)
+        if empty:
+            yield "<p>No goals yet. Create your first goal!</p>"
+
 
 class GoalDetailView(OwnerQuerysetMixin, DetailView):
     model = Goal
@@ -51,16 +228,38 @@ class GoalDetailView(OwnerQuerysetMixin, DetailView):
         ctx = super().get_context_data(**kwargs)
         goal = ctx["goal"]
         
-        tasks = goal.tasks.all()
+        # the whole task tree in one query; nesting and counts are worked out in memory
+        tasks = list(goal.tasks.defer("description").prefetch_related("tags"))  # descriptions aren't shown here
+        task_tree = tree.build_tree(tasks)
+        tag_filter = TagFilterForm(self.request.GET or None)
+        if tag_filter.is_active():
+            resolved = tags.resolve(self.request.user.pk, "task", **tag_filter.spec())
+            task_tree = [row for row in task_tree if tags.matches(resolved, row["task"].pk)]
         ctx.update({
             "tasks": tasks,
-            "completed_tasks": tasks.filter(is_done=True).count(),
-            "pending_tasks": tasks.filter(is_done=False),
-            "total_tasks": tasks.count(),
+            "task_tree": task_tree,
+            "tag_filter": tag_filter,
+            "bulk_form": BulkTaskActionForm(user=self.request.user),
+            "completed_tasks": sum(task.is_done for task in tasks),
+            "pending_tasks": [task for task in tasks if not task.is_done],
+            "total_tasks": len(tasks),
             "today": timezone.now().date(),
         })
         return ctx
 
+class GoalCardView(OwnerQuerysetMixin, GoalCardsMixin, DetailView):
+    """One goal card of the list page, re-fetched by the live-update script on a change event."""
+    model = Goal
+    template_name = "goals/_goal_card.html"
+    context_object_name = "goal"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        self.attach_task_rows([ctx["goal"]])
+        ctx["today"] = timezone.now().date()
+        return ctx
+
+
 class GoalCreateView(LoginRequiredMixin, CreateView):
     model = Goal
     form_class = GoalForm
@@ -110,13 +309,17 @@ class GoalCreateView(LoginRequiredMixin, CreateView):
             except IntegrityError:
                 form.add_error("title", "You already have a goal with this title.")
                 return self.form_invalid(form)
+            form.save_m2m()  # tags
 
             # Build the formset bound to the just-saved Goal
             task_formset = TaskInlineFormSet(self.request.POST, instance=obj)
 
             if task_formset.is_valid():
+                for task_form in task_formset.forms:
+                    task_form.instance.user = self.request.user  # like TaskForm.save(), tasks carry their owner
                 task_formset.save()
                 self.object = obj
+                log_activity(obj.user_id, ActivityLog.Action.CREATED, "goal", obj.pk, obj.title)
                 messages.success(self.request, "Goal created successfully.")
                 return redirect(self.get_success_url())
             else:
@@ -129,7 +332,7 @@ class GoalCreateView(LoginRequiredMixin, CreateView):
         return reverse("goals:goal_detail", kwargs={"pk": self.object.pk})
 
 
-class GoalUpdateView(OwnerQuerysetMixin, UpdateView):
+class GoalUpdateView(OwnerQuerysetMixin, EditConflictMixin, UpdateView):
     model = Goal
     form_class = GoalForm 
     #fields = ["title", "description", "status", "deadline"]
@@ -143,8 +346,9 @@ class GoalUpdateView(OwnerQuerysetMixin, UpdateView):
     def post(self, request, *args, **kwargs):
         if "delete" in request.POST:
             self.object = self.get_object()  # repect the OwnerQuerysetMixin
-            title = self.object.title
+            title, pk = self.object.title, self.object.pk
             self.object.delete()  # CASCADE
+            log_activity(request.user.id, ActivityLog.Action.DELETED, "goal", pk, title)  # only once it's gone
             messages.success(request, f"Goal “{title}” deleted successfully.")
             return redirect("goals:list")  
         return super().post(request, *args, **kwargs)
@@ -161,9 +365,13 @@ class GoalUpdateView(OwnerQuerysetMixin, UpdateView):
         except IntegrityError:
             form.add_error("title", "You already have a goal with this title.")
             return self.form_invalid(form)
+        except EditConflict:
+            return self.edit_conflict(form)
+        form.save_m2m()  # tags
         self.object = obj
+        log_activity(obj.user_id, ActivityLog.Action.UPDATED, "goal", obj.pk, obj.title)
         messages.success(self.request, "Goal updated successfully.")
-        return super().form_valid(form)
+        return redirect(self.get_success_url())  # already saved; super().form_valid() would save again
 
     def get_success_url(self):
         return reverse("goals:goal_detail", kwargs={"pk": self.object.pk})
@@ -184,16 +392,22 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         kwargs["goal"] = self.get_goal()   # 
         return kwargs
 
+    def get_initial(self):
+        # "Add subtask" links pass ?parent=<task id>
+        return {**super().get_initial(), "parent": self.request.GET.get("parent")}
+
     def form_valid(self, form):
-        # 
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        log_activity(self.request.user.id, ActivityLog.Action.CREATED, "task", self.object.pk, self.object.title)
+        return response
 
     def get_success_url(self):
         return reverse("goals:goal_detail", kwargs={"pk": self.object.goal_id})
 
 
-class TaskUpdateView(OwnerQuerysetMixin, TaskOwnerRequiredMixin, UpdateView):
+class TaskUpdateView(OwnerQuerysetMixin, TaskOwnerRequiredMixin, EditConflictMixin, UpdateView):
     model = Task
+    select_related = ("goal",)  # the form's deadline rule and the template both read task.goal
     form_class = TaskForm #I add it now to test the Form.py 
     #fields = ["goal", "title", "description", "due_date", "is_done"]
     template_name = "goals/form.html"
@@ -216,18 +430,97 @@ class TaskUpdateView(OwnerQuerysetMixin, TaskOwnerRequiredMixin, UpdateView):
         if "delete" in request.POST:
             self.object = self.get_object()
             goal_id = self.object.goal_id  # لتوجيه المستخدم بعد الحذف
-            title = self.object.title
+            title, pk = self.object.title, self.object.pk
             self.object.delete()
+            log_activity(request.user.id, ActivityLog.Action.DELETED, "task", pk, title)
             messages.success(request, f"Task “{title}” deleted successfully.")
             return redirect("goals:goal_detail", pk=goal_id)
         # 
         return super().post(request, *args, **kwargs)
 
+    def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except EditConflict:
+            return self.edit_conflict(form)
+        log_activity(self.request.user.id, ActivityLog.Action.UPDATED, "task", self.object.pk, self.object.title)
+        return response
+
     def get_success_url(self):
         # After updating a task, go back to its goal page
         return reverse("goals:goal_detail", kwargs={"pk": self.object.goal_id})
 
 
+class TaskReorderView(LoginRequiredMixin, View):
+    """POST {"moves": [{"task": id, "after": id | null}, ...]} -> applies every move in one transaction."""
+    http_method_names = ["post"]
+    raise_exception = True
+
+    def post(self, request, goal_id):
+        try:
+            moves = json.loads(request.body or b"{}").get("moves", [])
+            if not isinstance(moves, list):
+                raise ValueError
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "Expected a JSON object with a moves list."}, status=400)
+        try:
+            ranks = ordering.apply_moves(request.user, goal_id, moves)
+        except ordering.MoveError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse({"ranks": ranks})
+
+
+# -------- BULK ACTIONS --------
+class BulkActionView(LoginRequiredMixin, View):
+    """POST-only; applies one set-based action and redirects back to the page it came from."""
+    http_method_names = ["post"]
+
+    def redirect_back(self):
+        nxt = self.request.POST.get("next")
+        if nxt and url_has_allowed_host_and_scheme(nxt, allowed_hosts={self.request.get_host()}):
+            return redirect(nxt)
+        return redirect("goals:list")
+
+    def report_errors(self, form):
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(self.request, error)
+
+
+class TaskBulkView(BulkActionView):
+    def post(self, request):
+        form = BulkTaskActionForm(request.POST, user=request.user)
+        if not form.is_valid():
+            self.report_errors(form)
+            return self.redirect_back()
+
+        action, ids = form.cleaned_data["action"], form.cleaned_data["task_ids"]
+        try:
+            if action == "move":
+                count = bulk.move_tasks(request.user, ids, form.cleaned_data["goal"])
+            else:
+                count = bulk.set_tasks_done(request.user, ids, is_done=(action == "done"))
+        except ValidationError as e:
+            for error in e.messages:
+                messages.error(request, error)
+            return self.redirect_back()
+
+        messages.success(request, f"{count} task(s) updated.")
+        return self.redirect_back()
+
+
+class GoalBulkStatusView(BulkActionView):
+    def post(self, request):
+        form = BulkGoalStatusForm(request.POST)
+        if not form.is_valid():
+            self.report_errors(form)
+            return self.redirect_back()
+
+        count = bulk.set_goals_status(request.user, form.cleaned_data["goal_ids"], form.cleaned_data["status"])
+        messages.success(request, f"{count} goal(s) updated.")
+        return self.redirect_back()
+
+
 # -------- ACHIEVEMENTS --------
 
 class AchievementsView(LoginRequiredMixin, View):
@@ -235,7 +528,7 @@ class AchievementsView(LoginRequiredMixin, View):
 
     def get(self, request):
         user = request.user
-        user_tasks = Task.objects.filter(user=user) if any(f.name == "user" for f in Task._meta.fields) else Task.objects.filter(goal__user=user)
+        user_tasks = Task.objects.filter(user=user) if has_user_field(Task) else Task.objects.filter(goal__user=user)
         
         total_tasks = user_tasks.count()
         completed_tasks = user_tasks.filter(is_done=True).count()
@@ -245,6 +538,13 @@ class AchievementsView(LoginRequiredMixin, View):
         total_goals = user_goals.count()
         completed_goals = user_goals.filter(status="done").count()
 
+        # archived goals (all DONE) and their tasks left the live tables but still count
+        archived = archive.totals(user)
+        total_goals += archived["goals"]
+        completed_goals += archived["goals"]
+        total_tasks += archived["tasks"]
+        completed_tasks += archived["tasks_completed"]
+
         context = {
             "today": timezone.now().date(),
             "total_goals": total_goals,
@@ -252,8 +552,147 @@ class AchievementsView(LoginRequiredMixin, View):
             "total_tasks": total_tasks,
             "completed_tasks": completed_tasks,
         }
+        trends = history.trends(user, context["today"])
+        context["trend_sections"] = [
+            ("Tasks completed per day (last 30 days)", trends["tasks_per_day"]),
+            ("Tasks completed per week", trends["tasks_per_week"]),
+            ("Goals finished per month", trends["goals_per_month"]),
+        ]
         return render(request, self.template_name, context)
-    
+
+
+# -------- ARCHIVE --------
+class ArchiveView(OwnerQuerysetMixin, ListView):
+    """Read-only list of the user's archived goals (see archive.py), newest completion first."""
+    model = ArchivedGoal
+    template_name = "goals/archive.html"
+    context_object_name = "goals"
+    paginate_by = 20
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("tasks")
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        for goal in ctx["goals"]:
+            goal.task_tree = tree.build_tree(list(goal.tasks.all()))
+        ctx["totals"] = archive.totals(self.request.user)
+        return ctx
+
+
+# -------- ACTIVITY --------
+
+class ActivityView(LoginRequiredMixin, View):
+    template_name = "goals/activity.html"
+
+    def get(self, request):
+        return render(request, self.template_name, {"entries": recent_activity(request.user)})
+
+
+# -------- LIVE UPDATES (SSE) --------
+
+class EventStreamView(View):
+    """
+    Server-Sent Events stream of the user's goal/task changes. Async so that an idle
+    connection is a parked coroutine instead of a worker thread; needs an ASGI server
+    (e.g. `uvicorn todoProj.asgi:application`).
+    """
+    http_method_names = ["get"]
+    heartbeat = 15  # seconds; keeps proxies from closing idle connections
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse("Live updates need the ASGI server.", status=503)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponseForbidden()
+        response = StreamingHttpResponse(self.stream(user.pk), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+        return response
+
+    async def stream(self, user_id):
+        subscription = events.broker.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            events.broker.unsubscribe(subscription)
+
+
+# -------- DELTA SYNC --------
+
+class SyncView(LoginRequiredMixin, View):
+    """
+    GET  ?watermark=...  -> changed goals/tasks + tombstones since the watermark, and a new watermark.
+    POST {"mutations": [...]} -> applies the client's batch in one transaction.
+    """
+    raise_exception = True  # API clients want a 403, not a redirect to the login page
+
+    def get(self, request):
+        try:
+            return JsonResponse(sync.pull(request.user, request.GET.get("watermark")))
+        except sync.SyncError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    def post(self, request):
+        try:
+            body = json.loads(request.body or b"{}")
+            mutations = body.get("mutations", [])
+            if not isinstance(mutations, list):
+                raise ValueError
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "Expected a JSON object with a mutations list."}, status=400)
+        try:
+            results = sync.push(request.user, mutations)
+        except sync.SyncError as e:
+            return JsonResponse({"error": str(e), "fields": e.errors}, status=400)
+        return JsonResponse({"results": results})
+
+
+# -------- CALENDAR FEED --------
+
+class CalendarFeedView(View):
+    """Token-authenticated .ics feed; calendar clients can't log in, so no LoginRequiredMixin."""
+
+    def get(self, request, token):
+        # before any ETag is computed: a bad or revoked token gets a 404, never a 304
+        user_id = calendar.feed_user_id(token)
+        if user_id is None:
+            raise Http404("Unknown calendar feed")
+        return self.feed(request, user_id)
+
+    # a matching If-None-Match ends here with a 304
+    @method_decorator(condition(etag_func=lambda request, user_id: calendar.compute_etag(user_id)))
+    def feed(self, request, user_id):
+        host = request.get_host()
+        if calendar.cache_enabled():
+            blob = calendar.cached_feed(user_id, host)
+            response = HttpResponse(blob["body"], content_type="text/calendar; charset=utf-8")
+        else:
+            response = StreamingHttpResponse(
+                calendar.iter_feed(user_id, host), content_type="text/calendar; charset=utf-8"
+            )
+        response["Content-Disposition"] = 'inline; filename="goals.ics"'
+        response["Cache-Control"] = "private, no-cache"  # always revalidate, the ETag makes that cheap
+        return response
+
+
+class CalendarFeedRotateView(LoginRequiredMixin, View):
+    """POST-only; revokes the current feed URL (e.g. after it leaked) and shows the new one on the list."""
+    http_method_names = ["post"]
+
+    def post(self, request):
+        calendar.rotate_feed_token(request.user)
+        messages.success(request, "New calendar feed URL created; the old one no longer works.")
+        return redirect("goals:list")
+
 
 
 # class GoalCreateView(LoginRequiredMixin, CreateView):
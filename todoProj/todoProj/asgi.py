@@ -3,14 +3,27 @@ ASGI config for todoProj project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the app through this module (e.g. ``uvicorn todoProj.asgi:application``) for
+the live-update stream at ``goals:events``: its connections are held by parked
+coroutines rather than worker threads.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
+
+boot_started = time.perf_counter()
 
-from django.core.asgi import get_asgi_application
+from django.core.asgi import get_asgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todoProj.settings')
 
 application = get_asgi_application()
+
+# WARMUP_ON_STARTUP (see wsgi.py). No database step: sync views run on an executor thread,
+# which would not reuse a connection opened on this one
+from todoProj.warmup import on_startup  # noqa: E402
+
+on_startup(boot_started, time.perf_counter(), steps=["imports", "urls", "templates", "caches"])
@@ -0,0 +1,118 @@
+"""
+Static assets: content-hashed names, gzip variants built by collectstatic, and
+far-future caching.
+
+CompressedManifestStaticFilesStorage (STORAGES["staticfiles"]) is Django's
+ManifestStaticFilesStorage: collectstatic copies every asset to STATIC_ROOT under a
+name that contains a hash of its content (css/styles.3f2a9c1b7d4e.css), rewrites
+url() references inside CSS, and records name -> hashed name in staticfiles.json.
+The storage loads that manifest once per process, so {% static %} is a dict lookup.
+On top of that it writes a .gz next to every compressible file, once at build time.
+
+StaticAssetsMiddleware serves STATIC_ROOT when no web server in front does it
+(ASSETS_SERVE). Hashed files never change under the same name, so they are sent with
+"Cache-Control: immutable" and a one-year max-age; browsers stop revalidating them.
+Clients that accept gzip get the prebuilt .gz. With nginx or a CDN in front, turn
+ASSETS_SERVE off and point it at STATIC_ROOT (gzip_static on; expires max).
+"""
+import gzip
+import mimetypes
+import os
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico"}
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=60"  # names without a hash can change under the same URL
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # the originals are kept next to the hashed copies; both can be requested
+        for name in {*paths, *self.hashed_files.values()}:
+            self.compress(name)
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+            return
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        packed = gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0: same input, same bytes
+        if len(packed) >= len(data) * 0.95:
+            return
+        target = f"{name}.gz"
+        if self.exists(target):
+            self.delete(target)
+        self._save(target, ContentFile(packed))
+
+
+Asset = namedtuple("Asset", "path gzip_path immutable mtime")
+
+
+class StaticAssetsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "ASSETS_SERVE", False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = os.fspath(settings.STATIC_ROOT)
+        # hashed names straight from the in-memory manifest
+        self.hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        self.assets = {}
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefix):
+            asset = self.find(request.path_info[len(self.prefix):])
+            if asset is not None:
+                return self.serve(request, asset)
+        return self.get_response(request)
+
+    def find(self, name):
+        asset = self.assets.get(name)
+        if asset is None:
+            try:
+                path = safe_join(self.root, name)
+            except SuspiciousFileOperation:
+                return None
+            if not os.path.isfile(path):
+                return None  # misses are not remembered: the dict stays as small as STATIC_ROOT
+            gzip_path = f"{path}.gz"
+            asset = self.assets[name] = Asset(
+                path=path,
+                gzip_path=gzip_path if os.path.isfile(gzip_path) else None,
+                immutable=name in self.hashed,
+                mtime=os.stat(path).st_mtime,
+            )
+        return asset
+
+    def serve(self, request, asset):
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), asset.mtime):
+            response = HttpResponseNotModified()
+        else:
+            use_gzip = asset.gzip_path is not None and "gzip" in request.headers.get("Accept-Encoding", "")
+            content_type, _ = mimetypes.guess_type(asset.path)
+            response = FileResponse(
+                open(asset.gzip_path if use_gzip else asset.path, "rb"),
+                content_type=content_type or "application/octet-stream",
+            )
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+            response["Last-Modified"] = http_date(asset.mtime)
+        if asset.gzip_path is not None:
+            response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = IMMUTABLE if asset.immutable else REVALIDATE
+        return response
@@ -0,0 +1,94 @@
+"""
+gzip for HTML, JSON and streamed responses.
+
+StreamingGZipMiddleware is Django's GZipMiddleware (Accept-Encoding negotiation,
+Vary, weak ETags, the BREACH padding in the gzip header) with one change for
+streaming responses: the compressor is flushed (Z_SYNC_FLUSH) after the first chunk
+and then whenever FLUSH_BYTES of input have gone in. A plain gzip stream holds
+output back until zlib's buffer fills, which would hold back the streamed goal
+list's header (see GoalListView) and undo the point of streaming it; flushing on
+every small chunk (the calendar feed yields line by line) would ruin the ratio.
+
+Async streams (the goal list under ASGI) get the same treatment through
+acompress_stream(); Django's own GZipMiddleware would make every chunk a gzip
+member of its own.
+
+Server-sent events (the live-update stream) are left uncompressed: each event has
+to reach the browser the moment it is written.
+"""
+import zlib
+from gzip import GzipFile
+
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer, _get_random_filename
+
+FLUSH_BYTES = 16 * 1024
+
+
+class _FlushingGzip:
+    """One gzip stream fed chunk by chunk; feed() returns whatever output is ready."""
+
+    def __init__(self, max_random_bytes=None, flush_bytes=FLUSH_BYTES):
+        self.buf = StreamingBuffer()
+        filename = _get_random_filename(max_random_bytes) if max_random_bytes else None
+        self.zfile = GzipFile(filename=filename, mode="wb", compresslevel=6, fileobj=self.buf, mtime=0)
+        self.flush_bytes = flush_bytes
+        self.pending, self.flushed_once = 0, False
+
+    def header(self):
+        return self.buf.read()
+
+    def feed(self, item):
+        self.zfile.write(item)
+        self.pending += len(item)
+        if self.pending and (not self.flushed_once or self.pending >= self.flush_bytes):
+            self.zfile.flush(zlib.Z_SYNC_FLUSH)
+            self.pending, self.flushed_once = 0, True
+        return self.buf.read()
+
+    def close(self):
+        self.zfile.close()
+        return self.buf.read()
+
+
+def compress_stream(sequence, max_random_bytes=None, flush_bytes=FLUSH_BYTES):
+    gzip = _FlushingGzip(max_random_bytes, flush_bytes)
+    yield gzip.header()
+    for item in sequence:
+        if data := gzip.feed(item):
+            yield data
+    yield gzip.close()
+
+
+async def acompress_stream(sequence, max_random_bytes=None, flush_bytes=FLUSH_BYTES):
+    gzip = _FlushingGzip(max_random_bytes, flush_bytes)
+    yield gzip.header()
+    async for item in sequence:
+        if data := gzip.feed(item):
+            yield data
+    yield gzip.close()
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+        if not response.streaming:
+            return super().process_response(request, response)
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not re_accepts_gzip.search(request.headers.get("Accept-Encoding", "")):
+            return response
+
+        compress = acompress_stream if response.is_async else compress_stream
+        response.streaming_content = compress(response.streaming_content, self.max_random_bytes)
+        # the length and a strong ETag described the uncompressed body
+        del response.headers["Content-Length"]
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "gzip"
+        return response
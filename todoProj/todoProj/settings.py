@@ -43,10 +43,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'todoProj.assets.StaticAssetsMiddleware',  # removes itself unless ASSETS_SERVE
+    'todoProj.compression.StreamingGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'goals.profiling.ProfilingMiddleware',  # removes itself unless GOALS_PROFILER_ENABLED
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,6 +91,9 @@ DATABASES = {
         'PASSWORD': '1234Host',
         'HOST': '127.0.0.1',
         'PORT': '3306',
+        # keep connections across requests (the warm-up opens the first one at boot)
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
         # 'OPTIONS': {
         #     'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         #     'charset': 'utf8mb4',
@@ -134,6 +140,15 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS =[
     os.path.join(BASE_DIR,'static')
 ]
+# `manage.py collectstatic` writes content-hashed copies, their .gz variants and the
+# staticfiles.json manifest here (see todoProj/assets.py). Run it before starting with DEBUG = False.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'todoProj.assets.CompressedManifestStaticFilesStorage'},
+}
+# serve STATIC_ROOT from Django with immutable caching; turn off when nginx / a CDN serves it
+ASSETS_SERVE = True
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -143,3 +158,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = "/users/login/"
 LOGIN_REDIRECT_URL = "/goals/"
 LOGOUT_REDIRECT_URL = "/"
+
+# goals: cache the rendered .ics feed per user (rebuilt on change) instead of streaming it from the DB each time
+GOALS_CALENDAR_CACHE = False
+
+# goals: activity log entries are buffered in-process and written with one bulk_create
+# when this many are pending, or when the oldest is this many seconds old
+GOALS_ACTIVITY_BUFFER_SIZE = 100
+GOALS_ACTIVITY_FLUSH_SECONDS = 5.0
+
+# goals: live updates. With several server processes, turn the bridge on so every process
+# picks up changes made elsewhere by polling the LiveEvent outbox. Each poll re-reads this many seconds
+# of it, so a change committed up to that long after it was written still goes out: keep it above the
+# longest write transaction
+GOALS_EVENTS_DB_BRIDGE = False
+GOALS_EVENTS_POLL_SECONDS = 2.0
+GOALS_EVENTS_BRIDGE_LAG_SECONDS = 30
+
+# goals: delta sync keeps deletion tombstones this long; older watermarks must do a full resync
+GOALS_SYNC_TOMBSTONE_DAYS = 30
+# goals: each pull re-reads rows this many seconds old, so a row whose updated_at was set before a
+# pull but whose transaction committed after it still reaches the client. Keep it above the longest
+# write transaction (a sync push, a bulk move, the recurrence scheduler)
+GOALS_SYNC_LAG_SECONDS = 30
+
+# goals: stream the goal list (header first, then the cards in chunks) instead of building the whole
+# page in memory; worth it for accounts with hundreds of goals
+GOALS_LIST_STREAMING = False
+
+# goals: `manage.py archive_goals` moves DONE goals finished this many days ago (and their tasks)
+# to the archive tables, this many goals per transaction
+GOALS_ARCHIVE_AFTER_DAYS = 180
+GOALS_ARCHIVE_BATCH_SIZE = 200
+
+# goals: `manage.py schedule_recurring_tasks` creates repeating tasks' occurrences this many days ahead
+GOALS_RECURRENCE_HORIZON_DAYS = 14
+
+# goals: staff-only request profiler (see goals/profiling.py). Send "X-Profile: 1" or set a
+# sample rate; stack samples (.folded, for flame graphs) and the query log go to the directory
+GOALS_PROFILER_ENABLED = False
+GOALS_PROFILER_SAMPLE_RATE = 0.0
+GOALS_PROFILER_DIR = BASE_DIR / "profiles"
+GOALS_PROFILER_KEEP = 50
+
+# users: with REDIS_URL set (e.g. "redis://127.0.0.1:6379/1", needs the redis package) every worker
+# shares one cache: sessions are read from it and only written through to the DB, and the logged-in
+# user is cached for USERS_AUTH_CACHE_TIMEOUT seconds (0 = a query per request, see users/auth.py).
+# Without it: the per-process default cache, DB sessions and one user query per request, as before.
+# Caching users or sessions in a per-process cache fails check users.E001 outside DEBUG: a logout,
+# password change or deactivation would only reach the worker that handled it
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    AUTHENTICATION_BACKENDS = [
+        "users.auth.CachedModelBackend",
+        # sessions from before the cached backend name this one; drop it once they have expired
+        # (SESSION_COOKIE_AGE, two weeks after the deploy)
+        "django.contrib.auth.backends.ModelBackend",
+    ]
+USERS_AUTH_CACHE_TIMEOUT = 60
+
+# worker warm-up (see todoProj/warmup.py): wsgi.py / asgi.py compile the templates, build the URL
+# resolvers, connect to the database and prime caches at boot, and log how long each step took
+WARMUP_ON_STARTUP = False
+
+# users: `manage.py purge_deleted_accounts` removes deleted accounts' data this many rows per transaction
+USERS_PURGE_BATCH_SIZE = 1000
@@ -0,0 +1,175 @@
+"""
+Worker warm-up: pay the first-request costs at boot instead of on a user's request.
+
+A fresh worker lazily imports the views, builds the URL resolvers, compiles every
+template it renders, loads translation catalogs and the ContentType cache, and
+connects to the database, all on its first requests (the p99 spikes after a
+deploy or a scale-out). warm_up() does that work up front and reports what each
+step cost, including how many modules it had to import, so startup regressions
+show up as numbers:
+
+- imports: every installed app's views / forms / urls / admin modules,
+- urls: reverse() and resolve() every named URL (sample values for converters),
+- templates: compile every template into the cached loader,
+- database: open each connection (kept for CONN_MAX_AGE),
+- caches: open the cache clients, load the staticfiles manifest, translations,
+  auth backends / password hashers and the ContentType cache.
+
+Run it as `manage.py warmup` (--fresh times a whole cold boot in a new process), or set
+WARMUP_ON_STARTUP = True and wsgi.py / asgi.py run it when the worker loads.
+"""
+import logging
+import os
+import sys
+import time
+import uuid
+from importlib import import_module
+from importlib.util import find_spec
+
+from django.apps import apps
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, converters, get_resolver, resolve, reverse
+from django.urls.exceptions import NoReverseMatch, Resolver404
+
+logger = logging.getLogger(__name__)
+
+APP_MODULES = ("models", "admin", "forms", "views", "urls")
+TEMPLATE_SUFFIXES = (".html", ".txt", ".ics", ".xml")
+SAMPLES = {converters.IntConverter: 1, converters.UUIDConverter: uuid.UUID(int=1)}
+
+
+# -------- steps --------
+def warm_imports():
+    loaded = failed = 0
+    for config in apps.get_app_configs():
+        for module in APP_MODULES:
+            name = f"{config.name}.{module}"
+            if name in sys.modules:
+                continue
+            try:
+                if find_spec(name) is None:
+                    continue
+                import_module(name)
+                loaded += 1
+            except Exception:
+                logger.exception("Warm-up could not import %s", name)
+                failed += 1
+    return f"{loaded} app modules imported, {failed} failed"
+
+
+def _named_urls(patterns, namespace="", params=None):
+    for pattern in patterns:
+        found = {**(params or {}), **pattern.pattern.converters}
+        if isinstance(pattern, URLResolver):
+            prefix = f"{namespace}{pattern.namespace}:" if pattern.namespace else namespace
+            yield from _named_urls(pattern.url_patterns, prefix, found)
+        elif pattern.name:
+            yield namespace + pattern.name, found
+
+
+def warm_urls():
+    resolved = skipped = 0
+    for name, params in _named_urls(get_resolver().url_patterns):
+        kwargs = {key: SAMPLES.get(type(converter), "x") for key, converter in params.items()}
+        try:
+            resolve(reverse(name, kwargs=kwargs))
+            resolved += 1
+        except (NoReverseMatch, Resolver404):
+            skipped += 1  # regex patterns whose groups the sample values don't fit
+    return f"{resolved} named URLs reversed and resolved, {skipped} skipped"
+
+
+def warm_templates():
+    compiled = failed = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(TEMPLATE_SUFFIXES):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, "/")
+                    try:
+                        engine.get_template(name)  # the cached loader keeps the compiled Template
+                        compiled += 1
+                    except Exception:
+                        failed += 1
+    return f"{compiled} templates compiled, {failed} failed"
+
+
+def warm_database():
+    from django.db import connections
+    for connection in connections.all():
+        connection.ensure_connection()
+    return ", ".join(f"{c.alias} ({c.vendor})" for c in connections.all())
+
+
+def warm_caches():
+    from django.contrib.auth import get_backends
+    from django.contrib.auth.hashers import get_hashers
+    from django.contrib.contenttypes.models import ContentType
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.cache import caches
+    from django.utils import translation
+
+    for cache in caches.all():
+        cache.get("warmup")  # connects network caches
+    manifest = len(getattr(staticfiles_storage, "hashed_files", {}))
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext("Log in")
+    get_backends()
+    get_hashers()
+    ContentType.objects.get_for_models(*apps.get_models())
+    return f"{len(caches.all())} cache(s), {manifest} manifest entries, {len(apps.get_models())} content types"
+
+
+STEPS = {
+    "imports": warm_imports,
+    "urls": warm_urls,
+    "templates": warm_templates,
+    "database": warm_database,
+    "caches": warm_caches,
+}
+
+
+def warm_up(steps=None):
+    """Run the warm-up steps (all by default). Returns [{"step", "ms", "modules", "detail"}]."""
+    report = []
+    for name in steps or STEPS:
+        modules, start = len(sys.modules), time.perf_counter()
+        try:
+            detail = STEPS[name]()
+        except Exception as exc:
+            # a warm-up must never keep a worker from booting
+            logger.exception("Warm-up step %s failed", name)
+            detail = f"failed: {exc}"
+        report.append({
+            "step": name,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "modules": len(sys.modules) - modules,
+            "detail": detail,
+        })
+    return report
+
+
+def boot_report(boot_started, app_loaded, steps=None):
+    """The boot breakdown: django setup + application, then each warm-up step."""
+    report = [{"step": "setup", "ms": round((app_loaded - boot_started) * 1000, 1),
+               "modules": len(sys.modules), "detail": "django.setup() and the application handler"}]
+    return report + warm_up(steps)
+
+
+def on_startup(boot_started, app_loaded, steps=None):
+    """Startup hook for wsgi.py / asgi.py: warm up when WARMUP_ON_STARTUP is set and log the breakdown."""
+    if not getattr(settings, "WARMUP_ON_STARTUP", False):
+        return None
+    report = boot_report(boot_started, app_loaded, steps)
+    logger.info(
+        "Worker %s booted in %.1f ms: %s", os.getpid(), sum(step["ms"] for step in report),
+        ", ".join(f"{step['step']} {step['ms']} ms" for step in report),
+        extra={"boot": report},
+    )
+    return report
@@ -8,9 +8,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+boot_started = time.perf_counter()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todoProj.settings')
 
 application = get_wsgi_application()
+
+# WARMUP_ON_STARTUP: compile templates, build the URL resolvers, connect, ... before the first request
+from todoProj.warmup import on_startup  # noqa: E402
+
+on_startup(boot_started, time.perf_counter())
@@ -1,3 +1,14 @@
 from django.contrib import admin
 
+from .models import AccountDeletion
+
 # Register your models here.
+
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ("user", "requested_at", "goals_deleted", "tasks_deleted", "rows_deleted", "updated_at")
+    readonly_fields = list_display
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,82 @@
+"""
+The authenticated-user lookup without a query per request.
+
+AuthenticationMiddleware loads request.user through the session's backend. The
+default ModelBackend runs a SELECT on auth_user for it on every request.
+CachedModelBackend keeps the loaded user in the cache for USERS_AUTH_CACHE_TIMEOUT
+seconds instead. Sessions themselves come from the cache too
+(SESSION_ENGINE = cached_db, or signed_cookies), so an authenticated request can
+reach the view without touching the database.
+
+Django still checks the session's password hash against the user it gets back, and
+the receivers in models.py drop the cached copy whenever the user is saved
+(password change, deactivation, last_login, ...), deleted or logs out. A password
+change therefore ends other sessions on their next request, as before. Changes made
+with QuerySet.update() bypass the receivers and show up once the short TTL runs out.
+
+All of that only holds when every worker sees the same cache. With a per-process
+LocMemCache an invalidation reaches the one worker that made it, so outside DEBUG
+the backend then falls back to a query per request, and the users.E001 check
+fails. settings.py therefore turns the backend and cached sessions on only with a
+shared cache (REDIS_URL). A single-process server (the load test) may opt in by
+silencing the check.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+CACHE_KEY = "users:auth:{user_id}"
+LOCAL_CACHE_CHECK = "users.E001"
+CACHED_SESSION_ENGINES = ("django.contrib.sessions.backends.cache", "django.contrib.sessions.backends.cached_db")
+
+
+def timeout():
+    return getattr(settings, "USERS_AUTH_CACHE_TIMEOUT", 60)
+
+
+def cache_is_shared(alias="default"):
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def local_cache_allowed():
+    return settings.DEBUG or LOCAL_CACHE_CHECK in settings.SILENCED_SYSTEM_CHECKS
+
+
+def invalidate(user_id):
+    if user_id:
+        cache.delete(CACHE_KEY.format(user_id=user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() (the per-request lookup) is served from the cache."""
+
+    def get_user(self, user_id):
+        if not timeout() or not (cache_is_shared() or local_cache_allowed()):
+            return super().get_user(user_id)
+        key = CACHE_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            # only active users come back; missing or inactive ones are looked up again
+            if user is not None:
+                cache.set(key, user, timeout())
+        return user
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Cached users and sessions must live in a cache every worker shares."""
+    users = (
+        "users.auth.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS and timeout() and not cache_is_shared()
+    )
+    sessions = settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and not cache_is_shared(settings.SESSION_CACHE_ALIAS)
+    if local_cache_allowed() or not (users or sessions):
+        return []
+    return [checks.Error(
+        "Sessions or request.user are cached in a per-process LocMemCache.",
+        hint="Point CACHES at a cache all workers share (Redis, Memcached): a logout, password "
+             "change or deactivation on one worker would not reach the others.",
+        id=LOCAL_CACHE_CHECK,
+    )]
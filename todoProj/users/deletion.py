@@ -0,0 +1,133 @@
+"""
+Account deletion without one giant cascade.
+
+user.delete() makes Django's collector load every goal, task, tag link and log row
+of the account into memory and delete it all in one transaction, which holds locks
+for as long as that takes and can exhaust a worker on a heavy account. Instead:
+
+- request_deletion() (the "Delete account" page) only deactivates the user and
+  records an AccountDeletion, so the account is unusable at once (inactive users
+  can't log in and their sessions stop authenticating).
+- `manage.py purge_deleted_accounts` (cron, or a worker) then removes the data in
+  batches: every batch is one transaction that selects up to `size` primary keys of
+  the first table that still has rows and deletes them with one plain DELETE ... WHERE
+  pk IN (...). Tables go children first (tag links, tasks, goals, ...), so no batch
+  relies on a database cascade. With nothing left, user.delete() removes the account
+  itself, and the collector finds only empty relations.
+
+Nothing is kept in memory between batches: what is left to purge is what is left in
+the tables, so an interrupted run simply continues where it stopped. The per-row
+post_delete receivers are skipped on purpose (tombstones and live updates for an
+account that no longer exists); the per-user caches are dropped at the end instead.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from goals import calendar, tags
+from goals.db import raw_delete
+from goals.models import (
+    ActivityLog, ArchivedGoal, ArchivedTask, ArchiveTotals, CalendarFeedKey, DailyAchievement, Goal, GoalTag,
+    LiveEvent, Tag, Task, TaskTag, Tombstone,
+)
+
+from .models import AccountDeletion
+
+
+def batch_size():
+    return getattr(settings, "USERS_PURGE_BATCH_SIZE", 1000)
+
+
+def _detach(queryset):
+    # parents / recurrence templates go in other batches; nothing may point at them by then
+    queryset.update(parent=None, recurs_from=None)
+
+
+# (name, counter, rows still to handle for a user id, action); children before parents
+STEPS = [
+    ("task tags", "rows_deleted",
+     lambda uid: TaskTag.objects.filter(Q(tag__user_id=uid) | Q(task__user_id=uid) | Q(task__goal__user_id=uid)),
+     raw_delete),
+    ("goal tags", "rows_deleted",
+     lambda uid: GoalTag.objects.filter(Q(tag__user_id=uid) | Q(goal__user_id=uid)),
+     raw_delete),
+    ("subtask links", None,
+     lambda uid: Task.objects.filter(Q(user_id=uid) | Q(goal__user_id=uid))
+     .filter(Q(parent__isnull=False) | Q(recurs_from__isnull=False)),
+     _detach),
+    ("tasks", "tasks_deleted", lambda uid: Task.objects.filter(Q(user_id=uid) | Q(goal__user_id=uid)), raw_delete),
+    ("goals", "goals_deleted", lambda uid: Goal.objects.filter(user_id=uid), raw_delete),
+    ("tags", "rows_deleted", lambda uid: Tag.objects.filter(user_id=uid), raw_delete),
+    ("activity", "rows_deleted", lambda uid: ActivityLog.objects.filter(user_id=uid), raw_delete),
+    ("achievements", "rows_deleted", lambda uid: DailyAchievement.objects.filter(user_id=uid), raw_delete),
+    ("tombstones", "rows_deleted", lambda uid: Tombstone.objects.filter(user_id=uid), raw_delete),
+    ("live events", "rows_deleted", lambda uid: LiveEvent.objects.filter(user_id=uid), raw_delete),
+    ("calendar feed key", "rows_deleted", lambda uid: CalendarFeedKey.objects.filter(user_id=uid), raw_delete),
+    ("archived tasks", "rows_deleted",
+     lambda uid: ArchivedTask.objects.filter(Q(user_id=uid) | Q(goal__user_id=uid)),
+     raw_delete),
+    ("archived goals", "rows_deleted", lambda uid: ArchivedGoal.objects.filter(user_id=uid), raw_delete),
+    ("archive totals", "rows_deleted", lambda uid: ArchiveTotals.objects.filter(user_id=uid), raw_delete),
+]
+
+
+def request_deletion(user):
+    """Deactivate the account now and queue its data for purge_deleted_accounts."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        AccountDeletion.objects.get_or_create(user=user)
+
+
+def pending():
+    return AccountDeletion.objects.all()
+
+
+def purge_batch(user_id, size=None):
+    """
+    Purge up to `size` rows of one account, in one transaction. Returns (step, rows):
+    ("busy", 0) if another process holds this account, ("account", 1) once the user
+    row itself was deleted, or (None, 0) if the account isn't queued for deletion.
+    """
+    size = size or batch_size()
+    with transaction.atomic():
+        deletion = AccountDeletion.objects.select_for_update(skip_locked=True).filter(pk=user_id).first()
+        if deletion is None:
+            return ("busy", 0) if AccountDeletion.objects.filter(pk=user_id).exists() else (None, 0)
+        for name, counter, rows, action in STEPS:
+            queryset = rows(user_id)
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:size])
+            if ids:
+                action(queryset.model.objects.filter(pk__in=ids))
+                changes = {"updated_at": timezone.now()}
+                if counter:
+                    changes[counter] = F(counter) + len(ids)
+                AccountDeletion.objects.filter(pk=user_id).update(**changes)
+                return name, len(ids)
+        # only the account is left: the collector now walks empty relations
+        get_user_model().objects.get(pk=user_id).delete()
+    tags.invalidate(user_id)
+    calendar.invalidate_feed(user_id)
+    return "account", 1
+
+
+def purge_account(user_id, size=None, max_batches=None, progress=None):
+    """
+    Purge one account batch by batch. `progress(step, rows)` runs after every batch.
+    Returns True when the account is gone, False if it stopped early (max_batches, busy).
+    """
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        step, rows = purge_batch(user_id, size)
+        if step is None:
+            return True
+        if step == "busy":
+            return False
+        batches += 1
+        if progress:
+            progress(step, rows)
+        if step == "account":
+            return True
+    return False
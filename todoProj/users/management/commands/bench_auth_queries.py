@@ -0,0 +1,78 @@
+import time
+import uuid
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users import auth
+
+MODEL_BACKEND = "django.contrib.auth.backends.ModelBackend"
+CACHED_BACKEND = "users.auth.CachedModelBackend"
+
+SETUPS = [
+    ("db sessions + ModelBackend (before)", "django.contrib.sessions.backends.db", MODEL_BACKEND),
+    ("cached_db + ModelBackend", "django.contrib.sessions.backends.cached_db", MODEL_BACKEND),
+    ("cached_db + CachedModelBackend", "django.contrib.sessions.backends.cached_db", CACHED_BACKEND),
+    ("signed_cookies + CachedModelBackend", "django.contrib.sessions.backends.signed_cookies", CACHED_BACKEND),
+]
+
+
+def view(request):
+    # the goals views all touch request.user (LoginRequiredMixin, owner querysets)
+    return HttpResponse(str(request.user.pk))
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request query floor of an authenticated request: the queries SessionMiddleware and "
+        "AuthenticationMiddleware run before any view code, for each session store / auth backend. "
+        "Uses a throwaway user inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per setup (after one warm-up).")
+
+    def handle(self, *args, requests, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(f"bench-{uuid.uuid4().hex[:8]}")
+            results = [self.measure(label, engine, backend, user, requests) for label, engine, backend in SETUPS]
+            transaction.set_rollback(True)
+        auth.invalidate(user.pk)
+
+        self.stdout.write(f"{requests} authenticated requests per setup")
+        self.stdout.write(f"{'':40}{'queries/request':>16}{'us/request':>12}")
+        for label, queries, us in results:
+            self.stdout.write(f"{label:40}{queries:>16.2f}{us:>12.0f}")
+
+    def measure(self, label, engine, backend, user, requests):
+        with override_settings(SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]):
+            store = import_module(engine).SessionStore()
+            store[SESSION_KEY] = user._meta.pk.value_to_string(user)
+            store[BACKEND_SESSION_KEY] = backend
+            store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            store.save()
+            handler = SessionMiddleware(AuthenticationMiddleware(view))
+            factory = RequestFactory()
+
+            def request():
+                req = factory.get("/goals/")
+                req.COOKIES[settings.SESSION_COOKIE_NAME] = store.session_key
+                response = handler(req)
+                assert response.content == str(user.pk).encode(), f"{label}: not authenticated"
+
+            request()  # warm-up: fills the session and user caches
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(requests):
+                    request()
+                elapsed = time.perf_counter() - start
+            store.delete()
+        return label, len(queries) / requests, elapsed / requests * 1_000_000
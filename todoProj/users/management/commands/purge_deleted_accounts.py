@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from users import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove the data of deleted accounts (see users/deletion.py) in bounded batches, one "
+        "transaction each, then the accounts themselves. Safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only this user id (repeatable).")
+        parser.add_argument("--batch-size", type=int, help="Rows per transaction (default USERS_PURGE_BATCH_SIZE).")
+        parser.add_argument("--max-batches", type=int, help="Stop each account after this many batches.")
+
+    def handle(self, *args, users=None, batch_size=None, max_batches=None, **options):
+        queue = deletion.pending()
+        if users:
+            queue = queue.filter(pk__in=users)
+        done = left = 0
+        for user_id in list(queue.values_list("pk", flat=True)):
+            totals = {}
+
+            def progress(step, rows):
+                totals[step] = totals.get(step, 0) + rows
+                self.stdout.write(f"user {user_id}: {step} -{rows} ({totals[step]} this run)")
+
+            if deletion.purge_account(user_id, batch_size, max_batches, progress):
+                done += 1
+                self.stdout.write(self.style.SUCCESS(f"user {user_id}: purged"))
+            else:
+                left += 1
+                self.stdout.write(f"user {user_id}: not finished (batch limit, or another run holds it)")
+        self.stdout.write(self.style.SUCCESS(f"Purge complete: {done} account(s) removed, {left} still pending."))
@@ -1,3 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 
 # Create your models here.
+
+
+class AccountDeletion(models.Model):
+    """
+    A deleted account whose data is still being purged (see deletion.py). The user is
+    inactive from the moment this row exists; the row goes away with the user once
+    the purge is done. The counters survive interrupted runs.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="deletion",
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+    goals_deleted = models.PositiveBigIntegerField(default=0)
+    tasks_deleted = models.PositiveBigIntegerField(default=0)
+    rows_deleted = models.PositiveBigIntegerField(default=0)  # tags, logs, archive, ...
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["requested_at"]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.goals_deleted} goals, {self.tasks_deleted} tasks, {self.rows_deleted} other rows purged"
+
+
+# Drop the cached request.user (see auth.py) whenever the account changes or logs out.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    from .auth import invalidate
+    invalidate(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_cached_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        from .auth import invalidate
+        invalidate(user.pk)
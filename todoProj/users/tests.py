@@ -1,3 +1,96 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from goals import tags
+from goals.models import Goal, Tag, Task
+
+from . import auth, deletion
+from .models import AccountDeletion
+
+LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCAL, USERS_AUTH_CACHE_TIMEOUT=60, AUTHENTICATION_BACKENDS=[
+    "users.auth.CachedModelBackend", "django.contrib.auth.backends.ModelBackend",
+])
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("auth", password="pw")
+        cache.clear()
+
+    def test_local_cache_is_refused_outside_debug(self):
+        with override_settings(DEBUG=False, SILENCED_SYSTEM_CHECKS=[]):
+            self.assertEqual([e.id for e in auth.check_shared_cache(None)], [auth.LOCAL_CACHE_CHECK])
+            auth.CachedModelBackend().get_user(self.user.pk)
+            with self.assertNumQueries(1):
+                auth.CachedModelBackend().get_user(self.user.pk)
+        with override_settings(DEBUG=True):
+            self.assertEqual(auth.check_shared_cache(None), [])
+
+    def test_check_only_applies_when_caching_is_on(self):
+        with override_settings(DEBUG=False, SILENCED_SYSTEM_CHECKS=[], SESSION_ENGINE="django.contrib.sessions.backends.db"):
+            with override_settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"]):
+                self.assertEqual(auth.check_shared_cache(None), [])
+            with override_settings(USERS_AUTH_CACHE_TIMEOUT=0):
+                self.assertEqual(auth.check_shared_cache(None), [])
+
+    def test_cached_user_is_dropped_on_save(self):
+        with override_settings(DEBUG=True):
+            auth.CachedModelBackend().get_user(self.user.pk)
+            with self.assertNumQueries(0):
+                auth.CachedModelBackend().get_user(self.user.pk)
+            self.user.is_active = False
+            self.user.save()
+            self.assertIsNone(auth.CachedModelBackend().get_user(self.user.pk))
+
+    def test_sessions_of_the_previous_backend_still_work(self):
+        session = self.client.session
+        session.update({"_auth_user_id": str(self.user.pk), "_auth_user_hash": self.user.get_session_auth_hash(),
+                        "_auth_user_backend": "django.contrib.auth.backends.ModelBackend"})
+        session.save()
+        self.client.cookies["sessionid"] = session.session_key
+        self.assertEqual(self.client.get("/goals/").status_code, 200)
+
+
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user("leaving", password="pw")
+        self.other = User.objects.create_user("staying", password="pw")
+        today = datetime.date.today()
+        for g in range(4):
+            goal = Goal.objects.create(user=self.user, title=f"Goal {g}")
+            tags.set_tags(goal, ["work"])
+            parent = Task.objects.create(user=self.user, goal=goal, title="repeat", recurrence="daily", due_date=today)
+            child = Task.objects.create(user=self.user, goal=goal, title="child", parent=parent)
+            Task.objects.create(user=self.user, goal=goal, title="occurrence", recurs_from=parent, occurrence_date=today)
+            tags.set_tags(child, ["work"])
+        kept = Goal.objects.create(user=self.other, title="Kept")
+        Task.objects.create(user=self.other, goal=kept, title="Kept")
+
+    def test_view_checks_the_password_and_deactivates(self):
+        self.client.force_login(self.user)
+        self.client.post("/users/delete/", {"password": "wrong"})
+        self.assertFalse(AccountDeletion.objects.exists())
+        self.assertEqual(self.client.post("/users/delete/", {"password": "pw"}).status_code, 302)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(AccountDeletion.objects.filter(pk=self.user.pk).exists())
+
+    def test_purge_resumes_after_an_interrupted_run(self):
+        deletion.request_deletion(self.user)
+        self.assertFalse(deletion.purge_account(self.user.pk, size=3, max_batches=4))
+        counters = AccountDeletion.objects.get(pk=self.user.pk)
+        self.assertEqual(counters.rows_deleted, 8)  # the tag links went first
+
+        call_command("purge_deleted_accounts", batch_size=3, stdout=StringIO())
+        self.assertFalse(get_user_model().objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(AccountDeletion.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+        self.assertEqual(list(Task.objects.values_list("user__username", flat=True)), ["staying"])
+        self.assertEqual(list(Goal.objects.values_list("user__username", flat=True)), ["staying"])
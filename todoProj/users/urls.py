@@ -6,5 +6,6 @@ app_name = 'users'
 urlpatterns = [
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
-    path('logout/', views.logout_view, name='logout')
+    path('logout/', views.logout_view, name='logout'),
+    path('delete/', views.delete_account_view, name='delete_account'),
 ]
\ No newline at end of file
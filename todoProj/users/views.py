@@ -1,6 +1,12 @@
 from django.shortcuts import render, redirect
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout
+
+from .deletion import request_deletion
+from .forms import DeleteAccountForm
+
 # Create your views here.
 def register_view(request):
     if request.method == "POST":
@@ -30,3 +36,16 @@ def logout_view(request):
         logout(request)
         return redirect("goals:list")
 
+@login_required
+def delete_account_view(request):
+    # the account is switched off right away; purge_deleted_accounts removes its data in batches
+    if request.method == "POST":
+        form = DeleteAccountForm(request.POST, user=request.user)
+        if form.is_valid():
+            request_deletion(request.user)
+            logout(request)
+            messages.success(request, "Your account has been deleted.")
+            return redirect("/")
+    else:
+        form = DeleteAccountForm(user=request.user)
+    return render(request, "users/delete_account.html", {"form": form})